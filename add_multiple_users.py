@@ -1,11 +1,10 @@
 import asyncio
+from app.container import AppContainer
 from app.services.userService import UserService
 
 
 async def add_multiple_users():
     """Добавить несколько пользователей в базу данных"""
-    await UserService.initialize()
-    
     # Список пользователей для добавления
     users_to_add = [
         {
@@ -37,12 +36,16 @@ async def add_multiple_users():
     
     print("Добавление пользователей...\n")
     
-    for user_data in users_to_add:
-        try:
-            user_id = await UserService.create_user(**user_data)
-            print(f"✅ Добавлен: {user_data['name']} ({user_data['access_level']})")
-        except Exception as e:
-            print(f"❌ Ошибка при добавлении {user_data['name']}: {e}")
+    # Одна транзакция на всех; уже существующие пользователи не меняются
+    try:
+        added = set(await UserService.add_users(users_to_add))
+        for user_data in users_to_add:
+            if user_data['name'] in added:
+                print(f"✅ Добавлен: {user_data['name']} ({user_data['access_level']})")
+            else:
+                print(f"⏭️ Пропущен (уже существует): {user_data['name']}")
+    except Exception as e:
+        print(f"❌ Ошибка при добавлении пользователей: {e}")
     
     print("\n" + "="*80)
     print("Все пользователи в базе:")
@@ -61,5 +64,10 @@ async def add_multiple_users():
         print()
 
 
+async def main():
+    async with AppContainer():
+        await add_multiple_users()
+
+
 if __name__ == "__main__":
-    asyncio.run(add_multiple_users())
+    asyncio.run(main())
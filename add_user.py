@@ -1,11 +1,10 @@
 import asyncio
+from app.container import AppContainer
 from app.services.userService import UserService
 
 
 async def add_user():
     """Добавить нового пользователя в базу данных"""
-    await UserService.initialize()
-    
     # Добавляем пользователя Даник с уровнем доступа manager
     user_id = await UserService.create_user(
         name="Даник",
@@ -25,5 +24,10 @@ async def add_user():
         print(f"  Доступен: {user.get('available')}")
 
 
+async def main():
+    async with AppContainer():
+        await add_user()
+
+
 if __name__ == "__main__":
-    asyncio.run(add_user())
+    asyncio.run(main())
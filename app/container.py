@@ -0,0 +1,78 @@
+# app/container.py
+import logging
+import time
+from typing import Dict, Optional
+
+from app.db import BaseDatabase, create_database
+from app.services.userService import UserService
+from app.services.taskService import TaskService
+from app.services.formService import FormService
+from app.services.plannedCheckService import PlannedCheckService
+from app.services.checkService import CheckService
+from app.services.errorService import ErrorService
+from app.services.bitrix_sync import BitrixSyncService
+
+logger = logging.getLogger(__name__)
+
+# Сервисы, которые работают с базой данных
+SERVICES = (
+    UserService, TaskService, FormService, PlannedCheckService, CheckService, ErrorService, BitrixSyncService,
+)
+
+
+class AppContainer:
+    """
+    Контейнер приложения: создаёт одну общую базу данных (бэкенд выбирается
+    в config.DB_BACKEND), внедряет её
+    во все сервисы и один раз выполняет настройку (пул соединений, миграции)
+    
+    Использование:
+        async with AppContainer() as app:
+            ...
+    """
+    
+    def __init__(self, db: Optional[BaseDatabase] = None):
+        self.db = db or create_database()
+        # Время этапов запуска в миллисекундах
+        self.startup_timings: Dict[str, float] = {}
+        self._started = False
+    
+    async def setup(self):
+        """Подключиться к базе, применить миграции и внедрить базу в сервисы"""
+        if self._started:
+            return
+        
+        started = time.perf_counter()
+        
+        stage = time.perf_counter()
+        await self.db.connect()
+        self.startup_timings['connect'] = (time.perf_counter() - stage) * 1000
+        
+        stage = time.perf_counter()
+        await self.db.initialize()
+        self.startup_timings['migrations'] = (time.perf_counter() - stage) * 1000
+        
+        for service in SERVICES:
+            service.db = self.db
+        
+        self.startup_timings['total'] = (time.perf_counter() - started) * 1000
+        self._started = True
+        logger.info(
+            "Приложение готово за %.1f мс (%s)",
+            self.startup_timings['total'],
+            ", ".join(f"{name}: {ms:.1f} мс" for name, ms in self.startup_timings.items() if name != 'total')
+        )
+    
+    async def shutdown(self):
+        """Закрыть пул соединений с базой данных"""
+        logger.info("Кэш пользователей: %s", UserService.get_cache_stats())
+        logger.info("Кэш форм: %s", FormService.get_cache_stats())
+        await self.db.close()
+        self._started = False
+    
+    async def __aenter__(self) -> 'AppContainer':
+        await self.setup()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.shutdown()
@@ -1,105 +1,213 @@
 # db.py
+import asyncio
+import logging
 import aiosqlite
-from typing import List, Dict, Optional
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Iterable, List, Dict, Optional, Sequence, Type, TypeVar
 
-class Database:
-    def __init__(self, db_name: str = "app.db"):
-        self.db_name = db_name
-    
-    async def initialize(self):
-        """Инициализировать базу данных"""
-        await self._create_tables()
-    
-    async def _create_tables(self):
-        """Создать таблицы"""
-        async with aiosqlite.connect(self.db_name) as conn:
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id TEXT,
-                    name TEXT PRIMARY KEY,
-                    access_level TEXT NOT NULL CHECK(access_level IN ('admin', 'manager', 'office_worker', 'leader', 'worker')),
-                    available BOOL NOT NULL,
-                    part_name TEXT
-                )
-            ''')
+from config import (
+    DB_BACKEND, DB_PATH, DB_READERS, DB_COMMIT_WINDOW, DB_MAX_BATCH,
+    POSTGRES_DSN, POSTGRES_POOL_MIN, POSTGRES_POOL_MAX,
+)
+from app.migrations import run_migrations
+from app.models.rows import RowModel
 
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    info TEXT UNIQUE NOT NULL
-                )
-            ''')
+logger = logging.getLogger(__name__)
 
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS forms (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    part_name TEXT UNIQUE,
-                    tasks TEXT NOT NULL
-                )
-            ''')
+# Операция записи: получает соединение и возвращает результат вызывающему.
+# У соединения любого бэкенда есть execute(sql, params) и executemany(sql, params),
+# возвращающие курсор с rowcount, lastrowid, fetchone() и fetchall()
+WriteOp = Callable[[Any], Awaitable[Any]]
 
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS errors (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    comment TEXT NOT NULL,
-                    photo_url TEXT
-                )
-            ''')
+R = TypeVar('R', bound=RowModel)
 
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS checks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    form_id INTEGER NOT NULL,
-                    grades TEXT NOT NULL,
-                    errors_ids TEXT,
-                    addition TEXT,
-                    reviewer_id INTEGER NOT NULL,
-                    checked_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (form_id) REFERENCES forms(id) ON DELETE CASCADE,
-                    FOREIGN KEY (reviewer_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            ''')
+# Настройки соединений: WAL позволяет читать параллельно с записью,
+# synchronous=NORMAL в режиме WAL делает fsync только на чекпоинтах.
+# foreign_keys не включается: users.id не уникален (UNIQUE он только в PostgreSQL),
+# а зависимыми строками управляют сервисы (в PostgreSQL ключи без каскадов, см. миграцию 8)
+PRAGMAS = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA temp_store = MEMORY",
+)
 
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS planned_checks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    time DATETIME NOT NULL,
-                    form_id INTEGER NOT NULL,
-                    reviewer_id INTEGER NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (form_id) REFERENCES forms(id) ON DELETE CASCADE,
-                    FOREIGN KEY (reviewer_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            ''')
-            
-            await conn.commit()
+# Максимум параметров в одном IN (...): старые сборки SQLite ограничивают запрос 999 переменными
+IN_CHUNK_SIZE = 500
+
+
+class BaseDatabase:
+    """
+    Общая часть бэкендов базы данных.
+    
+    SQL-методы (add, select, query, upsert_many, ...) пишутся один раз поверх
+    примитивов бэкенда: transaction, _fetch и _fetch_tuples. Запросы используют
+    плейсхолдеры '?' и синтаксис, общий для SQLite и PostgreSQL.
+    """
+    
+    # Имя диалекта: 'sqlite' или 'postgres' (миграции выбирают по нему DDL)
+    dialect = ''
+    
+    def __init__(self):
+        self._init_lock = asyncio.Lock()
+        self._initialized = False
+    
+    async def initialize(self):
+        """Инициализировать базу данных: применить неприменённые миграции (один раз)"""
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if not self._initialized:
+                await run_migrations(self)
+                self._initialized = True
+    
+    async def connect(self):
+        """Открыть соединения с базой"""
+        raise NotImplementedError
+    
+    async def close(self):
+        """Закрыть соединения с базой"""
+        raise NotImplementedError
+    
+    async def transaction(self, op: WriteOp) -> Any:
+        """
+        Выполнить операцию записи атомарно: все запросы op(conn) фиксируются
+        вместе или не фиксируются совсем. Возвращает результат op
+        """
+        raise NotImplementedError
+    
+    async def set_trace_callback(self, callback: Optional[Callable[[str], None]]):
+        """Установить callback, получающий текст каждого выполненного запроса"""
+        raise NotImplementedError
+    
+    async def _fetch(self, sql: str, params: tuple = ()) -> List[Dict]:
+        """Выполнить запрос на чтение и вернуть строки словарями"""
+        raise NotImplementedError
+    
+    async def _fetch_tuples(self, sql: str, params: tuple = ()) -> List[Sequence]:
+        """Выполнить запрос на чтение и вернуть строки кортежами"""
+        raise NotImplementedError
     
     async def add(self, table: str, **data) -> int:
         """Добавить запись в таблицу"""
-        async with aiosqlite.connect(self.db_name) as conn:
-            columns = ', '.join(data.keys())
-            placeholders = ', '.join(['?' for _ in data])
-            query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-            
+        columns = ', '.join(data.keys())
+        placeholders = ', '.join(['?' for _ in data])
+        query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+        
+        async def op(conn):
             cursor = await conn.execute(query, tuple(data.values()))
-            await conn.commit()
             return cursor.lastrowid
+        
+        return await self.transaction(op)
+    
+    async def select(self, model: Type[R], where: str = '', params: tuple = ()) -> List[R]:
+        """
+        Прочитать строки таблицы model.TABLE в объекты model.
+        
+        Args:
+            where: хвост запроса после FROM (WHERE / ORDER BY / LIMIT), может быть пустым
+        """
+        columns = ', '.join(model.columns())
+        rows = await self._fetch_tuples(f"SELECT {columns} FROM {model.TABLE} {where}", params)
+        from_row = model.from_row
+        return [from_row(row) for row in rows]
+    
+    async def select_one(self, model: Type[R], where: str = '', params: tuple = ()) -> Optional[R]:
+        """Прочитать первую подходящую строку таблицы model.TABLE"""
+        rows = await self.select(model, f"{where} LIMIT 1", params)
+        return rows[0] if rows else None
+    
+    async def get_row_by_id(self, model: Type[R], item_id: Any) -> Optional[R]:
+        """Получить строку по ID"""
+        return await self.select_one(model, "WHERE id = ?", (item_id,))
+    
+    async def get_rows_by_ids(self, model: Type[R], ids: Iterable, key: str = 'id') -> List[R]:
+        """Получить строки по списку ключей (порядок входных ключей, отсутствующие пропускаются)"""
+        ids = list(ids)
+        unique_ids = list(dict.fromkeys(ids))
+        found = {}
+        for start in range(0, len(unique_ids), IN_CHUNK_SIZE):
+            chunk = unique_ids[start:start + IN_CHUNK_SIZE]
+            placeholders = ', '.join(['?' for _ in chunk])
+            for row in await self.select(model, f"WHERE {key} IN ({placeholders})", tuple(chunk)):
+                found[str(getattr(row, key))] = row
+        return [found[str(item_id)] for item_id in ids if str(item_id) in found]
+    
+    # Методы ниже возвращают словари — совместимость на время перехода
+    # на типизированные строки (select / get_row_by_id / get_rows_by_ids)
     
     async def get_all(self, table: str) -> List[Dict]:
         """Получить все записи из таблицы"""
-        async with aiosqlite.connect(self.db_name) as conn:
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute(f"SELECT * FROM {table}")
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetch(f"SELECT * FROM {table}")
     
     async def get_by_id(self, table: str, item_id: int) -> Optional[Dict]:
         """Получить запись по ID"""
-        async with aiosqlite.connect(self.db_name) as conn:
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute(f"SELECT * FROM {table} WHERE id = ?", (item_id,))
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        rows = await self._fetch(f"SELECT * FROM {table} WHERE id = ? LIMIT 1", (item_id,))
+        return rows[0] if rows else None
+    
+    async def get_many_by_ids(self, table: str, ids: Iterable, key: str = 'id') -> List[Dict]:
+        """
+        Получить записи по списку ключей запросами IN (...) порциями по IN_CHUNK_SIZE.
+        Записи возвращаются в порядке входных ключей, отсутствующие пропускаются
+        """
+        ids = list(ids)
+        unique_ids = list(dict.fromkeys(ids))
+        found = {}
+        for start in range(0, len(unique_ids), IN_CHUNK_SIZE):
+            chunk = unique_ids[start:start + IN_CHUNK_SIZE]
+            placeholders = ', '.join(['?' for _ in chunk])
+            rows = await self._fetch(f"SELECT * FROM {table} WHERE {key} IN ({placeholders})", tuple(chunk))
+            for row in rows:
+                found[str(row[key])] = row
+        # Ключи сравниваются как строки: users.id хранится в TEXT, а приходит и числом
+        return [found[str(item_id)] for item_id in ids if str(item_id) in found]
+    
+    async def add_many(self, table: str, rows: Sequence[Dict]) -> int:
+        """Добавить записи одной транзакцией (executemany). Возвращает число добавленных строк"""
+        if not rows:
+            return 0
+        columns = list(rows[0].keys())
+        placeholders = ', '.join(['?' for _ in columns])
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        params = [tuple(row[column] for column in columns) for row in rows]
+        
+        async def op(conn):
+            cursor = await conn.executemany(query, params)
+            return cursor.rowcount
+        
+        return await self.transaction(op)
+    
+    async def upsert_many(self, table: str, rows: Sequence[Dict], conflict: Sequence[str],
+                          update: Optional[Sequence[str]] = None) -> int:
+        """
+        Добавить или обновить записи одной транзакцией (INSERT ... ON CONFLICT).
+        
+        Args:
+            conflict: колонки уникального ключа, по которому ищется существующая запись
+            update: колонки, которые обновляются у существующей записи
+                    (по умолчанию все, кроме conflict; пустой список — не обновлять)
+        """
+        if not rows:
+            return 0
+        columns = list(rows[0].keys())
+        if update is None:
+            update = [column for column in columns if column not in conflict]
+        placeholders = ', '.join(['?' for _ in columns])
+        query = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({', '.join(conflict)}) "
+        )
+        if update:
+            query += "DO UPDATE SET " + ', '.join(f"{column} = excluded.{column}" for column in update)
+        else:
+            query += "DO NOTHING"
+        params = [tuple(row[column] for column in columns) for row in rows]
+        
+        async def op(conn):
+            cursor = await conn.executemany(query, params)
+            return cursor.rowcount
+        
+        return await self.transaction(op)
     
     async def update(self, table: str, item_id: int, **data) -> bool:
         """Обновить запись"""
@@ -110,29 +218,208 @@ class Database:
         values = list(data.values())
         values.append(item_id)
         
-        async with aiosqlite.connect(self.db_name) as conn:
-            cursor = await conn.execute(f"UPDATE {table} SET {set_clause} WHERE id = ?", values)
-            await conn.commit()
-            return cursor.rowcount > 0
+        rowcount = await self.execute(f"UPDATE {table} SET {set_clause} WHERE id = ?", tuple(values))
+        return rowcount > 0
     
     async def delete(self, table: str, item_id: int) -> bool:
         """Удалить запись"""
-        async with aiosqlite.connect(self.db_name) as conn:
-            cursor = await conn.execute(f"DELETE FROM {table} WHERE id = ?", (item_id,))
-            await conn.commit()
-            return cursor.rowcount > 0
+        rowcount = await self.execute(f"DELETE FROM {table} WHERE id = ?", (item_id,))
+        return rowcount > 0
     
     async def query(self, sql: str, params: tuple = ()) -> List[Dict]:
         """Выполнить произвольный SQL запрос"""
-        async with aiosqlite.connect(self.db_name) as conn:
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute(sql, params)
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetch(sql, params)
     
     async def execute(self, sql: str, params: tuple = ()) -> int:
         """Выполнить SQL команду (без возврата данных)"""
-        async with aiosqlite.connect(self.db_name) as conn:
+        async def op(conn):
+            cursor = await conn.execute(sql, params)
+            return cursor.rowcount
+        
+        return await self.transaction(op)
+
+
+class Database(BaseDatabase):
+    """SQLite: пул читателей и единственный писатель с group commit"""
+    
+    dialect = 'sqlite'
+    
+    def __init__(self, db_name: str = DB_PATH, readers: int = DB_READERS,
+                 commit_window: float = DB_COMMIT_WINDOW, max_batch: int = DB_MAX_BATCH):
+        super().__init__()
+        self.db_name = db_name
+        self.readers = max(1, readers)
+        self.commit_window = commit_window
+        self.max_batch = max(1, max_batch)
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._reader_conns: List[aiosqlite.Connection] = []
+        self._reader_pool: Optional[asyncio.Queue] = None
+        self._connect_lock = asyncio.Lock()
+    
+    async def connect(self):
+        """Открыть пул соединений и запустить писателя"""
+        if self._writer is not None:
+            return
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            # Писатель работает в autocommit-режиме, транзакциями управляет _writer_loop
+            writer = await aiosqlite.connect(self.db_name, isolation_level=None)
+            readers = []
+            pool = asyncio.Queue()
+            try:
+                await writer.execute("PRAGMA journal_mode = WAL")
+                for pragma in PRAGMAS:
+                    await writer.execute(pragma)
+                for _ in range(self.readers):
+                    conn = await aiosqlite.connect(self.db_name)
+                    conn.row_factory = aiosqlite.Row
+                    readers.append(conn)
+                    for pragma in PRAGMAS:
+                        await conn.execute(pragma)
+                    pool.put_nowait(conn)
+            except Exception:
+                for conn in readers:
+                    await conn.close()
+                await writer.close()
+                raise
+            self._reader_conns = readers
+            self._reader_pool = pool
+            self._write_queue = asyncio.Queue()
+            self._writer = writer
+            self._writer_task = asyncio.create_task(self._writer_loop())
+    
+    async def close(self):
+        """Дождаться очереди записи и закрыть все соединения пула"""
+        async with self._connect_lock:
+            if self._writer is None:
+                return
+            # None — сигнал остановки, встаёт в очередь после уже отправленных записей
+            self._write_queue.put_nowait(None)
+            await self._writer_task
+            await self._writer.close()
+            for conn in self._reader_conns:
+                await conn.close()
+            self._writer = None
+            self._writer_task = None
+            self._write_queue = None
+            self._reader_conns = []
+            self._reader_pool = None
+    
+    @asynccontextmanager
+    async def _reader(self):
+        """Взять соединение для чтения из пула"""
+        await self.connect()
+        pool = self._reader_pool
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put_nowait(conn)
+    
+    async def transaction(self, op: WriteOp) -> Any:
+        """
+        Выполнить операцию записи атомарно. Операции группируются писателем
+        в общие транзакции (group commit), каждая — в своём SAVEPOINT
+        """
+        await self.connect()
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((op, future))
+        return await future
+    
+    async def _writer_loop(self):
+        """
+        Единственный писатель: собирает операции, пришедшие за commit_window,
+        и выполняет их одной транзакцией (group commit). Каждая операция
+        выполняется в своём SAVEPOINT, поэтому ошибка одной не откатывает остальные.
+        """
+        queue = self._write_queue
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is None:
+                break
+            if self.commit_window > 0:
+                await asyncio.sleep(self.commit_window)
+            batch = [item]
+            while len(batch) < self.max_batch and not queue.empty():
+                item = queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._commit_batch(batch)
+    
+    async def _commit_batch(self, batch: list):
+        """Выполнить пачку операций записи одной транзакцией"""
+        conn = self._writer
+        results = []
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            for op, future in batch:
+                await conn.execute("SAVEPOINT op")
+                try:
+                    result = await op(conn)
+                except Exception as e:
+                    await conn.execute("ROLLBACK TO op")
+                    await conn.execute("RELEASE op")
+                    results.append((future, None, e))
+                else:
+                    await conn.execute("RELEASE op")
+                    results.append((future, result, None))
+            await conn.execute("COMMIT")
+        except Exception as e:
+            logger.exception("Ошибка фиксации пачки записей")
+            if conn.in_transaction:
+                try:
+                    await conn.execute("ROLLBACK")
+                except Exception:
+                    logger.exception("Не удалось откатить транзакцию")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for future, result, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+    
+    async def set_trace_callback(self, callback: Optional[Callable[[str], None]]):
+        """Установить trace-callback на все соединения пула (для отладки и аудита запросов)"""
+        await self.connect()
+        await self._writer.set_trace_callback(callback)
+        for conn in self._reader_conns:
+            await conn.set_trace_callback(callback)
+    
+    async def _fetch(self, sql: str, params: tuple = ()) -> List[Dict]:
+        async with self._reader() as conn:
             cursor = await conn.execute(sql, params)
-            await conn.commit()
-            return cursor.rowcount
\ No newline at end of file
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    async def _fetch_tuples(self, sql: str, params: tuple = ()) -> List[Sequence]:
+        async with self._reader() as conn:
+            cursor = await conn.cursor()
+            # Кортежи без aiosqlite.Row: строки сразу собираются в объекты модели
+            cursor.row_factory = None
+            await cursor.execute(sql, params)
+            rows = await cursor.fetchall()
+            await cursor.close()
+            return rows
+
+
+def create_database() -> BaseDatabase:
+    """Создать базу данных бэкенда, выбранного в config.DB_BACKEND"""
+    if DB_BACKEND == 'sqlite':
+        return Database()
+    if DB_BACKEND == 'postgres':
+        # asyncpg нужен только для PostgreSQL, поэтому импортируется здесь
+        from app.db_postgres import PostgresDatabase
+        return PostgresDatabase(POSTGRES_DSN, POSTGRES_POOL_MIN, POSTGRES_POOL_MAX)
+    raise ValueError(f"Неизвестный бэкенд базы данных: {DB_BACKEND}")
@@ -0,0 +1,237 @@
+# db_postgres.py
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+from app.db import BaseDatabase, WriteOp
+from app.migrations import run_migrations
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory-блокировки: миграции нескольких экземпляров бота выполняются по очереди
+MIGRATION_LOCK_ID = 7_310_001
+
+INT_TYPES = {'int2', 'int4', 'int8'}
+FLOAT_TYPES = {'float4', 'float8', 'numeric'}
+TEXT_TYPES = {'text', 'varchar', 'bpchar', 'name'}
+
+
+@lru_cache(maxsize=1024)
+def translate_placeholders(sql: str) -> str:
+    """Заменить плейсхолдеры SQLite '?' на нумерованные '$1, $2, ...' (кроме строк в кавычках)"""
+    parts = []
+    number = 0
+    quote = None
+    for ch in sql:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == '?':
+            number += 1
+            parts.append(f"${number}")
+            continue
+        parts.append(ch)
+    return ''.join(parts)
+
+
+def coerce_param(value: Any, type_name: str) -> Any:
+    """
+    Привести параметр к типу колонки. SQLite сравнивает значения с учётом
+    type affinity ('5' = 5), asyncpg же требует точный тип — сервисы передают
+    ID то строкой, то числом
+
+    Строка, которая не является числом, становится NULL: в SQLite такой ключ
+    ничему не равен, и запрос просто ничего не находит
+    """
+    if value is None:
+        return None
+    if type_name in INT_TYPES:
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, str):
+            try:
+                return int(value)
+            except ValueError:
+                logger.warning("Значение %r не является числом (%s) и передано как NULL", value, type_name)
+                return None
+    elif type_name in FLOAT_TYPES:
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                logger.warning("Значение %r не является числом (%s) и передано как NULL", value, type_name)
+                return None
+    elif type_name == 'bool':
+        if isinstance(value, int):
+            return bool(value)
+    elif type_name in TEXT_TYPES:
+        if not isinstance(value, str):
+            return str(value)
+    return value
+
+
+def rowcount_from_status(status: str) -> int:
+    """Число затронутых строк из статуса команды ('UPDATE 3', 'INSERT 0 1')"""
+    tail = status.rsplit(' ', 1)[-1] if status else ''
+    return int(tail) if tail.isdigit() else -1
+
+
+class PgCursor:
+    """Результат запроса с интерфейсом курсора aiosqlite"""
+
+    def __init__(self, rows: List[asyncpg.Record], rowcount: int, lastrowid: Any = None):
+        self._rows = rows
+        self.rowcount = rowcount
+        self.lastrowid = lastrowid
+
+    async def fetchone(self) -> Optional[asyncpg.Record]:
+        return self._rows[0] if self._rows else None
+
+    async def fetchall(self) -> List[asyncpg.Record]:
+        return self._rows
+
+    async def close(self):
+        pass
+
+
+class PgConnection:
+    """
+    Соединение asyncpg с интерфейсом соединения aiosqlite, которое получают
+    операции записи (WriteOp): execute / executemany с плейсхолдерами '?'
+    """
+
+    def __init__(self, db: 'PostgresDatabase', conn: asyncpg.Connection):
+        self._db = db
+        self._conn = conn
+
+    async def execute(self, sql: str, params: Sequence = ()) -> PgCursor:
+        query = translate_placeholders(sql)
+        command = query.lstrip().split(None, 1)[0].upper()
+        returning = 'RETURNING' in query.upper()
+        # lastrowid: PostgreSQL возвращает вставленную строку только через RETURNING
+        if command == 'INSERT' and not returning:
+            query += ' RETURNING *'
+            returning = True
+        args = await self._db._coerce_args(self._conn, query, params)
+
+        if command in ('SELECT', 'WITH') or returning:
+            rows = await self._conn.fetch(query, *args)
+            lastrowid = None
+            if command == 'INSERT' and rows and 'id' in rows[0].keys():
+                lastrowid = rows[0]['id']
+            return PgCursor(rows, len(rows), lastrowid)
+
+        status = await self._conn.execute(query, *args)
+        return PgCursor([], rowcount_from_status(status))
+
+    async def executemany(self, sql: str, params_seq: Sequence[Sequence]) -> PgCursor:
+        """
+        Выполнить запрос для каждого набора параметров (конвейером asyncpg).
+        rowcount — число переданных наборов: asyncpg не возвращает статусы executemany
+        """
+        params_seq = list(params_seq)
+        if not params_seq:
+            return PgCursor([], 0)
+        query = translate_placeholders(sql)
+        types = await self._db._param_types(self._conn, query)
+        args = [tuple(coerce_param(v, t) for v, t in zip(params, types)) for params in params_seq]
+        self._db._trace_query(query)
+        await self._conn.executemany(query, args)
+        return PgCursor([], len(args))
+
+
+class PostgresDatabase(BaseDatabase):
+    """PostgreSQL через пул соединений asyncpg: несколько экземпляров бота на одну базу"""
+
+    dialect = 'postgres'
+
+    def __init__(self, dsn: str, min_size: int = 2, max_size: int = 10):
+        super().__init__()
+        self.dsn = dsn
+        self.min_size = max(1, min_size)
+        # Одно соединение держит блокировку миграций, остальные выполняют их
+        self.max_size = max(2, max_size, self.min_size)
+        self._pool: Optional[asyncpg.Pool] = None
+        self._connect_lock = asyncio.Lock()
+        self._types: Dict[str, Tuple[str, ...]] = {}
+        self._trace: Optional[Callable[[str], None]] = None
+
+    async def initialize(self):
+        """Применить неприменённые миграции под advisory-блокировкой (один раз)"""
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            await self.connect()
+            async with self._pool.acquire() as lock_conn:
+                await lock_conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+                try:
+                    await run_migrations(self)
+                finally:
+                    await lock_conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+            self._initialized = True
+
+    async def connect(self):
+        """Открыть пул соединений"""
+        if self._pool is not None:
+            return
+        async with self._connect_lock:
+            if self._pool is None:
+                self._pool = await asyncpg.create_pool(
+                    self.dsn, min_size=self.min_size, max_size=self.max_size
+                )
+
+    async def close(self):
+        """Закрыть пул соединений"""
+        async with self._connect_lock:
+            if self._pool is None:
+                return
+            await self._pool.close()
+            self._pool = None
+
+    async def transaction(self, op: WriteOp) -> Any:
+        """Выполнить операцию записи в отдельной транзакции на соединении из пула"""
+        await self.connect()
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                return await op(PgConnection(self, conn))
+
+    async def set_trace_callback(self, callback: Optional[Callable[[str], None]]):
+        """Установить callback, получающий текст каждого выполненного запроса"""
+        self._trace = callback
+
+    def _trace_query(self, query: str):
+        if self._trace is not None:
+            self._trace(query)
+
+    async def _param_types(self, conn: asyncpg.Connection, query: str) -> Tuple[str, ...]:
+        """Типы параметров запроса (кэшируются по тексту запроса)"""
+        types = self._types.get(query)
+        if types is None:
+            statement = await conn.prepare(query)
+            types = tuple(t.name for t in statement.get_parameters())
+            self._types[query] = types
+        return types
+
+    async def _coerce_args(self, conn: asyncpg.Connection, query: str, params: Sequence) -> tuple:
+        self._trace_query(query)
+        if not params:
+            return ()
+        types = await self._param_types(conn, query)
+        return tuple(coerce_param(v, t) for v, t in zip(params, types))
+
+    async def _fetch(self, sql: str, params: tuple = ()) -> List[Dict]:
+        return [dict(row) for row in await self._fetch_tuples(sql, params)]
+
+    async def _fetch_tuples(self, sql: str, params: tuple = ()) -> List[Sequence]:
+        await self.connect()
+        query = translate_placeholders(sql)
+        async with self._pool.acquire() as conn:
+            args = await self._coerce_args(conn, query, params)
+            return await conn.fetch(query, *args)
@@ -1,9 +1,12 @@
 # app/handlers/admin.py
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 
 from app.services.userService import UserService
+from app.models.rows import UserRow
 from app.services.formService import FormService
 from app.states.admin_states import AdminStates
 from app.keyboards.admin_keyboards import (
@@ -18,18 +21,17 @@ from app.keyboards.admin_keyboards import (
 router = Router()
 
 
-async def check_admin_rights(user_id: int) -> bool:
+def check_admin_rights(user: Optional[UserRow]) -> bool:
     """Проверка прав ADMIN"""
-    access_level = await UserService.get_user_access_level(str(user_id))
-    return access_level == UserService.ACCESS_LEVEL_ADMIN
+    return user is not None and user.access_level == UserService.ACCESS_LEVEL_ADMIN
 
 
 @router.callback_query(F.data == "admin_manage_users")
-async def show_users_management(callback: CallbackQuery, state: FSMContext) -> None:
+async def show_users_management(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Показать меню управления пользователями"""
     await state.clear()
     
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -47,9 +49,9 @@ async def show_users_management(callback: CallbackQuery, state: FSMContext) -> N
 
 
 @router.callback_query(F.data == "admin_create_user")
-async def create_user_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def create_user_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать создание нового пользователя"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -100,9 +102,9 @@ async def create_user_enter_name(message: Message, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("access_level_"), AdminStates.create_user_select_access_level)
-async def create_user_select_access_level(callback: CallbackQuery, state: FSMContext) -> None:
+async def create_user_select_access_level(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Обработка выбора уровня доступа при создании"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -143,11 +145,11 @@ async def create_user_select_access_level(callback: CallbackQuery, state: FSMCon
 
 
 @router.callback_query(F.data == "admin_list_users")
-async def list_users(callback: CallbackQuery, state: FSMContext) -> None:
+async def list_users(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Показать список всех пользователей"""
     await state.clear()
     
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -172,11 +174,11 @@ async def list_users(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("admin_edit_user_"))
-async def edit_user(callback: CallbackQuery, state: FSMContext) -> None:
+async def edit_user(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Показать меню редактирования пользователя"""
     await state.clear()
     
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -188,12 +190,12 @@ async def edit_user(callback: CallbackQuery, state: FSMContext) -> None:
         await callback.answer("❌ Пользователь не найден", show_alert=True)
         return
     
-    user = users[0]
-    access_level = user.get('access_level', '')
+    selected_user = users[0]
+    access_level = selected_user.get('access_level', '')
     access_name = UserService.get_access_level_name(access_level)
-    telegram_id = user.get('id', 'не привязан')
-    part_name = user.get('part_name', 'Не назначена')
-    available = user.get('available', False)
+    telegram_id = selected_user.get('id', 'не привязан')
+    part_name = selected_user.get('part_name', 'Не назначена')
+    available = selected_user.get('available', False)
     
     await callback.message.edit_text(
         f"✏️ <b>Редактирование пользователя</b>\n\n"
@@ -210,9 +212,9 @@ async def edit_user(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("admin_change_access_"))
-async def change_access_level_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def change_access_level_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать изменение уровня доступа"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -232,9 +234,9 @@ async def change_access_level_start(callback: CallbackQuery, state: FSMContext)
 
 
 @router.callback_query(F.data.startswith("access_level_"), AdminStates.manage_users_edit_access_level)
-async def change_access_level_process(callback: CallbackQuery, state: FSMContext) -> None:
+async def change_access_level_process(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Обработка изменения уровня доступа"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -266,9 +268,9 @@ async def change_access_level_process(callback: CallbackQuery, state: FSMContext
 
 
 @router.callback_query(F.data.startswith("admin_assign_brigade_"))
-async def assign_brigade_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def assign_brigade_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать назначение в бригаду"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -301,9 +303,9 @@ async def assign_brigade_start(callback: CallbackQuery, state: FSMContext) -> No
 
 
 @router.callback_query(F.data.startswith("admin_set_brigade_"))
-async def assign_brigade_process(callback: CallbackQuery, state: FSMContext) -> None:
+async def assign_brigade_process(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Обработка назначения в бригаду"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -341,9 +343,9 @@ async def assign_brigade_process(callback: CallbackQuery, state: FSMContext) ->
 
 
 @router.callback_query(F.data.startswith("admin_delete_user_") & ~F.data.contains("confirm"))
-async def delete_user_ask(callback: CallbackQuery) -> None:
+async def delete_user_ask(callback: CallbackQuery, user: Optional[UserRow]) -> None:
     """Запросить подтверждение удаления пользователя"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -355,8 +357,8 @@ async def delete_user_ask(callback: CallbackQuery) -> None:
         await callback.answer("❌ Пользователь не найден", show_alert=True)
         return
     
-    user = users[0]
-    access_name = UserService.get_access_level_name(user.get('access_level', ''))
+    selected_user = users[0]
+    access_name = UserService.get_access_level_name(selected_user.get('access_level', ''))
     
     await callback.message.edit_text(
         f"⚠️ <b>Удаление пользователя</b>\n\n"
@@ -371,19 +373,16 @@ async def delete_user_ask(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("admin_delete_confirm_"))
-async def delete_user_confirm(callback: CallbackQuery) -> None:
+async def delete_user_confirm(callback: CallbackQuery, user: Optional[UserRow]) -> None:
     """Подтверждение удаления пользователя"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
     user_name = callback.data.split("_", 3)[3]
     
     # Удаляем пользователя (по имени, т.к. name - PRIMARY KEY)
-    success = await UserService.db.execute(
-        "DELETE FROM users WHERE name = ?",
-        (user_name,)
-    )
+    success = await UserService.delete_user_by_name(user_name)
     
     if success:
         await callback.message.edit_text(
@@ -394,13 +393,13 @@ async def delete_user_confirm(callback: CallbackQuery) -> None:
         )
         await callback.answer("Пользователь удален", show_alert=False)
     else:
-        await callback.answer("❌ Ошибка при удалении пользователя", show_alert=True)
+        await callback.answer("❌ Пользователь не удалён: по нему есть проведённые проверки", show_alert=True)
 
 
 @router.callback_query(F.data == "admin_search_user")
-async def search_user_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def search_user_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать поиск пользователя"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
     
@@ -1,4 +1,6 @@
 # app/handlers/cabinet.py
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -10,14 +12,11 @@ router = Router()
 
 
 @router.callback_query(F.data == "admin_cabinet")
-async def show_admin_cabinet(callback: CallbackQuery, state: FSMContext) -> None:
+async def show_admin_cabinet(callback: CallbackQuery, state: FSMContext, access_level: Optional[str]) -> None:
     """Показать рабочий кабинет для ADMIN и MANAGER"""
     # Очищаем любые активные состояния
     await state.clear()
     
-    user_id = callback.from_user.id
-    access_level = await UserService.get_user_access_level(str(user_id))
-    
     # Проверяем права доступа
     if access_level not in [UserService.ACCESS_LEVEL_ADMIN, UserService.ACCESS_LEVEL_MANAGER]:
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
@@ -36,11 +35,8 @@ async def show_admin_cabinet(callback: CallbackQuery, state: FSMContext) -> None
 
 
 @router.callback_query(F.data == "reports")
-async def show_reports(callback: CallbackQuery) -> None:
+async def show_reports(callback: CallbackQuery, access_level: Optional[str]) -> None:
     """Показать отчеты и статистику"""
-    user_id = callback.from_user.id
-    access_level = await UserService.get_user_access_level(str(user_id))
-    
     if access_level not in [UserService.ACCESS_LEVEL_ADMIN, UserService.ACCESS_LEVEL_MANAGER]:
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
@@ -61,11 +57,8 @@ async def show_reports(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "manage_users")
-async def show_manage_users(callback: CallbackQuery) -> None:
+async def show_manage_users(callback: CallbackQuery, access_level: Optional[str]) -> None:
     """Управление пользователями (только для ADMIN) - переадресация"""
-    user_id = callback.from_user.id
-    access_level = await UserService.get_user_access_level(str(user_id))
-    
     if access_level != UserService.ACCESS_LEVEL_ADMIN:
         await callback.answer("❌ Доступно только администраторам", show_alert=True)
         return
@@ -87,11 +80,8 @@ async def show_manage_users(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "help")
-async def show_help(callback: CallbackQuery) -> None:
+async def show_help(callback: CallbackQuery, access_level: Optional[str]) -> None:
     """Показать справку"""
-    user_id = callback.from_user.id
-    access_level = await UserService.get_user_access_level(str(user_id))
-    
     help_text = "❓ <b>Справка</b>\n\n"
     
     if access_level in [UserService.ACCESS_LEVEL_ADMIN, UserService.ACCESS_LEVEL_MANAGER]:
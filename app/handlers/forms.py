@@ -1,9 +1,12 @@
 # app/handlers/forms.py
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 
 from app.services.userService import UserService
+from app.models.rows import UserRow
 from app.services.formService import FormService
 from app.services.taskService import TaskService
 from app.states.form_states import FormStates
@@ -19,18 +22,17 @@ from app.keyboards import (
 router = Router()
 
 
-async def check_admin_rights(user_id: int) -> bool:
+def check_admin_rights(user: Optional[UserRow]) -> bool:
     """Проверка прав ADMIN или MANAGER"""
-    access_level = await UserService.get_user_access_level(str(user_id))
-    return access_level in [UserService.ACCESS_LEVEL_ADMIN, UserService.ACCESS_LEVEL_MANAGER]
+    return user is not None and user.access_level in [UserService.ACCESS_LEVEL_ADMIN, UserService.ACCESS_LEVEL_MANAGER]
 
 
 @router.callback_query(F.data == "manage_forms")
-async def show_form_management(callback: CallbackQuery, state: FSMContext) -> None:
+async def show_form_management(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Показать меню управления формами"""
     await state.clear()
     
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -45,9 +47,9 @@ async def show_form_management(callback: CallbackQuery, state: FSMContext) -> No
 
 
 @router.callback_query(F.data == "form_create")
-async def form_create_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def form_create_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать создание формы"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -124,11 +126,11 @@ async def form_create_process(message: Message, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data == "form_list")
-async def form_list_show(callback: CallbackQuery, state: FSMContext) -> None:
+async def form_list_show(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Показать список форм"""
     await state.clear()
     
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -153,39 +155,33 @@ async def form_list_show(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("form_view_"))
-async def form_view(callback: CallbackQuery, state: FSMContext) -> None:
+async def form_view(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Просмотр конкретной формы"""
     await state.clear()
     
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
     form_id = int(callback.data.split("_")[2])
-    form = await FormService.get_form_by_id(form_id)
+    # Форма и её задачи загружаются одним запросом
+    form = await FormService.get_form_with_tasks(form_id)
     
     if not form:
         await callback.answer("❌ Форма не найдена", show_alert=True)
         return
     
-    # Получаем список задач формы
-    tasks_str = form.get('tasks', '')
-    task_ids = FormService.parse_tasks_string(tasks_str)
+    task_rows = form['task_rows']
     
     # Формируем список задач для отображения
     task_list_text = ""
-    if task_ids:
-        all_tasks = await TaskService.get_all_tasks()
-        tasks_dict = {t['id']: t for t in all_tasks}
-        
+    if task_rows:
         task_list_text = "\n\n<b>Задачи в форме:</b>\n"
-        for i, task_id in enumerate(task_ids, 1):
-            task = tasks_dict.get(task_id)
-            if task:
-                task_info = task.get('info', 'Нет описания')
-                task_list_text += f"{i}. {task_info}\n"
+        for i, task in enumerate(task_rows, 1):
+            task_info = task.get('info', 'Нет описания')
+            task_list_text += f"{i}. {task_info}\n"
         
-        task_list_text += f"\n<i>Всего задач: {len(task_ids)}</i>"
+        task_list_text += f"\n<i>Всего задач: {len(task_rows)}</i>"
     else:
         task_list_text = "\n\n⚠️ В форме пока нет задач"
     
@@ -200,9 +196,9 @@ async def form_view(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("form_edit_name_"))
-async def form_edit_name_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def form_edit_name_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать редактирование названия формы"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -261,9 +257,9 @@ async def form_edit_name_process(message: Message, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("form_tasks_") & ~F.data.contains("save") & ~F.data.contains("toggle"))
-async def form_tasks_show(callback: CallbackQuery, state: FSMContext) -> None:
+async def form_tasks_show(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Показать список задач для выбора (с пагинацией)"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -277,8 +273,7 @@ async def form_tasks_show(callback: CallbackQuery, state: FSMContext) -> None:
         return
     
     # Получаем текущие задачи формы
-    tasks_str = form.get('tasks', '')
-    selected_task_ids = FormService.parse_tasks_string(tasks_str)
+    selected_task_ids = await FormService.get_form_task_ids(form_id)
     
     # Сохраняем выбранные задачи в state
     await state.update_data(
@@ -309,9 +304,9 @@ async def form_tasks_show(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("form_task_toggle_"))
-async def form_task_toggle(callback: CallbackQuery, state: FSMContext) -> None:
+async def form_task_toggle(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Переключить задачу (добавить/убрать из формы)"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -349,16 +344,16 @@ async def form_task_toggle(callback: CallbackQuery, state: FSMContext) -> None:
     )
     
     # Показываем уведомление
-    task = next((t for t in all_tasks if t['id'] == task_id), None)
+    task = await TaskService.get_task_by_id(task_id)
     if task:
         task_name = task.get('info', '')[:30]
         await callback.answer(f"Задача {action_text} форму")
 
 
 @router.callback_query(F.data.startswith("form_tasks_save_"))
-async def form_tasks_save(callback: CallbackQuery, state: FSMContext) -> None:
+async def form_tasks_save(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Сохранить выбранные задачи для формы"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -388,9 +383,9 @@ async def form_tasks_save(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("form_delete_") & ~F.data.contains("confirm"))
-async def form_delete_ask(callback: CallbackQuery) -> None:
+async def form_delete_ask(callback: CallbackQuery, user: Optional[UserRow]) -> None:
     """Запросить подтверждение удаления"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -401,8 +396,7 @@ async def form_delete_ask(callback: CallbackQuery) -> None:
         await callback.answer("❌ Форма не найдена", show_alert=True)
         return
     
-    tasks_str = form.get('tasks', '')
-    task_ids = FormService.parse_tasks_string(tasks_str)
+    task_ids = await FormService.get_form_task_ids(form_id)
     
     await callback.message.edit_text(
         f"⚠️ <b>Удаление формы #{form_id}</b>\n\n"
@@ -417,9 +411,9 @@ async def form_delete_ask(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("form_delete_confirm_"))
-async def form_delete_confirm(callback: CallbackQuery) -> None:
+async def form_delete_confirm(callback: CallbackQuery, user: Optional[UserRow]) -> None:
     """Подтверждение удаления формы"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -434,13 +428,13 @@ async def form_delete_confirm(callback: CallbackQuery) -> None:
         )
         await callback.answer("Форма удалена", show_alert=False)
     else:
-        await callback.answer("❌ Ошибка при удалении формы", show_alert=True)
+        await callback.answer("❌ Форма не удалена: по ней есть проведённые проверки", show_alert=True)
 
 
 @router.callback_query(F.data == "form_search")
-async def form_search_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def form_search_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать поиск формы"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -1,9 +1,12 @@
 # app/handlers/leader.py
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 
 from app.services.userService import UserService
+from app.models.rows import UserRow
 from app.services.checkService import CheckService
 from app.services.formService import FormService
 from app.keyboards.leader_keyboards import (
@@ -15,23 +18,21 @@ from app.keyboards.leader_keyboards import (
 router = Router()
 
 
-async def check_leader_rights(user_id: int) -> bool:
+def check_leader_rights(user: Optional[UserRow]) -> bool:
     """Проверка прав LEADER"""
-    access_level = await UserService.get_user_access_level(str(user_id))
-    return access_level == UserService.ACCESS_LEVEL_LEADER
+    return user is not None and user.access_level == UserService.ACCESS_LEVEL_LEADER
 
 
 @router.callback_query(F.data == "leader_cabinet")
-async def show_leader_cabinet(callback: CallbackQuery, state: FSMContext) -> None:
+async def show_leader_cabinet(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Показать личный кабинет руководителя бригады"""
     await state.clear()
     
-    if not await check_leader_rights(callback.from_user.id):
+    if not check_leader_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
     # Получаем информацию о руководителе
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     part_name = user.get('part_name', 'Не назначена') if user else 'Не назначена'
     name = user.get('name', 'Руководитель') if user else 'Руководитель'
     
@@ -49,14 +50,13 @@ async def show_leader_cabinet(callback: CallbackQuery, state: FSMContext) -> Non
 
 
 @router.callback_query(F.data == "leader_view_workers")
-async def view_workers(callback: CallbackQuery, state: FSMContext) -> None:
+async def view_workers(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Просмотр подчиненных работников"""
-    if not await check_leader_rights(callback.from_user.id):
+    if not check_leader_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
     # Получаем бригаду лидера
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     part_name = user.get('part_name') if user else None
     
     if not part_name:
@@ -96,14 +96,13 @@ async def view_workers(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data == "leader_view_errors")
-async def view_brigade_errors(callback: CallbackQuery, state: FSMContext) -> None:
+async def view_brigade_errors(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Просмотр ошибок бригады"""
-    if not await check_leader_rights(callback.from_user.id):
+    if not check_leader_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
     # Получаем бригаду лидера
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     part_name = user.get('part_name') if user else None
     
     if not part_name:
@@ -118,8 +117,7 @@ async def view_brigade_errors(callback: CallbackQuery, state: FSMContext) -> Non
         return
     
     # Получаем форму по part_name
-    forms = await FormService.get_all_forms()
-    brigade_form = next((f for f in forms if f.get('part_name') == part_name), None)
+    brigade_form = await FormService.get_form_by_part_name(part_name)
     
     if not brigade_form:
         await callback.message.edit_text(
@@ -165,9 +163,9 @@ async def view_brigade_errors(callback: CallbackQuery, state: FSMContext) -> Non
 
 
 @router.callback_query(F.data.startswith("worker_info_"))
-async def show_worker_info(callback: CallbackQuery) -> None:
+async def show_worker_info(callback: CallbackQuery, user: Optional[UserRow]) -> None:
     """Показать информацию о конкретном работнике"""
-    if not await check_leader_rights(callback.from_user.id):
+    if not check_leader_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
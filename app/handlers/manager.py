@@ -1,10 +1,13 @@
 # app/handlers/manager.py
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from datetime import datetime, timedelta
 
 from app.services.userService import UserService
+from app.models.rows import UserRow
 from app.services.formService import FormService
 from app.services.plannedCheckService import PlannedCheckService
 from app.keyboards.manager_keyboards import (
@@ -19,9 +22,8 @@ from app.states.manager_states import ManagerStates
 router = Router()
 
 
-async def check_manager_rights(callback: CallbackQuery) -> bool:
+async def check_manager_rights(callback: CallbackQuery, user: Optional[UserRow]) -> bool:
     """Проверить, является ли пользователь менеджером или админом"""
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     if not user or user.get('access_level') not in ['manager', 'admin']:
         await callback.answer("⛔ У вас нет доступа к этому разделу", show_alert=True)
         return False
@@ -29,12 +31,11 @@ async def check_manager_rights(callback: CallbackQuery) -> bool:
 
 
 @router.callback_query(F.data == "checks_management")
-async def show_checks_management(callback: CallbackQuery):
+async def show_checks_management(callback: CallbackQuery, user: Optional[UserRow]):
     """Показать меню управления проверками"""
-    if not await check_manager_rights(callback):
+    if not await check_manager_rights(callback, user):
         return
     
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     username = user.get('name', 'Пользователь')
     
     # Получаем количество запланированных проверок
@@ -60,12 +61,11 @@ async def show_checks_management(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "manager_cabinet")
-async def show_manager_cabinet(callback: CallbackQuery):
+async def show_manager_cabinet(callback: CallbackQuery, user: Optional[UserRow]):
     """Показать личный кабинет менеджера"""
-    if not await check_manager_rights(callback):
+    if not await check_manager_rights(callback, user):
         return
     
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     username = user.get('name', 'Менеджер')
     
     text = (
@@ -88,9 +88,9 @@ async def show_manager_cabinet(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "manager_plan_checks")
-async def plan_checks_start(callback: CallbackQuery, state: FSMContext):
+async def plan_checks_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Начать планирование проверки - показать список бригад"""
-    if not await check_manager_rights(callback):
+    if not await check_manager_rights(callback, user):
         return
     
     # Очищаем состояние
@@ -122,9 +122,9 @@ async def plan_checks_start(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("plan_check_brigade_"), ManagerStates.planning_check_select_brigade)
-async def plan_checks_select_brigade(callback: CallbackQuery, state: FSMContext):
+async def plan_checks_select_brigade(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Выбрана бригада, выбираем дату"""
-    if not await check_manager_rights(callback):
+    if not await check_manager_rights(callback, user):
         return
     
     form_id = int(callback.data.split("_")[-1])
@@ -149,9 +149,9 @@ async def plan_checks_select_brigade(callback: CallbackQuery, state: FSMContext)
 
 
 @router.callback_query(F.data == "plan_check_date_tomorrow", ManagerStates.planning_check_select_date)
-async def plan_checks_date_tomorrow(callback: CallbackQuery, state: FSMContext):
+async def plan_checks_date_tomorrow(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Выбрана дата - завтра"""
-    if not await check_manager_rights(callback):
+    if not await check_manager_rights(callback, user):
         return
     
     tomorrow = datetime.now() + timedelta(days=1)
@@ -175,9 +175,9 @@ async def plan_checks_date_tomorrow(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "plan_check_date_custom", ManagerStates.planning_check_select_date)
-async def plan_checks_date_custom(callback: CallbackQuery, state: FSMContext):
+async def plan_checks_date_custom(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Выбрана дата - пользовательская"""
-    if not await check_manager_rights(callback):
+    if not await check_manager_rights(callback, user):
         return
     
     data = await state.get_data()
@@ -275,9 +275,9 @@ async def plan_checks_time_entered(message: Message, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("plan_check_reviewer_"), ManagerStates.planning_check_select_reviewer)
-async def plan_checks_select_reviewer(callback: CallbackQuery, state: FSMContext):
+async def plan_checks_select_reviewer(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Выбран проверяющий"""
-    if not await check_manager_rights(callback):
+    if not await check_manager_rights(callback, user):
         return
     
     # Извлекаем reviewer_id и name из callback_data
@@ -312,9 +312,9 @@ async def plan_checks_select_reviewer(callback: CallbackQuery, state: FSMContext
 
 
 @router.callback_query(F.data.startswith("plan_check_confirm_"), ManagerStates.planning_check_confirm)
-async def plan_checks_confirm(callback: CallbackQuery, state: FSMContext):
+async def plan_checks_confirm(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Подтверждение создания проверки"""
-    if not await check_manager_rights(callback):
+    if not await check_manager_rights(callback, user):
         return
     
     data = await state.get_data()
@@ -361,9 +361,9 @@ async def plan_checks_confirm(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "manager_view_planned_checks")
-async def view_planned_checks(callback: CallbackQuery):
+async def view_planned_checks(callback: CallbackQuery, user: Optional[UserRow]):
     """Просмотр запланированных проверок"""
-    if not await check_manager_rights(callback):
+    if not await check_manager_rights(callback, user):
         return
     
     checks = await PlannedCheckService.get_upcoming_checks(limit=20)
@@ -381,15 +381,20 @@ async def view_planned_checks(callback: CallbackQuery):
     
     text = "📋 <b>Запланированные проверки</b>\n\n"
     
+    # Получаем данные форм и проверяющих сразу для всех проверок
+    forms = await FormService.get_forms_by_ids([check.get('form_id') for check in checks])
+    reviewers = await UserService.get_users_by_ids([check.get('reviewer_id') for check in checks])
+    forms_by_id = {str(form['id']): form for form in forms}
+    reviewers_by_id = {str(reviewer['id']): reviewer for reviewer in reviewers}
+    
     for check in checks:
         check_id = check.get('id')
         time_str = check.get('time')
         form_id = check.get('form_id')
         reviewer_id = check.get('reviewer_id')
         
-        # Получаем данные формы и проверяющего
-        form = await FormService.get_form_by_id(form_id)
-        reviewer = await UserService.get_user_by_id(reviewer_id)
+        form = forms_by_id.get(str(form_id))
+        reviewer = reviewers_by_id.get(str(reviewer_id))
         
         part_name = form.get('part_name', 'Неизвестно') if form else 'Неизвестно'
         reviewer_name = reviewer.get('name', 'Неизвестно') if reviewer else 'Неизвестно'
@@ -1,9 +1,12 @@
 # app/handlers/office_worker.py
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 
 from app.services.userService import UserService
+from app.models.rows import UserRow
 from app.services.formService import FormService
 from app.services.taskService import TaskService
 from app.services.checkService import CheckService
@@ -15,13 +18,13 @@ from app.keyboards.office_worker_keyboards import (
     get_error_confirm_keyboard
 )
 from app.states.office_worker_states import CheckStates
+from app.states.check_session import CheckSession
 
 router = Router()
 
 
-async def check_office_worker_rights(callback: CallbackQuery) -> bool:
+async def check_office_worker_rights(callback: CallbackQuery, user: Optional[UserRow]) -> bool:
     """Проверить, является ли пользователь офисным работником"""
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     if not user or user.get('access_level') != UserService.ACCESS_LEVEL_OFFICE_WORKER:
         await callback.answer("⛔ У вас нет доступа к этому разделу", show_alert=True)
         return False
@@ -29,12 +32,11 @@ async def check_office_worker_rights(callback: CallbackQuery) -> bool:
 
 
 @router.callback_query(F.data == "conduct_check")
-async def start_check(callback: CallbackQuery, state: FSMContext):
+async def start_check(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Начать проверку - показать задачи блока office_worker"""
-    if not await check_office_worker_rights(callback):
+    if not await check_office_worker_rights(callback, user):
         return
     
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     part_name = user.get('part_name')
     
     if not part_name:
@@ -44,8 +46,8 @@ async def start_check(callback: CallbackQuery, state: FSMContext):
         )
         return
     
-    # Получаем форму по part_name (блок)
-    form = await FormService.get_form_by_part_name(part_name)
+    # Получаем форму по part_name (блок) вместе с задачами одним запросом
+    form = await FormService.get_form_with_tasks_by_part_name(part_name)
     
     if not form:
         await callback.answer(
@@ -54,9 +56,8 @@ async def start_check(callback: CallbackQuery, state: FSMContext):
         )
         return
     
-    # Получаем задачи формы
-    tasks_str = form.get('tasks', '')
-    task_ids = FormService.parse_tasks_string(tasks_str)
+    # Задачи формы (удалённые из системы задачи уже отброшены)
+    task_ids = form['task_ids']
     
     if not task_ids:
         await callback.answer(
@@ -65,48 +66,23 @@ async def start_check(callback: CallbackQuery, state: FSMContext):
         )
         return
     
-    # Получаем информацию о задачах
-    tasks = []
-    for task_id in task_ids:
-        task = await TaskService.get_task_by_id(task_id)
-        if task:
-            tasks.append(task)
-    
-    if not tasks:
-        await callback.answer(
-            "⚠️ Задачи не найдены в системе.",
-            show_alert=True
-        )
-        return
-    
-    # Сохраняем данные в state
-    await state.update_data(
-        form_id=form.get('id'),
-        part_name=part_name,
-        task_ids=task_ids,
-        current_task_index=0,
-        grades=[],  # Список оценок: 1 = ОК, 0 = Не ОК
-        errors_ids=[]  # Список ID ошибок
-    )
+    # Сохраняем данные в state: задачи формы, оценки (биты), курсор и ошибки
+    session = await CheckSession.start(state, form.get('id'), part_name, task_ids)
     await state.set_state(CheckStates.checking_tasks)
     
     # Показываем первую задачу
-    await show_task_for_check(callback, state)
+    await show_task_for_check(callback, state, session)
 
 
-async def show_task_for_check(callback: CallbackQuery, state: FSMContext):
+async def show_task_for_check(callback: CallbackQuery, state: FSMContext, session: CheckSession):
     """Показать задачу для проверки"""
-    data = await state.get_data()
-    task_ids = data.get('task_ids', [])
-    current_index = data.get('current_task_index', 0)
-    grades = data.get('grades', [])
+    task_id = session.current_task_id
     
-    if current_index >= len(task_ids):
+    if task_id is None:
         # Все задачи проверены, завершаем проверку
-        await complete_check(callback, state)
+        await complete_check(callback, state, session)
         return
     
-    task_id = task_ids[current_index]
     task = await TaskService.get_task_by_id(task_id)
     
     if not task:
@@ -114,9 +90,9 @@ async def show_task_for_check(callback: CallbackQuery, state: FSMContext):
         return
     
     task_info = task.get('info', 'Без описания')
-    part_name = data.get('part_name', 'Блок')
-    total_tasks = len(task_ids)
-    task_num = current_index + 1
+    part_name = session.part_name
+    total_tasks = session.total
+    task_num = session.cursor + 1
     
     text = (
         f"✅ <b>Проверка блока: {part_name}</b>\n"
@@ -135,48 +111,42 @@ async def show_task_for_check(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("task_check_ok_"))
-async def task_check_ok(callback: CallbackQuery, state: FSMContext):
+async def task_check_ok(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Задача выполнена (ОК)"""
-    if not await check_office_worker_rights(callback):
+    if not await check_office_worker_rights(callback, user):
         return
     
     # Извлекаем task_id из callback_data
     parts = callback.data.split("_")
     task_id = int(parts[3])
     
-    data = await state.get_data()
-    task_ids = data.get('task_ids', [])
-    current_index = data.get('current_task_index', 0)
-    grades = data.get('grades', [])
+    session = await CheckSession.load(state)
     
     # Проверяем, что это правильная задача
-    if current_index < len(task_ids) and task_ids[current_index] == task_id:
+    if session and session.current_task_id == task_id:
         # Добавляем оценку 1 (ОК)
-        grades.append(1)
-        await state.update_data(grades=grades, current_task_index=current_index + 1)
+        await session.record(state, ok=True)
         
         # Переходим к следующей задаче
-        await show_task_for_check(callback, state)
+        await show_task_for_check(callback, state, session)
     else:
         await callback.answer("⚠️ Ошибка: неверная задача", show_alert=True)
 
 
 @router.callback_query(F.data.startswith("task_check_fail_"))
-async def task_check_fail(callback: CallbackQuery, state: FSMContext):
+async def task_check_fail(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Задача не выполнена (Не ОК) - предлагаем добавить ошибку"""
-    if not await check_office_worker_rights(callback):
+    if not await check_office_worker_rights(callback, user):
         return
     
     # Извлекаем task_id из callback_data
     parts = callback.data.split("_")
     task_id = int(parts[3])
     
-    data = await state.get_data()
-    task_ids = data.get('task_ids', [])
-    current_index = data.get('current_task_index', 0)
+    session = await CheckSession.load(state)
     
     # Проверяем, что это правильная задача
-    if current_index < len(task_ids) and task_ids[current_index] == task_id:
+    if session and session.current_task_id == task_id:
         task = await TaskService.get_task_by_id(task_id)
         task_info = task.get('info', 'Без описания') if task else 'Задача'
         
@@ -205,9 +175,9 @@ async def task_check_fail(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("error_add_comment_"))
-async def error_add_comment_start(callback: CallbackQuery, state: FSMContext):
+async def error_add_comment_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Начать добавление комментария к ошибке"""
-    if not await check_office_worker_rights(callback):
+    if not await check_office_worker_rights(callback, user):
         return
     
     parts = callback.data.split("_")
@@ -225,10 +195,9 @@ async def error_add_comment_start(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(CheckStates.adding_error_comment, F.text)
-async def error_comment_received(message: Message, state: FSMContext):
+async def error_comment_received(message: Message, state: FSMContext, user: Optional[UserRow]):
     """Обработка полученного комментария"""
     # Проверяем права пользователя
-    user = await UserService.get_user_by_id(str(message.from_user.id))
     if not user or user.get('access_level') != UserService.ACCESS_LEVEL_OFFICE_WORKER:
         await message.answer("⛔ У вас нет доступа к этому разделу")
         await state.clear()
@@ -272,9 +241,9 @@ async def error_comment_received(message: Message, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("error_add_photo_"))
-async def error_add_photo_start(callback: CallbackQuery, state: FSMContext):
+async def error_add_photo_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Начать добавление фото к ошибке"""
-    if not await check_office_worker_rights(callback):
+    if not await check_office_worker_rights(callback, user):
         return
     
     parts = callback.data.split("_")
@@ -292,10 +261,9 @@ async def error_add_photo_start(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(CheckStates.adding_error_photo, F.photo)
-async def error_photo_received(message: Message, state: FSMContext):
+async def error_photo_received(message: Message, state: FSMContext, user: Optional[UserRow]):
     """Обработка полученного фото"""
     # Проверяем права пользователя
-    user = await UserService.get_user_by_id(str(message.from_user.id))
     if not user or user.get('access_level') != UserService.ACCESS_LEVEL_OFFICE_WORKER:
         await message.answer("⛔ У вас нет доступа к этому разделу")
         await state.clear()
@@ -335,54 +303,47 @@ async def error_photo_received(message: Message, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("error_skip_"))
-async def error_skip(callback: CallbackQuery, state: FSMContext):
+async def error_skip(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Пропустить добавление ошибки и продолжить"""
-    if not await check_office_worker_rights(callback):
+    if not await check_office_worker_rights(callback, user):
         return
     
     parts = callback.data.split("_")
     task_id = int(parts[2])
     
-    data = await state.get_data()
-    task_ids = data.get('task_ids', [])
-    current_index = data.get('current_task_index', 0)
-    grades = data.get('grades', [])
+    session = await CheckSession.load(state)
     
     # Проверяем, что это правильная задача
-    if current_index < len(task_ids) and task_ids[current_index] == task_id:
+    if session and session.current_task_id == task_id:
         # Добавляем оценку 0 (Не ОК) без ошибки
-        grades.append(0)
-        await state.update_data(
-            grades=grades,
-            current_task_index=current_index + 1,
+        await session.record(
+            state,
+            ok=False,
             current_error_task_id=None,
             current_error_comment=None,
             current_error_photo=None
         )
         
         # Переходим к следующей задаче
-        await show_task_for_check(callback, state)
+        await show_task_for_check(callback, state, session)
     else:
         await callback.answer("⚠️ Ошибка: неверная задача", show_alert=True)
 
 
 @router.callback_query(F.data.startswith("error_save_"))
-async def error_save(callback: CallbackQuery, state: FSMContext):
+async def error_save(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Сохранить ошибку и продолжить"""
-    if not await check_office_worker_rights(callback):
+    if not await check_office_worker_rights(callback, user):
         return
     
     parts = callback.data.split("_")
     task_id = int(parts[2])
     
+    session = await CheckSession.load(state)
     data = await state.get_data()
-    task_ids = data.get('task_ids', [])
-    current_index = data.get('current_task_index', 0)
-    grades = data.get('grades', [])
-    errors_ids = data.get('errors_ids', [])
     
     # Проверяем, что это правильная задача
-    if current_index < len(task_ids) and task_ids[current_index] == task_id:
+    if session and session.current_task_id == task_id:
         comment = data.get('current_error_comment')
         photo_url = data.get('current_error_photo')
         
@@ -397,16 +358,11 @@ async def error_save(callback: CallbackQuery, state: FSMContext):
                 photo_url=photo_url
             )
             
-            # Добавляем ID ошибки в список
-            errors_ids.append(error_id)
-            
-            # Добавляем оценку 0 (Не ОК)
-            grades.append(0)
-            
-            await state.update_data(
-                grades=grades,
-                errors_ids=errors_ids,
-                current_task_index=current_index + 1,
+            # Добавляем оценку 0 (Не ОК) вместе с ID ошибки и задачи, к которой она относится
+            await session.record(
+                state,
+                ok=False,
+                error_id=error_id,
                 current_error_task_id=None,
                 current_error_comment=None,
                 current_error_photo=None
@@ -415,7 +371,7 @@ async def error_save(callback: CallbackQuery, state: FSMContext):
             await callback.answer("✅ Ошибка сохранена", show_alert=False)
             
             # Переходим к следующей задаче
-            await show_task_for_check(callback, state)
+            await show_task_for_check(callback, state, session)
             
         except Exception as e:
             await callback.answer(
@@ -427,20 +383,18 @@ async def error_save(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("error_cancel_"))
-async def error_cancel(callback: CallbackQuery, state: FSMContext):
+async def error_cancel(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Отменить добавление ошибки и вернуться к выбору"""
-    if not await check_office_worker_rights(callback):
+    if not await check_office_worker_rights(callback, user):
         return
     
     parts = callback.data.split("_")
     task_id = int(parts[2])
     
-    data = await state.get_data()
-    task_ids = data.get('task_ids', [])
-    current_index = data.get('current_task_index', 0)
+    session = await CheckSession.load(state)
     
     # Проверяем, что это правильная задача
-    if current_index < len(task_ids) and task_ids[current_index] == task_id:
+    if session and session.current_task_id == task_id:
         task = await TaskService.get_task_by_id(task_id)
         task_info = task.get('info', 'Без описания') if task else 'Задача'
         
@@ -468,13 +422,14 @@ async def error_cancel(callback: CallbackQuery, state: FSMContext):
         await callback.answer("⚠️ Ошибка: неверная задача", show_alert=True)
 
 
-async def complete_check(callback: CallbackQuery, state: FSMContext):
+async def complete_check(callback: CallbackQuery, state: FSMContext, session: CheckSession):
     """Завершить проверку и сохранить результаты"""
-    data = await state.get_data()
-    form_id = data.get('form_id')
-    grades = data.get('grades', [])
-    errors_ids = data.get('errors_ids', [])
-    part_name = data.get('part_name', 'Блок')
+    form_id = session.form_id
+    # Оценки разворачиваются в список один раз, при сохранении
+    grades = session.grade_list()
+    errors_ids = session.errors_ids
+    errors_tasks = session.errors_tasks
+    part_name = session.part_name
     reviewer_id = str(callback.from_user.id)
     
     if not form_id or not grades:
@@ -493,12 +448,13 @@ async def complete_check(callback: CallbackQuery, state: FSMContext):
             grades=grades,
             errors_ids=errors_ids,  # Теперь используем реальные ID ошибок
             reviewer_id=reviewer_id,  # reviewer_id в БД INTEGER, но передаем как str
-            addition=""
+            addition="",
+            errors_tasks=errors_tasks
         )
         
         # Подсчитываем статистику
         total_tasks = len(grades)
-        completed_tasks = sum(grades)
+        completed_tasks = session.passed
         failed_tasks = total_tasks - completed_tasks
         percentage = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         
@@ -536,13 +492,11 @@ async def complete_check(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "check_back_to_menu")
-async def back_to_menu(callback: CallbackQuery, state: FSMContext):
+async def back_to_menu(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]):
     """Вернуться в главное меню"""
     await state.clear()
     from app.keyboards.main_menu import get_main_menu_keyboard
     from app.services.userService import UserService
-    
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     access_level = user.get('access_level') if user else UserService.ACCESS_LEVEL_WORKER
     
     await callback.message.edit_text(
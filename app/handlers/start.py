@@ -1,9 +1,12 @@
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
 from app.services.userService import UserService
+from app.models.rows import UserRow
 from app.states.registration import RegistrationStates
 from app.keyboards import get_main_menu_keyboard
 
@@ -11,16 +14,12 @@ router = Router()
 
 
 @router.message(CommandStart())
-async def send_welcome(message: Message) -> None:
-    # Инициализируем базу данных если еще не инициализирована
-    await UserService.initialize()
-    
+async def send_welcome(message: Message, user: Optional[UserRow]) -> None:
     await message.answer("Приветствую! Я бот по контролю производственных процессов на предприятии.")
-    user_id = message.from_user.id
     
-    if await UserService.check_user_exist(str(user_id)):
-        # Получаем уровень доступа пользователя
-        access_level = await UserService.get_user_access_level(str(user_id))
+    if user is not None:
+        # Уровень доступа пользователя
+        access_level = user.access_level
         await message.answer(
             "Добро пожаловать! Выберите действие:",
             reply_markup=get_main_menu_keyboard(access_level)
@@ -30,13 +29,10 @@ async def send_welcome(message: Message) -> None:
 
 
 @router.message(Command("menu"))
-async def show_menu(message: Message) -> None:
+async def show_menu(message: Message, user: Optional[UserRow]) -> None:
     """Показать главное меню"""
-    await UserService.initialize()
-    user_id = message.from_user.id
-    
-    if await UserService.check_user_exist(str(user_id)):
-        access_level = await UserService.get_user_access_level(str(user_id))
+    if user is not None:
+        access_level = user.access_level
         await message.answer(
             "📋 Главное меню:",
             reply_markup=get_main_menu_keyboard(access_level)
@@ -46,13 +42,10 @@ async def show_menu(message: Message) -> None:
 
 
 @router.callback_query(F.data == "main_menu")
-async def callback_main_menu(callback: CallbackQuery) -> None:
+async def callback_main_menu(callback: CallbackQuery, user: Optional[UserRow]) -> None:
     """Обработчик возврата в главное меню"""
-    await UserService.initialize()
-    user_id = callback.from_user.id
-    
-    if await UserService.check_user_exist(str(user_id)):
-        access_level = await UserService.get_user_access_level(str(user_id))
+    if user is not None:
+        access_level = user.access_level
         await callback.message.edit_text(
             "📋 Главное меню:",
             reply_markup=get_main_menu_keyboard(access_level)
@@ -73,12 +66,8 @@ async def cancel_registration(message: Message, state: FSMContext) -> None:
 
 
 @router.message(Command("register"))
-async def register_user(message: Message, state: FSMContext) -> None:
-    # Инициализируем базу данных если еще не инициализирована
-    await UserService.initialize()
-    
-    user_id = message.from_user.id
-    if await UserService.check_user_exist(str(user_id)):
+async def register_user(message: Message, state: FSMContext, user: Optional[UserRow]) -> None:
+    if user is not None:
         await message.answer("Вы уже зарегистрированы в системе.")
     else:
         await state.set_state(RegistrationStates.waiting_for_fio)
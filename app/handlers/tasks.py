@@ -1,9 +1,12 @@
 # app/handlers/tasks.py
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 
 from app.services.userService import UserService
+from app.models.rows import UserRow
 from app.services.taskService import TaskService
 from app.states.task_states import TaskStates
 from app.keyboards import (
@@ -17,18 +20,17 @@ from app.keyboards import (
 router = Router()
 
 
-async def check_admin_rights(user_id: int) -> bool:
+def check_admin_rights(user: Optional[UserRow]) -> bool:
     """Проверка прав ADMIN или MANAGER"""
-    access_level = await UserService.get_user_access_level(str(user_id))
-    return access_level in [UserService.ACCESS_LEVEL_ADMIN, UserService.ACCESS_LEVEL_MANAGER]
+    return user is not None and user.access_level in [UserService.ACCESS_LEVEL_ADMIN, UserService.ACCESS_LEVEL_MANAGER]
 
 
 @router.callback_query(F.data == "manage_tasks")
-async def show_task_management(callback: CallbackQuery, state: FSMContext) -> None:
+async def show_task_management(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Показать меню управления задачами"""
     await state.clear()
     
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -43,9 +45,9 @@ async def show_task_management(callback: CallbackQuery, state: FSMContext) -> No
 
 
 @router.callback_query(F.data == "task_create")
-async def task_create_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def task_create_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать создание задачи"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -86,11 +88,11 @@ async def task_create_process(message: Message, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data == "task_list")
-async def task_list_show(callback: CallbackQuery, state: FSMContext) -> None:
+async def task_list_show(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Показать список задач"""
     await state.clear()
     
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -115,11 +117,11 @@ async def task_list_show(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("task_view_"))
-async def task_view(callback: CallbackQuery, state: FSMContext) -> None:
+async def task_view(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Просмотр конкретной задачи"""
     await state.clear()
     
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -140,9 +142,9 @@ async def task_view(callback: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("task_edit_"))
-async def task_edit_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def task_edit_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать редактирование задачи"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -201,9 +203,9 @@ async def task_edit_process(message: Message, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("task_delete_") & ~F.data.contains("confirm"))
-async def task_delete_ask(callback: CallbackQuery) -> None:
+async def task_delete_ask(callback: CallbackQuery, user: Optional[UserRow]) -> None:
     """Запросить подтверждение удаления"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -226,9 +228,9 @@ async def task_delete_ask(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("task_delete_confirm_"))
-async def task_delete_confirm(callback: CallbackQuery) -> None:
+async def task_delete_confirm(callback: CallbackQuery, user: Optional[UserRow]) -> None:
     """Подтверждение удаления задачи"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -247,9 +249,9 @@ async def task_delete_confirm(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "task_search")
-async def task_search_start(callback: CallbackQuery, state: FSMContext) -> None:
+async def task_search_start(callback: CallbackQuery, state: FSMContext, user: Optional[UserRow]) -> None:
     """Начать поиск задачи"""
-    if not await check_admin_rights(callback.from_user.id):
+    if not check_admin_rights(user):
         await callback.answer("❌ Недостаточно прав доступа", show_alert=True)
         return
     
@@ -268,9 +270,7 @@ async def task_search_process(message: Message, state: FSMContext) -> None:
     """Обработка поиска задачи"""
     query = message.text.strip()
     
-    # TODO: Реализовать поиск в TaskService
-    tasks = await TaskService.get_all_tasks()
-    filtered_tasks = [t for t in tasks if query.lower() in t.get('info', '').lower()]
+    filtered_tasks = await TaskService.search_tasks(query)
     
     await state.clear()
     
@@ -1,9 +1,12 @@
 # app/handlers/worker.py
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 
 from app.services.userService import UserService
+from app.models.rows import UserRow
 from app.services.formService import FormService
 from app.services.checkService import CheckService
 from app.keyboards.worker_keyboards import get_worker_cabinet_keyboard, get_worker_checks_keyboard
@@ -11,9 +14,8 @@ from app.keyboards.worker_keyboards import get_worker_cabinet_keyboard, get_work
 router = Router()
 
 
-async def check_worker_rights(callback: CallbackQuery) -> bool:
+async def check_worker_rights(callback: CallbackQuery, user: Optional[UserRow]) -> bool:
     """Проверить, является ли пользователь работником"""
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     if not user or user.get('access_level') != 'worker':
         await callback.answer("⛔ У вас нет доступа к этому разделу", show_alert=True)
         return False
@@ -21,12 +23,11 @@ async def check_worker_rights(callback: CallbackQuery) -> bool:
 
 
 @router.callback_query(F.data == "worker_cabinet")
-async def show_worker_cabinet(callback: CallbackQuery):
+async def show_worker_cabinet(callback: CallbackQuery, user: Optional[UserRow]):
     """Показать личный кабинет работника"""
-    if not await check_worker_rights(callback):
+    if not await check_worker_rights(callback, user):
         return
     
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     username = user.get('name', 'Работник')
     part_name = user.get('part_name', 'Не назначена')
     
@@ -57,12 +58,11 @@ async def show_worker_cabinet(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "worker_view_brigade_info")
-async def view_brigade_info(callback: CallbackQuery):
+async def view_brigade_info(callback: CallbackQuery, user: Optional[UserRow]):
     """Просмотр информации о бригаде"""
-    if not await check_worker_rights(callback):
+    if not await check_worker_rights(callback, user):
         return
     
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     part_name = user.get('part_name')
     
     if not part_name:
@@ -108,12 +108,11 @@ async def view_brigade_info(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "worker_view_grades")
-async def view_brigade_grades(callback: CallbackQuery):
+async def view_brigade_grades(callback: CallbackQuery, user: Optional[UserRow]):
     """Просмотр оценок бригады"""
-    if not await check_worker_rights(callback):
+    if not await check_worker_rights(callback, user):
         return
     
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     part_name = user.get('part_name')
     
     if not part_name:
@@ -168,35 +167,31 @@ async def view_brigade_grades(callback: CallbackQuery):
     for check in recent_checks:
         check_id = check.get('id')
         checked_at = check.get('checked_at', 'Неизвестно')
-        grades_str = check.get('grades', '')
-        
-        # Парсим оценки
-        if grades_str:
-            grades = [int(x.strip()) for x in grades_str.split(',') if x.strip().isdigit()]
-            if grades:
-                # Вычисляем процент выполнения
-                completed_tasks = sum(1 for g in grades if g == 1)
-                total_tasks = len(grades)
-                percentage = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-                
-                # Вычисляем балл по шестибалльной шкале
-                score = round(percentage / 100 * 6, 1)
-                total_score += score
-                
-                # Эмодзи в зависимости от балла
-                if score >= 5.5:
-                    emoji = "🟢"
-                elif score >= 4.0:
-                    emoji = "🟡"
-                else:
-                    emoji = "🔴"
-                
-                text += (
-                    f"━━━━━━━━━━━━━━━━━━━━━━━\n"
-                    f"📅 {checked_at[:16]}\n"
-                    f"{emoji} Балл: <b>{score}/6</b> ({percentage:.0f}%)\n"
-                    f"✅ Выполнено: {completed_tasks}/{total_tasks} задач\n"
-                )
+        grades = check.grade_list
+        if grades:
+            # Вычисляем процент выполнения
+            completed_tasks = sum(1 for g in grades if g == 1)
+            total_tasks = len(grades)
+            percentage = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+            
+            # Вычисляем балл по шестибалльной шкале
+            score = round(percentage / 100 * 6, 1)
+            total_score += score
+            
+            # Эмодзи в зависимости от балла
+            if score >= 5.5:
+                emoji = "🟢"
+            elif score >= 4.0:
+                emoji = "🟡"
+            else:
+                emoji = "🔴"
+            
+            text += (
+                f"━━━━━━━━━━━━━━━━━━━━━━━\n"
+                f"📅 {checked_at[:16]}\n"
+                f"{emoji} Балл: <b>{score}/6</b> ({percentage:.0f}%)\n"
+                f"✅ Выполнено: {completed_tasks}/{total_tasks} задач\n"
+            )
     
     # Средний балл
     if check_count > 0:
@@ -215,12 +210,11 @@ async def view_brigade_grades(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "worker_view_errors")
-async def view_brigade_errors(callback: CallbackQuery):
+async def view_brigade_errors(callback: CallbackQuery, user: Optional[UserRow]):
     """Просмотр ошибок бригады"""
-    if not await check_worker_rights(callback):
+    if not await check_worker_rights(callback, user):
         return
     
-    user = await UserService.get_user_by_id(str(callback.from_user.id))
     part_name = user.get('part_name')
     
     if not part_name:
@@ -1,10 +1,12 @@
 # app/keyboards/admin_keyboards.py
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from app.keyboards.cache import cached_keyboard
 from typing import List, Dict
 from app.services.userService import UserService
 
 
+@cached_keyboard(maxsize=None)
 def get_admin_users_management_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура управления пользователями для администратора"""
     builder = InlineKeyboardBuilder()
@@ -68,6 +70,7 @@ def get_users_list_keyboard(users: List[Dict], action_prefix: str = "admin_edit_
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_access_level_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для выбора уровня доступа"""
     builder = InlineKeyboardBuilder()
@@ -94,6 +97,7 @@ def get_access_level_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_user_edit_keyboard(user_name: str) -> InlineKeyboardMarkup:
     """Клавиатура для редактирования пользователя"""
     builder = InlineKeyboardBuilder()
@@ -145,6 +149,7 @@ def get_brigades_assignment_keyboard(forms: List[Dict], user_name: str) -> Inlin
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_confirm_delete_user_keyboard(user_name: str) -> InlineKeyboardMarkup:
     """Клавиатура подтверждения удаления пользователя"""
     builder = InlineKeyboardBuilder()
@@ -0,0 +1,71 @@
+# app/keyboards/cache.py
+"""
+Кэш готовых клавиатур.
+
+Клавиатура зависит только от аргументов функции (уровень доступа, ID задачи,
+номер шага), поэтому её достаточно построить один раз для каждого набора
+аргументов. Закэшированная разметка неизменяема: одна и та же клавиатура
+отдаётся во все обработчики.
+"""
+from functools import lru_cache, wraps
+from typing import Callable, Dict, List, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+
+from config import KEYBOARD_CACHE_SIZE
+
+
+class FrozenInlineKeyboardMarkup(InlineKeyboardMarkup):
+    """InlineKeyboardMarkup, поля которой нельзя переприсвоить"""
+    model_config = {**InlineKeyboardMarkup.model_config, 'frozen': True}
+
+
+# Все закэшированные фабрики клавиатур (для статистики и сброса)
+_factories: List[Callable] = []
+
+
+def freeze_markup(markup: InlineKeyboardMarkup) -> FrozenInlineKeyboardMarkup:
+    """Неизменяемая копия клавиатуры"""
+    return FrozenInlineKeyboardMarkup(inline_keyboard=markup.inline_keyboard)
+
+
+def cached_keyboard(maxsize: Optional[int] = KEYBOARD_CACHE_SIZE):
+    """
+    Декоратор фабрики клавиатуры: результат запоминается по кортежу аргументов
+
+    Args:
+        maxsize: максимум запомненных клавиатур (LRU); None — без ограничения,
+            для клавиатур без аргументов или с небольшим набором значений
+    """
+    def decorator(build: Callable[..., InlineKeyboardMarkup]) -> Callable[..., InlineKeyboardMarkup]:
+        @lru_cache(maxsize=maxsize)
+        @wraps(build)
+        def factory(*args, **kwargs) -> InlineKeyboardMarkup:
+            return freeze_markup(build(*args, **kwargs))
+
+        # Построение без кэша (для сравнения в benchmarks/keyboards_bench.py)
+        factory.uncached = build
+        _factories.append(factory)
+        return factory
+    return decorator
+
+
+def get_keyboard_cache_stats() -> Dict[str, Dict[str, Optional[int]]]:
+    """Счётчики кэша по каждой фабрике: hits, misses, size, maxsize"""
+    stats = {}
+    for factory in _factories:
+        info = factory.cache_info()
+        name = f"{factory.__module__.rsplit('.', 1)[-1]}.{factory.__name__}"
+        stats[name] = {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'maxsize': info.maxsize,
+        }
+    return stats
+
+
+def clear_keyboard_caches():
+    """Сбросить все закэшированные клавиатуры"""
+    for factory in _factories:
+        factory.cache_clear()
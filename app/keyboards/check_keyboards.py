@@ -1,9 +1,11 @@
 # app/keyboards/check_keyboards.py
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from app.keyboards.cache import cached_keyboard
 from typing import List, Dict
 
 
+@cached_keyboard(maxsize=None)
 def get_check_menu_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура меню проверок"""
     builder = InlineKeyboardBuilder()
@@ -55,6 +57,7 @@ def get_form_selection_keyboard(forms: List[Dict]) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_check_grade_keyboard(task_id: int, current_task_num: int, total_tasks: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для выставления оценки задаче
@@ -89,6 +92,7 @@ def get_check_grade_keyboard(task_id: int, current_task_num: int, total_tasks: i
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_error_report_keyboard(task_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для добавления ошибки к задаче
@@ -117,6 +121,7 @@ def get_error_report_keyboard(task_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_check_complete_keyboard(check_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура после завершения проверки
@@ -177,6 +182,7 @@ def get_check_list_keyboard(checks: List[Dict]) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_check_cancel_confirm_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура подтверждения отмены проверки"""
     builder = InlineKeyboardBuilder()
@@ -1,12 +1,14 @@
 # app/keyboards/form_keyboards.py
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from app.keyboards.cache import cached_keyboard
 from typing import List, Dict
 
 
 TASKS_PER_PAGE = 8  # Количество задач на одной странице
 
 
+@cached_keyboard(maxsize=None)
 def get_form_management_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура управления формами (для ADMIN и MANAGER)"""
     builder = InlineKeyboardBuilder()
@@ -63,6 +65,7 @@ def get_form_list_keyboard(forms: List[Dict]) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_form_actions_keyboard(form_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура действий с конкретной формой
@@ -91,6 +94,7 @@ def get_form_actions_keyboard(form_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_form_confirm_delete_keyboard(form_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения удаления формы
@@ -183,6 +187,7 @@ def get_form_task_selection_keyboard(
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_form_edit_options_keyboard(form_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура выбора, что редактировать в форме
@@ -1,9 +1,11 @@
 # app/keyboards/leader_keyboards.py
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from app.keyboards.cache import cached_keyboard
 from typing import List, Dict
 
 
+@cached_keyboard(maxsize=None)
 def get_leader_cabinet_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура личного кабинета руководителя бригады"""
     builder = InlineKeyboardBuilder()
@@ -52,6 +54,7 @@ def get_workers_list_keyboard(workers: List[Dict]) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_brigade_errors_keyboard(has_errors: bool = False) -> InlineKeyboardMarkup:
     """Клавиатура для просмотра ошибок бригады"""
     builder = InlineKeyboardBuilder()
@@ -1,9 +1,11 @@
 # app/keyboards/main_menu.py
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from app.keyboards.cache import cached_keyboard
 from app.services.userService import UserService
 
 
+@cached_keyboard(maxsize=None)
 def get_main_menu_keyboard(access_level: str) -> InlineKeyboardMarkup:
     """
     Главное меню в зависимости от уровня доступа пользователя
@@ -60,6 +62,7 @@ def get_main_menu_keyboard(access_level: str) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_admin_cabinet_keyboard(access_level: str) -> InlineKeyboardMarkup:
     """
     Рабочий кабинет для ADMIN и MANAGER
@@ -104,6 +107,7 @@ def get_admin_cabinet_keyboard(access_level: str) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_back_button() -> InlineKeyboardMarkup:
     """Кнопка возврата в главное меню"""
     builder = InlineKeyboardBuilder()
@@ -113,6 +117,7 @@ def get_back_button() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_back_to_cabinet_button() -> InlineKeyboardMarkup:
     """Кнопка возврата в рабочий кабинет"""
     builder = InlineKeyboardBuilder()
@@ -1,9 +1,11 @@
 # app/keyboards/manager_keyboards.py
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from app.keyboards.cache import cached_keyboard
 from typing import List, Dict
 
 
+@cached_keyboard(maxsize=None)
 def get_manager_cabinet_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура личного кабинета менеджера (расширенная версия админа)"""
     builder = InlineKeyboardBuilder()
@@ -61,6 +63,7 @@ def get_brigades_list_keyboard(forms: List[Dict]) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_date_selection_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для выбора даты проверки"""
     builder = InlineKeyboardBuilder()
@@ -111,6 +114,7 @@ def get_reviewers_list_keyboard(reviewers: List[Dict]) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_confirm_planned_check_keyboard(form_id: int) -> InlineKeyboardMarkup:
     """Клавиатура подтверждения запланированной проверки"""
     builder = InlineKeyboardBuilder()
@@ -123,6 +127,7 @@ def get_confirm_planned_check_keyboard(form_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_planned_checks_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для управления запланированными проверками"""
     builder = InlineKeyboardBuilder()
@@ -1,8 +1,10 @@
 # app/keyboards/office_worker_keyboards.py
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from app.keyboards.cache import cached_keyboard
 
 
+@cached_keyboard()
 def get_task_check_keyboard(task_id: int, task_num: int, total_tasks: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для проверки задачи (ОК/Не ОК)
@@ -41,6 +43,7 @@ def get_task_check_keyboard(task_id: int, task_num: int, total_tasks: int) -> In
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_error_options_keyboard(task_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для добавления ошибки к задаче
@@ -75,6 +78,7 @@ def get_error_options_keyboard(task_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_error_confirm_keyboard(task_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения ошибки
@@ -101,6 +105,7 @@ def get_error_confirm_keyboard(task_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_check_complete_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура после завершения проверки"""
     builder = InlineKeyboardBuilder()
@@ -1,9 +1,11 @@
 # app/keyboards/task_keyboards.py
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from app.keyboards.cache import cached_keyboard
 from typing import List, Dict
 
 
+@cached_keyboard(maxsize=None)
 def get_task_management_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура управления задачами (для ADMIN и MANAGER)"""
     builder = InlineKeyboardBuilder()
@@ -60,6 +62,7 @@ def get_task_list_keyboard(tasks: List[Dict]) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_task_actions_keyboard(task_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура действий с конкретной задачей
@@ -85,6 +88,7 @@ def get_task_actions_keyboard(task_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard()
 def get_task_confirm_delete_keyboard(task_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения удаления задачи
@@ -1,8 +1,10 @@
 # app/keyboards/worker_keyboards.py
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from app.keyboards.cache import cached_keyboard
 
 
+@cached_keyboard(maxsize=None)
 def get_worker_cabinet_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура личного кабинета работника"""
     builder = InlineKeyboardBuilder()
@@ -23,6 +25,7 @@ def get_worker_cabinet_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cached_keyboard(maxsize=None)
 def get_worker_checks_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для просмотра проверок работника"""
     builder = InlineKeyboardBuilder()
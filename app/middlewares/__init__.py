@@ -0,0 +1,3 @@
+# Middlewares package
+
+from .user import UserMiddleware
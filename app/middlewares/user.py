@@ -0,0 +1,59 @@
+# app/middlewares/user.py
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject, Update, User
+
+from app.services.userService import UserService
+from app.states.registration import RegistrationStates
+
+# Команды, доступные незарегистрированным пользователям
+PUBLIC_COMMANDS = {'start', 'register', 'cancel', 'menu'}
+
+NOT_REGISTERED_TEXT = "Вы не зарегистрированы. Используйте /register"
+
+
+class UserMiddleware(BaseMiddleware):
+    """
+    Внешний middleware апдейтов: один раз загружает пользователя, от которого
+    пришёл апдейт, и передаёт его обработчикам в data['user'] (UserRow или None)
+    и data['access_level'].
+    
+    Сообщения и нажатия кнопок незарегистрированных пользователей отклоняются
+    до роутеров, кроме публичных команд и шагов регистрации.
+    """
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        from_user: Optional[User] = data.get('event_from_user')
+        user = await UserService.get_user_by_id(str(from_user.id)) if from_user else None
+        data['user'] = user
+        data['access_level'] = user.access_level if user else None
+        
+        if user is None and isinstance(event, Update) and not self._is_public(event, data):
+            if event.callback_query is not None:
+                await event.callback_query.answer(NOT_REGISTERED_TEXT, show_alert=True)
+                return None
+            if event.message is not None:
+                await event.message.answer(NOT_REGISTERED_TEXT)
+                return None
+        
+        return await handler(event, data)
+    
+    @staticmethod
+    def _is_public(update: Update, data: Dict[str, Any]) -> bool:
+        """Апдейт, который может обработать незарегистрированный пользователь"""
+        if update.message is None and update.callback_query is None:
+            # Прочие апдейты (вступление в чат и т.п.) роутеры проверяют сами
+            return True
+        if data.get('raw_state') in RegistrationStates.__all_states_names__:
+            return True
+        message: Optional[Message] = update.message
+        if message is not None and message.text and message.text.startswith('/'):
+            command = message.text.split()[0][1:].split('@')[0].lower()
+            return command in PUBLIC_COMMANDS
+        return False
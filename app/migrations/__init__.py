@@ -0,0 +1,10 @@
+# Migrations package
+
+from .runner import MIGRATIONS, LATEST_VERSION, get_schema_version, run_migrations
+
+__all__ = [
+    'MIGRATIONS',
+    'LATEST_VERSION',
+    'get_schema_version',
+    'run_migrations',
+]
@@ -0,0 +1,56 @@
+# app/migrations/backfill.py
+import logging
+import re
+from typing import Awaitable, Callable, List
+
+from config import MIGRATION_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def parse_id_list(value: str) -> List[int]:
+    """Разобрать CSV-список ID в любом из форматов: "1,2" или "1, 2" """
+    if not value:
+        return []
+    return [int(x) for x in re.findall(r'\d+', value)]
+
+
+async def batched_backfill(db, name: str, select_sql: str,
+                           apply: Callable[[object, List[dict]], Awaitable[None]],
+                           batch_size: int = MIGRATION_BATCH_SIZE):
+    """
+    Перенести данные пачками, каждая пачка — отдельная короткая транзакция
+    
+    Строки выбираются по возрастанию id (keyset-пагинация), поэтому большие
+    таблицы не блокируют писателя надолго. apply(conn, rows) должен быть
+    идемпотентным: после сбоя миграция перезапускается с начала.
+    
+    Args:
+        db: экземпляр Database
+        name: имя миграции (для журнала прогресса)
+        select_sql: запрос, возвращающий строки с колонкой id
+        apply: функция, записывающая одну пачку строк
+        batch_size: размер пачки
+    """
+    total = (await db.query(f"SELECT COUNT(*) AS total FROM ({select_sql}) AS src"))[0]['total']
+    if not total:
+        return
+    
+    logger.info("Миграция %s: перенос %d строк пачками по %d", name, total, batch_size)
+    done = 0
+    last_id = None
+    while True:
+        if last_id is None:
+            rows = await db.query(f"SELECT * FROM ({select_sql}) AS src ORDER BY id LIMIT ?", (batch_size,))
+        else:
+            rows = await db.query(
+                f"SELECT * FROM ({select_sql}) AS src WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size)
+            )
+        if not rows:
+            break
+        
+        await db.transaction(lambda conn, batch=rows: apply(conn, batch))
+        last_id = rows[-1]['id']
+        done += len(rows)
+        logger.info("Миграция %s: %d/%d (%.0f%%)", name, done, total, done / total * 100)
@@ -0,0 +1,131 @@
+"""Исходная схема: пользователи, задачи, формы, ошибки, проверки и планы проверок"""
+
+VERSION = 1
+NAME = "initial_schema"
+
+
+async def upgrade(conn):
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT,
+            name TEXT PRIMARY KEY,
+            access_level TEXT NOT NULL CHECK(access_level IN ('admin', 'manager', 'office_worker', 'leader', 'worker')),
+            available BOOL NOT NULL,
+            part_name TEXT
+        )
+    ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            info TEXT UNIQUE NOT NULL
+        )
+    ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS forms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            part_name TEXT UNIQUE,
+            tasks TEXT NOT NULL
+        )
+    ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS errors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            comment TEXT NOT NULL,
+            photo_url TEXT
+        )
+    ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS checks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            form_id INTEGER NOT NULL,
+            grades TEXT NOT NULL,
+            errors_ids TEXT,
+            addition TEXT,
+            reviewer_id INTEGER NOT NULL,
+            checked_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (form_id) REFERENCES forms(id) ON DELETE CASCADE,
+            FOREIGN KEY (reviewer_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS planned_checks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            time DATETIME NOT NULL,
+            form_id INTEGER NOT NULL,
+            reviewer_id INTEGER NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (form_id) REFERENCES forms(id) ON DELETE CASCADE,
+            FOREIGN KEY (reviewer_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+
+# Время хранится текстом в том же формате, что CURRENT_TIMESTAMP в SQLite (UTC)
+PG_NOW = "to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')"
+
+
+async def upgrade_postgres(conn):
+    # users.id — Telegram ID; UNIQUE нужен, чтобы на него ссылались внешние ключи
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT UNIQUE,
+            name TEXT PRIMARY KEY,
+            access_level TEXT NOT NULL CHECK(access_level IN ('admin', 'manager', 'office_worker', 'leader', 'worker')),
+            available BOOLEAN NOT NULL,
+            part_name TEXT
+        )
+    ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id SERIAL PRIMARY KEY,
+            info TEXT UNIQUE NOT NULL
+        )
+    ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS forms (
+            id SERIAL PRIMARY KEY,
+            part_name TEXT UNIQUE,
+            tasks TEXT NOT NULL
+        )
+    ''')
+
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS errors (
+            id SERIAL PRIMARY KEY,
+            comment TEXT NOT NULL,
+            photo_url TEXT
+        )
+    ''')
+
+    await conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS checks (
+            id SERIAL PRIMARY KEY,
+            form_id INTEGER NOT NULL,
+            grades TEXT NOT NULL,
+            errors_ids TEXT,
+            addition TEXT,
+            reviewer_id TEXT NOT NULL,
+            checked_at TEXT DEFAULT ({PG_NOW}),
+            FOREIGN KEY (form_id) REFERENCES forms(id) ON DELETE CASCADE,
+            FOREIGN KEY (reviewer_id) REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE
+        )
+    ''')
+
+    await conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS planned_checks (
+            id SERIAL PRIMARY KEY,
+            time TEXT NOT NULL,
+            form_id INTEGER NOT NULL,
+            reviewer_id TEXT NOT NULL,
+            created_at TEXT DEFAULT ({PG_NOW}),
+            FOREIGN KEY (form_id) REFERENCES forms(id) ON DELETE CASCADE,
+            FOREIGN KEY (reviewer_id) REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE
+        )
+    ''')
@@ -0,0 +1,54 @@
+"""
+Перевод users.access_level из INTEGER в TEXT (бывший migrate_access_levels.py)
+
+Старые значения: 0 -> 'admin', 1 -> 'manager', 2 -> 'office_worker',
+3 -> 'leader', 4 -> 'worker'. Для баз, созданных уже с TEXT, ничего не делает.
+"""
+
+VERSION = 2
+NAME = "access_levels_text"
+
+LEVEL_MAPPING = {
+    0: 'admin',
+    1: 'manager',
+    2: 'office_worker',
+    3: 'leader',
+    4: 'worker'
+}
+
+
+async def upgrade(conn):
+    cursor = await conn.execute("PRAGMA table_info(users)")
+    columns = {col[1]: col[2] for col in await cursor.fetchall()}
+    
+    if columns.get('access_level', 'TEXT').upper() == 'TEXT':
+        return
+    
+    await conn.execute('''
+        CREATE TABLE users_new (
+            id TEXT,
+            name TEXT PRIMARY KEY,
+            access_level TEXT NOT NULL CHECK(access_level IN ('admin', 'manager', 'office_worker', 'leader', 'worker')),
+            available BOOL NOT NULL,
+            part_name TEXT
+        )
+    ''')
+    
+    part_name = "part_name" if "part_name" in columns else "NULL"
+    cursor = await conn.execute(f"SELECT id, name, access_level, available, {part_name} FROM users")
+    users = await cursor.fetchall()
+    await conn.executemany(
+        "INSERT INTO users_new (id, name, access_level, available, part_name) VALUES (?, ?, ?, ?, ?)",
+        [
+            (user_id, name, LEVEL_MAPPING.get(level, 'worker'), available, part)
+            for user_id, name, level, available, part in users
+        ]
+    )
+    
+    await conn.execute("DROP TABLE users")
+    await conn.execute("ALTER TABLE users_new RENAME TO users")
+
+
+async def upgrade_postgres(conn):
+    # В PostgreSQL схема создаётся сразу с текстовыми уровнями доступа
+    pass
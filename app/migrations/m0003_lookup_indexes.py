@@ -0,0 +1,29 @@
+"""
+Вторичные индексы под условия WHERE/ORDER BY, которые используют сервисы.
+Проверка планов запросов: check_query_plans.py
+"""
+
+VERSION = 3
+NAME = "lookup_indexes"
+
+INDEXES = (
+    # get_by_id("users", ...) и обновления по Telegram ID (первичный ключ users — name)
+    "CREATE INDEX IF NOT EXISTS idx_users_id ON users(id)",
+    # get_workers_by_part_name, get_leader_by_part_name
+    "CREATE INDEX IF NOT EXISTS idx_users_part_name ON users(part_name, access_level, name)",
+    # get_leaders, get_office_workers, get_available_reviewers
+    "CREATE INDEX IF NOT EXISTS idx_users_access_level ON users(access_level, name)",
+    # get_checks_by_form (ORDER BY checked_at), get_errors_by_form
+    "CREATE INDEX IF NOT EXISTS idx_checks_form_checked_at ON checks(form_id, checked_at)",
+    # get_planned_checks_by_form
+    "CREATE INDEX IF NOT EXISTS idx_planned_checks_form_time ON planned_checks(form_id, time)",
+    # get_planned_checks_by_reviewer
+    "CREATE INDEX IF NOT EXISTS idx_planned_checks_reviewer_time ON planned_checks(reviewer_id, time)",
+    # get_upcoming_checks (диапазон по времени)
+    "CREATE INDEX IF NOT EXISTS idx_planned_checks_time ON planned_checks(time)",
+)
+
+
+async def upgrade(conn):
+    for index_sql in INDEXES:
+        await conn.execute(index_sql)
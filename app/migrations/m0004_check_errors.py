@@ -0,0 +1,46 @@
+"""
+Таблица связей проверка-ошибка check_errors (заменяет CSV-поле checks.errors_ids)
+
+Бэкфилл переносит существующие связи из checks.errors_ids пачками.
+ID задачи для старых проверок неизвестен, поэтому task_id остаётся пустым.
+"""
+
+from app.migrations.backfill import batched_backfill, parse_id_list
+
+VERSION = 4
+NAME = "check_errors"
+
+
+async def upgrade(conn):
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS check_errors (
+            check_id INTEGER NOT NULL,
+            error_id INTEGER NOT NULL,
+            task_id INTEGER,
+            PRIMARY KEY (check_id, error_id),
+            FOREIGN KEY (check_id) REFERENCES checks(id) ON DELETE CASCADE,
+            FOREIGN KEY (error_id) REFERENCES errors(id) ON DELETE CASCADE,
+            FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE SET NULL
+        )
+    ''')
+    # Поиск проверок по ошибке (первичный ключ покрывает check_id)
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_check_errors_error ON check_errors(error_id)")
+
+
+async def backfill(db):
+    async def apply(conn, checks):
+        await conn.executemany(
+            "INSERT INTO check_errors (check_id, error_id) VALUES (?, ?) ON CONFLICT DO NOTHING",
+            [
+                (check['id'], error_id)
+                for check in checks
+                for error_id in parse_id_list(check['errors_ids'])
+            ]
+        )
+    
+    await batched_backfill(
+        db,
+        NAME,
+        "SELECT id, errors_ids FROM checks WHERE errors_ids IS NOT NULL AND errors_ids != ''",
+        apply
+    )
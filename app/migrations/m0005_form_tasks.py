@@ -0,0 +1,47 @@
+"""
+Упорядоченный состав форм form_tasks (заменяет CSV-поле forms.tasks)
+
+Бэкфилл переносит задачи форм, для которых в form_tasks ещё нет строк.
+"""
+
+from app.migrations.backfill import batched_backfill, parse_id_list
+
+VERSION = 5
+NAME = "form_tasks"
+
+
+async def upgrade(conn):
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS form_tasks (
+            form_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            task_id INTEGER NOT NULL,
+            PRIMARY KEY (form_id, position),
+            FOREIGN KEY (form_id) REFERENCES forms(id) ON DELETE CASCADE,
+            FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE
+        )
+    ''')
+    # Удаление задачи из всех форм (первичный ключ покрывает form_id)
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_form_tasks_task ON form_tasks(task_id)")
+
+
+async def backfill(db):
+    async def apply(conn, forms):
+        await conn.executemany(
+            "INSERT INTO form_tasks (form_id, position, task_id) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+            [
+                (form['id'], position, task_id)
+                for form in forms
+                for position, task_id in enumerate(parse_id_list(form['tasks']))
+            ]
+        )
+    
+    await batched_backfill(
+        db,
+        NAME,
+        """
+        SELECT id, tasks FROM forms
+        WHERE tasks != '' AND NOT EXISTS (SELECT 1 FROM form_tasks ft WHERE ft.form_id = forms.id)
+        """,
+        apply
+    )
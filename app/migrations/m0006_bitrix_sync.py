@@ -0,0 +1,41 @@
+"""
+Зеркало контактов Bitrix24 в users: связь пользователя с контактом (users.bitrix_id)
+и таблица sync_state для отметок синхронизации (app/services/bitrix_sync.py)
+"""
+
+from app.migrations.m0001_initial_schema import PG_NOW
+
+VERSION = 6
+NAME = "bitrix_sync"
+
+
+async def upgrade(conn):
+    cursor = await conn.execute("PRAGMA table_info(users)")
+    columns = {col[1] for col in await cursor.fetchall()}
+    if 'bitrix_id' not in columns:
+        await conn.execute("ALTER TABLE users ADD COLUMN bitrix_id TEXT")
+    # Один контакт — один пользователь; созданные в боте пользователи контакта не имеют
+    await conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_bitrix_id ON users(bitrix_id) WHERE bitrix_id IS NOT NULL"
+    )
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            name TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+async def upgrade_postgres(conn):
+    await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS bitrix_id TEXT")
+    await conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_bitrix_id ON users(bitrix_id) WHERE bitrix_id IS NOT NULL"
+    )
+    await conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            name TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TEXT DEFAULT ({PG_NOW})
+        )
+    ''')
@@ -0,0 +1,32 @@
+"""
+Таблица fsm_storage для состояний FSM (app/utils/fsm_storage.py): незавершённые
+проверки переживают перезапуск бота
+"""
+
+VERSION = 7
+NAME = "fsm_storage"
+
+
+async def upgrade(conn):
+    # updated_at — время последней записи в секундах Unix, по нему удаляются брошенные сессии
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}',
+            updated_at REAL NOT NULL
+        )
+    ''')
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated_at ON fsm_storage(updated_at)")
+
+
+async def upgrade_postgres(conn):
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}',
+            updated_at DOUBLE PRECISION NOT NULL
+        )
+    ''')
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated_at ON fsm_storage(updated_at)")
@@ -0,0 +1,67 @@
+"""
+Внешние ключи PostgreSQL без каскадов, индексы check_errors(task_id) и checks(reviewer_id)
+
+В SQLite внешние ключи не проверяются (PRAGMA foreign_keys выключен, а users.id
+не уникален), и объявленные в миграциях ON DELETE CASCADE там ничего не делают.
+В PostgreSQL те же объявления удаляли историю проверок вместе с пользователем
+или формой, а ON UPDATE CASCADE на reviewer_id срывал синхронизацию с Bitrix24,
+когда Telegram ID переходил к другому пользователю. Ограничения пересоздаются
+без каскадов (NO ACTION), и зависимыми строками на обоих бэкендах одинаково
+управляют сервисы:
+- пользователя или форму с проведёнными проверками удалить нельзя,
+  их планы проверок удаляются вместе с ними;
+- при смене Telegram ID проверки и планы переходят к новому ID
+  (ссылки на пользователя проверяются в конце транзакции);
+- ссылку check_errors.task_id на удаляемую задачу снимает TaskService
+  (в PostgreSQL дополнительно ON DELETE SET NULL).
+
+users.id остаётся UNIQUE только в PostgreSQL: на него ссылаются внешние ключи.
+В SQLite это обычный индекс idx_users_id, а единственность Telegram ID
+обеспечивает UserService.
+
+Индексы нужны сервисам: ссылки ищутся по task_id и reviewer_id.
+"""
+
+VERSION = 8
+NAME = "foreign_key_parity"
+
+# (таблица, столбец, ссылка, дополнительные условия)
+FOREIGN_KEYS = (
+    ('checks', 'form_id', 'forms(id)', ''),
+    ('checks', 'reviewer_id', 'users(id)', 'DEFERRABLE INITIALLY DEFERRED'),
+    ('planned_checks', 'form_id', 'forms(id)', ''),
+    ('planned_checks', 'reviewer_id', 'users(id)', 'DEFERRABLE INITIALLY DEFERRED'),
+    ('check_errors', 'check_id', 'checks(id)', ''),
+    ('check_errors', 'error_id', 'errors(id)', ''),
+    ('check_errors', 'task_id', 'tasks(id)', 'ON DELETE SET NULL'),
+    ('form_tasks', 'form_id', 'forms(id)', ''),
+    ('form_tasks', 'task_id', 'tasks(id)', ''),
+)
+
+TABLES = tuple(sorted({table for table, _, _, _ in FOREIGN_KEYS}))
+
+
+async def upgrade(conn):
+    # В SQLite внешние ключи не проверяются: только индексы
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_check_errors_task ON check_errors(task_id)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_checks_reviewer ON checks(reviewer_id)")
+
+
+async def upgrade_postgres(conn):
+    # Снимаем ограничения, созданные миграциями 1, 4 и 5 (имена выбирал PostgreSQL)
+    cursor = await conn.execute(
+        "SELECT cls.relname AS table_name, con.conname AS constraint_name "
+        "FROM pg_constraint con JOIN pg_class cls ON cls.oid = con.conrelid "
+        "WHERE con.contype = 'f' AND cls.relnamespace = current_schema()::regnamespace"
+    )
+    for row in await cursor.fetchall():
+        if row['table_name'] in TABLES:
+            await conn.execute(
+                f'ALTER TABLE {row["table_name"]} DROP CONSTRAINT IF EXISTS "{row["constraint_name"]}"'
+            )
+    for table, column, reference, options in FOREIGN_KEYS:
+        await conn.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT fk_{table}_{column} "
+            f"FOREIGN KEY ({column}) REFERENCES {reference} {options}"
+        )
+    await upgrade(conn)
@@ -0,0 +1,90 @@
+# app/migrations/runner.py
+import logging
+import time
+
+from app.migrations import (
+    m0001_initial_schema,
+    m0002_access_levels_text,
+    m0003_lookup_indexes,
+    m0004_check_errors,
+    m0005_form_tasks,
+    m0006_bitrix_sync,
+    m0007_fsm_storage,
+    m0008_foreign_key_parity,
+)
+
+logger = logging.getLogger(__name__)
+
+# Миграции в порядке применения. Новая миграция — новый модуль mNNNN_<name>.py
+# с VERSION, NAME, upgrade(conn) и, при необходимости, backfill(db).
+# Если DDL для PostgreSQL отличается, модуль объявляет ещё upgrade_postgres(conn)
+MIGRATIONS = (
+    m0001_initial_schema,
+    m0002_access_levels_text,
+    m0003_lookup_indexes,
+    m0004_check_errors,
+    m0005_form_tasks,
+    m0006_bitrix_sync,
+    m0007_fsm_storage,
+    m0008_foreign_key_parity,
+)
+
+LATEST_VERSION = MIGRATIONS[-1].VERSION
+
+
+def get_upgrade(migration, dialect: str):
+    """Функция изменения схемы для диалекта базы"""
+    return getattr(migration, f"upgrade_{dialect}", migration.upgrade)
+
+
+async def get_schema_version(db) -> int:
+    """Получить номер последней применённой миграции"""
+    async def op(conn):
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor = await conn.execute("SELECT MAX(version) FROM schema_version")
+        row = await cursor.fetchone()
+        return row[0] or 0
+    
+    return await db.transaction(op)
+
+
+async def run_migrations(db) -> int:
+    """
+    Применить все неприменённые миграции
+    
+    Схема (upgrade) каждой миграции применяется в одной транзакции, затем
+    выполняется бэкфилл пачками, и только после него миграция отмечается
+    в schema_version. Возвращает количество применённых миграций.
+    """
+    current = await get_schema_version(db)
+    pending = [m for m in MIGRATIONS if m.VERSION > current]
+    if not pending:
+        return 0
+    
+    for migration in pending:
+        started = time.perf_counter()
+        logger.info("Применение миграции %04d_%s", migration.VERSION, migration.NAME)
+        
+        await db.transaction(get_upgrade(migration, db.dialect))
+        if hasattr(migration, 'backfill'):
+            await migration.backfill(db)
+        
+        async def mark_applied(conn, migration=migration):
+            await conn.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (migration.VERSION, migration.NAME)
+            )
+        
+        await db.transaction(mark_applied)
+        logger.info(
+            "Миграция %04d_%s применена за %.2f с",
+            migration.VERSION, migration.NAME, time.perf_counter() - started
+        )
+    
+    return len(pending)
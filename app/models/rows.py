@@ -0,0 +1,130 @@
+"""
+Типизированные строки таблиц.
+
+Классы со __slots__ создаются прямо из кортежей курсора (без промежуточного dict),
+порядок полей совпадает с порядком колонок в SELECT (см. Database.select).
+Для перехода со словарей оставлена совместимость: row['name'], row.get('name'),
+dict(row) и проверка 'name' in row работают как раньше.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def parse_number_string(s: Optional[str]) -> List[int]:
+    """Разобрать строку вида '1, 2, 3' в список чисел"""
+    if not s:
+        return []
+    return [int(x.strip()) for x in s.split(',') if x.strip().isdigit()]
+
+
+class RowModel:
+    """Базовый класс строки таблицы с совместимостью со словарём"""
+    __slots__ = ()
+
+    # Имя таблицы, из которой читается строка
+    TABLE = ''
+
+    @classmethod
+    def columns(cls) -> Tuple[str, ...]:
+        """Колонки таблицы в порядке полей класса"""
+        return cls.__slots__
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> 'RowModel':
+        """Создать из кортежа курсора (колонки в порядке columns())"""
+        return cls(*row)
+
+    # --- Совместимость со словарём (на время перехода) ---
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.columns()
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, getattr(self, key)) for key in self.columns()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+@dataclass
+class UserRow(RowModel):
+    __slots__ = ('id', 'name', 'access_level', 'available', 'part_name')
+    TABLE = 'users'
+
+    id: Optional[str]
+    name: str
+    access_level: str
+    available: bool
+    part_name: Optional[str]
+
+
+@dataclass
+class TaskRow(RowModel):
+    __slots__ = ('id', 'info')
+    TABLE = 'tasks'
+
+    id: int
+    info: str
+
+
+@dataclass
+class FormRow(RowModel):
+    __slots__ = ('id', 'part_name')
+    TABLE = 'forms'
+
+    id: int
+    part_name: Optional[str]
+
+
+@dataclass
+class CheckRow(RowModel):
+    __slots__ = ('id', 'form_id', 'grades', 'errors_ids', 'addition', 'reviewer_id', 'checked_at')
+    TABLE = 'checks'
+
+    id: int
+    form_id: int
+    grades: str
+    errors_ids: Optional[str]
+    addition: Optional[str]
+    reviewer_id: str
+    checked_at: Optional[str]
+
+    @property
+    def grade_list(self) -> List[int]:
+        """Оценки проверки списком чисел"""
+        return parse_number_string(self.grades)
+
+
+@dataclass
+class ErrorRow(RowModel):
+    __slots__ = ('id', 'comment', 'photo_url')
+    TABLE = 'errors'
+
+    id: int
+    comment: str
+    photo_url: Optional[str]
+
+
+@dataclass
+class PlannedCheckRow(RowModel):
+    __slots__ = ('id', 'time', 'form_id', 'reviewer_id', 'created_at')
+    TABLE = 'planned_checks'
+
+    id: int
+    time: str
+    form_id: int
+    reviewer_id: str
+    created_at: Optional[str]
@@ -0,0 +1,206 @@
+# app/services/bitrix_batch.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from fast_bitrix24.utils import http_build_query
+
+logger = logging.getLogger(__name__)
+
+# Bitrix24 выполняет в одном вызове batch не более 50 команд
+MAX_BATCH_COMMANDS = 50
+
+# Команды группы: локальное имя -> (метод, параметры)
+Commands = Dict[str, Tuple[str, Dict]]
+
+
+class BatchRef:
+    """
+    Ссылка на результат другой команды той же группы, например
+    BatchRef('find', '[0][ID]') — ID первого найденного контакта.
+    Bitrix24 подставляет значение на своей стороне ($result[...])
+    """
+    __slots__ = ('command', 'path')
+
+    def __init__(self, command: str, path: str = ''):
+        self.command = command
+        self.path = path
+
+
+class BitrixBatchError(Exception):
+    """Ошибка одной команды пакета"""
+
+    def __init__(self, method: str, error: Any):
+        self.method = method
+        self.error = error
+        if isinstance(error, dict):
+            error = error.get('error_description') or error.get('error') or error
+        super().__init__(f"{method}: {error}")
+
+
+def encode_command(method: str, params: Dict, prefix: str) -> str:
+    """Команда пакета в виде 'метод?параметры' (как http_build_query в PHP)"""
+    if not params:
+        return method
+    return f"{method}?{http_build_query(_prepare(params, prefix)).rstrip('&')}"
+
+
+def _prepare(value: Any, prefix: str) -> Any:
+    if isinstance(value, BatchRef):
+        return f"$result[{prefix}{value.command}]{value.path}"
+    if isinstance(value, dict):
+        return {key: _prepare(item, prefix) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_prepare(item, prefix) for item in value]
+    if value is None:
+        return ''
+    return value
+
+
+class BitrixBatcher:
+    """
+    Объединяет вызовы методов Bitrix24 из разных корутин в вызовы batch
+
+    Вызовы, пришедшие за window секунд, отправляются одним запросом (до 50 команд);
+    каждый вызывающий получает свой результат или свою ошибку. Группа команд
+    (call_group) всегда попадает в один запрос, поэтому команды группы могут
+    ссылаться на результаты друг друга (BatchRef).
+    """
+
+    def __init__(self, send: Callable[[Dict], Awaitable[Dict]], window: float,
+                 max_commands: int = MAX_BATCH_COMMANDS):
+        """
+        Args:
+            send: отправка параметров метода batch, возвращает ответ сервера целиком
+            window: сколько ждать других вызовов после первого (в секундах)
+            max_commands: максимум команд в одном запросе
+        """
+        self._send = send
+        self.window = window
+        self.max_commands = max(1, min(max_commands, MAX_BATCH_COMMANDS))
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._sending: Set[asyncio.Task] = set()
+        self._next_group = 0
+        self.requests = 0
+        self.commands = 0
+
+    async def call(self, method: str, params: Optional[Dict] = None) -> Any:
+        """Вызвать метод в составе общего пакета и получить его результат"""
+        results, errors = await self.call_group({'call': (method, params or {})})
+        if 'call' in errors:
+            raise errors['call']
+        return results.get('call')
+
+    async def call_group(self, commands: Commands) -> Tuple[Dict[str, Any], Dict[str, BitrixBatchError]]:
+        """
+        Выполнить группу команд в одном запросе
+
+        Returns:
+            (результаты, ошибки) по локальным именам команд
+        """
+        if not commands:
+            return {}, {}
+        if len(commands) > self.max_commands:
+            raise ValueError(f"В группе больше {self.max_commands} команд")
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((commands, future))
+        return await future
+
+    def stats(self) -> Dict[str, float]:
+        """Число запросов и команд; commands_per_request — средний размер пакета"""
+        return {
+            'requests': self.requests,
+            'commands': self.commands,
+            'commands_per_request': self.commands / self.requests if self.requests else 0,
+        }
+
+    async def close(self):
+        """Отправить накопленные вызовы и остановить сборщик пакетов"""
+        if self._worker is None:
+            return
+        self._queue.put_nowait(None)
+        await self._worker
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+        self._worker = None
+        self._queue = None
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._collect_loop())
+
+    async def _collect_loop(self):
+        """Собирает группы, пришедшие за window, в пакеты до max_commands команд"""
+        queue = self._queue
+        carry = None
+        stopping = False
+        while not stopping:
+            item = carry or await queue.get()
+            carry = None
+            if item is None:
+                break
+            if self.window > 0:
+                await asyncio.sleep(self.window)
+            batch = [item]
+            size = len(item[0])
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                if size + len(item[0]) > self.max_commands:
+                    # Группа не делится между запросами: уходит в следующий пакет
+                    carry = item
+                    break
+                batch.append(item)
+                size += len(item[0])
+            task = asyncio.create_task(self._send_batch(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send_batch(self, batch: List[Tuple[Commands, asyncio.Future]]):
+        """Отправить пакет и раздать результаты по группам"""
+        cmd = {}
+        names = []
+        for commands, _ in batch:
+            prefix = f"g{self._next_group}_"
+            self._next_group += 1
+            group_names = {}
+            for local, (method, params) in commands.items():
+                cmd[prefix + local] = encode_command(method, params, prefix)
+                group_names[local] = (prefix + local, method)
+            names.append(group_names)
+
+        self.requests += 1
+        self.commands += len(cmd)
+        try:
+            response = await self._send({'halt': 0, 'cmd': cmd})
+            result = response.get('result') or {}
+            results = result.get('result') or {}
+            errors = result.get('result_error') or {}
+        except Exception as e:
+            logger.warning("Ошибка пакетного запроса к Bitrix24 (%s команд): %s", len(cmd), e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Пустые словари в ответе Bitrix24 приходят списками
+        if isinstance(results, list):
+            results = {}
+        if isinstance(errors, list):
+            errors = {}
+        for (_, future), group_names in zip(batch, names):
+            if future.done():
+                continue
+            group_results = {}
+            group_errors = {}
+            for local, (name, method) in group_names.items():
+                if name in errors:
+                    group_errors[local] = BitrixBatchError(method, errors[name])
+                else:
+                    group_results[local] = results.get(name)
+            future.set_result((group_results, group_errors))
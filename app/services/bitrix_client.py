@@ -0,0 +1,343 @@
+# app/services/bitrix_client.py
+"""
+HTTP-клиент REST API Bitrix24 с регулятором исходящих запросов.
+
+Каждая HTTP-попытка проходит через BitrixGovernor: ограничение скорости
+(token bucket), ограничение числа одновременных запросов, повторы с
+экспоненциальной задержкой и случайным разбросом (jitter) при
+QUERY_LIMIT_EXCEEDED и ошибках 5xx, автоматический выключатель (circuit
+breaker), который при череде отказов перестаёт обращаться к Bitrix24.
+
+Запросы записи (crm.contact.add, batch с ними) после 5xx, обрыва связи или
+таймаута могли выполниться, поэтому повторяются только при превышении
+лимита (QUERY_LIMIT_EXCEEDED, 429): такой запрос портал отклоняет до
+выполнения. Превышение лимита — не отказ портала и выключатель не размыкает.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import aiohttp
+
+from config import (
+    BITRIX_RATE_LIMIT, BITRIX_RATE_BURST, BITRIX_MAX_CONCURRENT, BITRIX_REQUEST_TIMEOUT,
+    BITRIX_MAX_RETRIES, BITRIX_RETRY_BASE_DELAY, BITRIX_RETRY_MAX_DELAY,
+    BITRIX_CIRCUIT_FAILURES, BITRIX_CIRCUIT_RESET,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Коды ошибок Bitrix24, после которых запрос стоит повторить позже
+RETRYABLE_ERRORS = {'QUERY_LIMIT_EXCEEDED', 'OPERATION_TIME_LIMIT', 'INTERNAL_SERVER_ERROR'}
+# Превышение лимита запросов: запрос отклонён до выполнения
+THROTTLE_ERRORS = {'QUERY_LIMIT_EXCEEDED'}
+# Окончания методов только для чтения
+READ_METHOD_SUFFIXES = ('.list', '.get', '.fields')
+
+
+def is_idempotent(method: str, params: Optional[Dict] = None) -> bool:
+    """Можно ли повторить вызов после любой временной ошибки: метод (или все команды batch) только читает"""
+    if method == 'batch':
+        commands = (params or {}).get('cmd') or {}
+        return all(is_idempotent(str(command).partition('?')[0]) for command in commands.values())
+    return method.endswith(READ_METHOD_SUFFIXES)
+
+
+class BitrixError(Exception):
+    """Ошибка ответа Bitrix24"""
+
+    def __init__(self, code: str, description: str = '', status: Optional[int] = None):
+        self.code = code
+        self.description = description
+        self.status = status
+        super().__init__(f"{code}: {description}" if description else code)
+
+    @property
+    def retryable(self) -> bool:
+        return (
+            self.code in RETRYABLE_ERRORS
+            or self.status == 429
+            or (self.status is not None and self.status >= 500)
+        )
+
+    @property
+    def throttled(self) -> bool:
+        return self.code in THROTTLE_ERRORS or self.status == 429
+
+
+class BitrixUnavailable(BitrixError):
+    """Выключатель разомкнут: Bitrix24 недоступен, запрос не отправлялся"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__('CIRCUIT_OPEN', f"повтор через {retry_after:.1f} с")
+
+
+class TokenBucket:
+    """Ограничение скорости: rate запросов в секунду с запасом burst"""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Дождаться свободного токена (ожидающие обслуживаются по очереди)"""
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель: после failure_threshold отказов подряд
+    размыкается на reset_timeout секунд, затем пропускает один пробный запрос
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Можно ли отправить запрос сейчас"""
+        if self.state == self.OPEN:
+            if self._clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - self._clock())
+
+    def abandon(self):
+        """Запрос отменён или отклонён лимитом: пробный запрос можно отправить снова"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning("Bitrix24 недоступен: выключатель разомкнут на %g с", self.reset_timeout)
+            self.state = self.OPEN
+            self.opened_at = self._clock()
+
+
+class BitrixGovernor:
+    """Регулятор исходящих запросов к Bitrix24 (скорость, параллельность, повторы, выключатель)"""
+
+    def __init__(
+        self,
+        rate: float = BITRIX_RATE_LIMIT,
+        burst: int = BITRIX_RATE_BURST,
+        max_concurrent: int = BITRIX_MAX_CONCURRENT,
+        max_retries: int = BITRIX_MAX_RETRIES,
+        base_delay: float = BITRIX_RETRY_BASE_DELAY,
+        max_delay: float = BITRIX_RETRY_MAX_DELAY,
+        failure_threshold: int = BITRIX_CIRCUIT_FAILURES,
+        reset_timeout: float = BITRIX_CIRCUIT_RESET,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+        self.max_concurrent = max(1, max_concurrent)
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self.in_flight = 0
+        self.requests = 0
+        self.retries: Dict[str, int] = {}
+        self.failures = 0
+        self.rejected = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def run(self, send: Callable[[], Awaitable[T]], idempotent: bool = True) -> T:
+        """
+        Выполнить запрос send() с соблюдением лимитов и повторами
+
+        Args:
+            idempotent: запрос можно повторить после любой временной ошибки;
+                иначе (запись) он повторяется только при превышении лимита
+
+        Raises:
+            BitrixUnavailable: выключатель разомкнут
+            BitrixError: ошибка Bitrix24 (после исчерпания повторов, если она временная)
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.rejected += 1
+                raise BitrixUnavailable(self.breaker.retry_after())
+            try:
+                result = await self._attempt(send)
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+            except (BitrixError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = self._retry_reason(e)
+                if reason is None:
+                    # Ошибка запроса (4xx): сервер отвечает, выключатель не трогаем
+                    self.breaker.record_success()
+                    raise
+                if isinstance(e, BitrixError) and e.throttled:
+                    # Превышение лимита не отказ: счётчик отказов выключателя не меняется
+                    self.breaker.abandon()
+                else:
+                    self.breaker.record_failure()
+                    if not idempotent:
+                        # Запись могла выполниться: повтор создал бы дубликат
+                        self.failures += 1
+                        raise
+                if attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                self.retries[reason] = self.retries.get(reason, 0) + 1
+                # Экспоненциальная задержка с полным разбросом: повторы разных корутин не совпадают
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                logger.debug("Повтор запроса к Bitrix24 через %.2f с (%s)", delay, reason)
+                attempt += 1
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _attempt(self, send: Callable[[], Awaitable[T]]) -> T:
+        """Одна попытка: ожидание слота и токена, затем запрос"""
+        queued = self._clock()
+        async with self._slots:
+            await self.bucket.acquire()
+            waited = self._clock() - queued
+            self.wait_count += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.requests += 1
+            self.in_flight += 1
+            try:
+                return await send()
+            finally:
+                self.in_flight -= 1
+
+    @staticmethod
+    def _retry_reason(error: Exception) -> Optional[str]:
+        """Причина повтора или None, если ошибку повторять бесполезно"""
+        if isinstance(error, BitrixError):
+            if not error.retryable:
+                return None
+            return error.code if error.code in RETRYABLE_ERRORS else f"http_{error.status}"
+        return 'network'
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики: ожидание в очереди (мс), повторы по причинам, состояние выключателя"""
+        return {
+            'requests': self.requests,
+            'in_flight': self.in_flight,
+            'queue_wait_avg_ms': self.wait_total / self.wait_count * 1000 if self.wait_count else 0.0,
+            'queue_wait_max_ms': self.wait_max * 1000,
+            'retries': dict(self.retries),
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'circuit': self.breaker.state,
+            'circuit_opened': self.breaker.times_opened,
+        }
+
+
+class BitrixClient:
+    """
+    Клиент REST API Bitrix24 через входящий вебхук. Каждая HTTP-попытка
+    проходит через регулятор (BitrixGovernor)
+    """
+
+    def __init__(self, webhook: str, governor: BitrixGovernor, timeout: float = BITRIX_REQUEST_TIMEOUT,
+                 session: Optional[aiohttp.ClientSession] = None):
+        self.webhook = webhook if webhook.endswith('/') else webhook + '/'
+        self.governor = governor
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = session
+        self._own_session = session is None
+
+    async def call(self, method: str, params: Optional[Dict] = None, raw: bool = False,
+                   idempotent: Optional[bool] = None) -> Any:
+        """
+        Вызвать метод REST API
+
+        Args:
+            idempotent: можно ли повторять вызов после 5xx и обрыва связи
+                (по умолчанию — только методы чтения, см. is_idempotent)
+
+        Returns:
+            result из ответа или весь ответ (raw=True)
+        """
+        if idempotent is None:
+            idempotent = is_idempotent(method, params)
+        response = await self.governor.run(lambda: self._request(method, params or {}), idempotent)
+        return response if raw else response.get('result')
+
+    async def get_all(self, method: str, params: Optional[Dict] = None) -> List[Dict]:
+        """Все записи списочного метода (постранично по next)"""
+        params = dict(params or {})
+        items: List[Dict] = []
+        while True:
+            response = await self.call(method, params, raw=True)
+            items.extend(response.get('result') or [])
+            if 'next' not in response:
+                return items
+            params['start'] = response['next']
+
+    async def close(self):
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _request(self, method: str, params: Dict) -> Dict:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        async with self._session.post(self.webhook + method, json=params) as response:
+            try:
+                body = await response.json(content_type=None)
+            except ValueError:
+                body = None
+            if not isinstance(body, dict):
+                raise BitrixError(f"HTTP_{response.status}", status=response.status)
+            if 'error' in body:
+                raise BitrixError(body['error'], body.get('error_description', ''), response.status)
+            if response.status >= 400:
+                raise BitrixError(f"HTTP_{response.status}", status=response.status)
+            return body
@@ -1,7 +1,12 @@
 # app/services/bitrix_service.py
+import asyncio
 from typing import List, Dict, Optional
-from fast_bitrix24 import Bitrix
-from config import BITRIX_WEBHOOK
+from app.services.bitrix_batch import BatchRef, BitrixBatcher
+from app.services.bitrix_client import BitrixClient, BitrixGovernor
+from app.utils.cache import AsyncRefreshCache
+from config import (
+    BITRIX_WEBHOOK, BITRIX_CACHE_SIZE, BITRIX_CACHE_TTL, BITRIX_CACHE_STALE_TTL, BITRIX_BATCH_WINDOW
+)
 
 # Убедитесь, что вы создали эти поля в CRM -> Настройки -> Свои поля -> Контакты
 # https://helpdesk.bitrix24.ru/open/12524244/
@@ -10,9 +15,34 @@ ACCESS_LEVEL_FIELD = 'UF_CRM_ACCESS_LEVEL'
 AVAILABLE_FIELD = 'UF_CRM_AVAILABLE'
 
 
+def contact_full_name(contact: Dict) -> str:
+    """ФИО контакта в формате пользователей бота: «Фамилия Имя Отчество»"""
+    parts = (contact.get('LAST_NAME'), contact.get('NAME'), contact.get('SECOND_NAME'))
+    return ' '.join(part.strip() for part in parts if part and part.strip())
+
+
+def _method_cache(method: str) -> AsyncRefreshCache:
+    # Пока Bitrix24 недоступен, отдаются последние известные ответы
+    return AsyncRefreshCache(
+        BITRIX_CACHE_SIZE, BITRIX_CACHE_TTL[method], BITRIX_CACHE_STALE_TTL, serve_stale_on_error=True
+    )
+
+
 class BitrixService:
-    b = None
+    # Клиент REST API; все запросы проходят через регулятор (лимиты, повторы, выключатель)
+    b: Optional[BitrixClient] = None
     initialized = False
+    # Сборщик вызовов crm.contact.* в запросы batch
+    _batcher: Optional[BitrixBatcher] = None
+
+    # Кэши ответов по методам: Telegram ID -> есть ли контакт / уровень доступа,
+    # строка поиска -> найденные контакты
+    _exists_cache = _method_cache('check_user_exist')
+    _access_level_cache = _method_cache('get_user_access_level')
+    _name_cache = _method_cache('get_user_by_name')
+
+    # Bitrix24 отдаёт списки страницами по 50 записей
+    PAGE_SIZE = 50
 
     # Константы уровней доступа
     ACCESS_LEVEL_ADMIN = 'admin'
@@ -31,22 +61,72 @@ class BitrixService:
     }
 
     @staticmethod
-    async def initialize():
-        """Инициализировать подключение к Bitrix24"""
+    async def initialize(webhook: Optional[str] = None, governor: Optional[BitrixGovernor] = None):
+        """
+        Инициализировать подключение к Bitrix24
+
+        Args:
+            webhook: адрес вебхука вместо BITRIX_WEBHOOK (например, benchmarks/fake_bitrix.py)
+            governor: регулятор запросов с другими лимитами (по умолчанию — из config.py)
+        """
         if not BitrixService.initialized:
-            if not BITRIX_WEBHOOK or BITRIX_WEBHOOK == "YOUR_BITRIX_WEBHOOK_URL":
+            webhook = webhook or BITRIX_WEBHOOK
+            if not webhook or webhook == "YOUR_BITRIX_WEBHOOK_URL":
                 raise ValueError("Необходимо указать BITRIX_WEBHOOK в файле config.py")
-            BitrixService.b = Bitrix(BITRIX_WEBHOOK)
+            BitrixService.b = BitrixClient(webhook, governor or BitrixGovernor())
+            BitrixService._batcher = BitrixBatcher(
+                lambda params: BitrixService.b.call('batch', params, raw=True), BITRIX_BATCH_WINDOW
+            )
             BitrixService.initialized = True
 
+    @staticmethod
+    async def close():
+        """Отправить накопленные пакетные вызовы и закрыть HTTP-сессию"""
+        if BitrixService._batcher is not None:
+            await BitrixService._batcher.close()
+        if BitrixService.b is not None:
+            await BitrixService.b.close()
+
+    @staticmethod
+    def get_batch_stats() -> Dict[str, float]:
+        """Число запросов batch и команд в них"""
+        return BitrixService._batcher.stats() if BitrixService._batcher else {}
+
+    @staticmethod
+    def get_governor_stats() -> Dict:
+        """Метрики регулятора: ожидание в очереди, повторы, состояние выключателя"""
+        return BitrixService.b.governor.stats() if BitrixService.b else {}
+
     @staticmethod
     def get_access_level_name(access_level: str) -> str:
         """Получить русское название уровня доступа"""
         return BitrixService.ACCESS_LEVEL_NAMES.get(access_level, access_level)
 
+    @staticmethod
+    def get_cache_stats() -> Dict[str, Dict]:
+        """Счётчики кэшей по методам"""
+        return {
+            'check_user_exist': BitrixService._exists_cache.stats(),
+            'get_user_access_level': BitrixService._access_level_cache.stats(),
+            'get_user_by_name': BitrixService._name_cache.stats(),
+        }
+
+    @staticmethod
+    def clear_cache():
+        """Сбросить все закэшированные ответы Bitrix24"""
+        BitrixService._exists_cache.clear()
+        BitrixService._access_level_cache.clear()
+        BitrixService._name_cache.clear()
+
     @staticmethod
     async def check_user_exist(user_id: str) -> bool:
-        """Проверить существование пользователя по Telegram ID"""
+        """Проверить существование пользователя по Telegram ID (через кэш)"""
+        return await BitrixService._exists_cache.get(
+            str(user_id), lambda: BitrixService._fetch_user_exist(user_id)
+        )
+
+    @staticmethod
+    async def _fetch_user_exist(user_id: str) -> bool:
         users = await BitrixService.b.get_all(
             'crm.contact.list',
             params={
@@ -58,7 +138,15 @@ class BitrixService:
 
     @staticmethod
     async def get_user_by_name(name: str) -> List[Dict]:
-        """Найти пользователя по имени (ФИО)"""
+        """Найти пользователя по имени (ФИО, через кэш)"""
+        users = await BitrixService._name_cache.get(
+            name, lambda: BitrixService._fetch_users_by_name(name)
+        )
+        # Копии: изменения у вызывающего не должны попадать в кэш
+        return [dict(user) for user in users]
+
+    @staticmethod
+    async def _fetch_users_by_name(name: str) -> List[Dict]:
         # Bitrix24 ищет по частичному совпадению в полях имени, фамилии
         contacts = await BitrixService.b.get_all(
             'crm.contact.list',
@@ -71,48 +159,93 @@ class BitrixService:
         return [
             {
                 'id': contact.get(TELEGRAM_ID_FIELD),
-                'name': f"{contact.get('LAST_NAME', '')} {contact.get('NAME', '')} {contact.get('SECOND_NAME', '')}".strip(),
+                'name': contact_full_name(contact),
                 'access_level': contact.get(ACCESS_LEVEL_FIELD),
                 'bitrix_id': contact['ID']
             } for contact in contacts
         ]
 
     @staticmethod
-    async def update_user_id_by_name(name: str, user_id: str) -> bool:
-        """Привязать Telegram ID к контакту в Bitrix по имени"""
-        # Находим контакт по имени
-        users = await BitrixService.get_user_by_name(name)
-        if not users:
-            return False
+    async def list_contacts_page(contact_filter: Dict, select: List[str], after_id: int = 0) -> List[Dict]:
+        """
+        Одна страница контактов (до PAGE_SIZE) с ID больше after_id, по возрастанию ID
+
+        Постраничное чтение по ID без подсчёта общего числа (start = -1) —
+        рекомендованный Bitrix24 способ выгрузки больших списков
+        """
+        response = await BitrixService.b.call(
+            'crm.contact.list',
+            {
+                'filter': {**contact_filter, '>ID': after_id},
+                'select': select,
+                'order': {'ID': 'ASC'},
+                'start': -1,
+            },
+            raw=True
+        )
+        return response.get('result') or []
 
-        # Предполагаем, что ФИО уникально
-        contact_to_update = users[0]
-        bitrix_id = contact_to_update.get('bitrix_id')
+    @staticmethod
+    async def update_user_id_by_name(name: str, user_id: str) -> bool:
+        """
+        Привязать Telegram ID к контакту в Bitrix по имени
 
-        if not bitrix_id:
+        Поиск контакта и обновление уходят одним запросом batch: обновление
+        ссылается на ID первого найденного контакта
+        """
+        results, errors = await BitrixService._batcher.call_group({
+            'find': ('crm.contact.list', {
+                'filter': {'%NAME': name},
+                'select': ['ID', TELEGRAM_ID_FIELD],
+                'order': {'ID': 'ASC'},
+                'start': -1,
+            }),
+            # Предполагаем, что ФИО уникально
+            'update': ('crm.contact.update', {
+                'ID': BatchRef('find', '[0][ID]'),
+                'fields': {TELEGRAM_ID_FIELD: user_id},
+            }),
+        })
+        if 'find' in errors:
+            raise errors['find']
+        contacts = results.get('find') or []
+        if not contacts:
+            # Контакт не найден: обновление без ID отклонено Bitrix24
             return False
+        if 'update' in errors:
+            raise errors['update']
 
-        # Обновляем поле с Telegram ID
-        await BitrixService.b.call(
-            'crm.contact.update',
-            items={
-                'ID': bitrix_id,
-                'fields': {
-                    TELEGRAM_ID_FIELD: user_id
-                }
-            }
+        # Сбрасываем ответы, зависящие от старого и нового Telegram ID контакта
+        bitrix_id = str(contacts[0]['ID'])
+        for telegram_id in (user_id, contacts[0].get(TELEGRAM_ID_FIELD)):
+            if telegram_id:
+                BitrixService._exists_cache.invalidate(str(telegram_id))
+                BitrixService._access_level_cache.invalidate(str(telegram_id))
+        BitrixService._name_cache.invalidate_where(
+            lambda query, found: any(str(user['bitrix_id']) == bitrix_id for user in found)
         )
         return True
 
-    # Методы-заглушки, которые нужно будет реализовать при необходимости
+    @staticmethod
+    async def update_users_id_by_name(bindings: Dict[str, str]) -> Dict[str, bool]:
+        """
+        Привязать Telegram ID к нескольким контактам: ФИО -> Telegram ID.
+        Вызовы объединяются в пакеты batch (по 25 привязок на запрос)
+        """
+        names = list(bindings)
+        results = await asyncio.gather(
+            *(BitrixService.update_user_id_by_name(name, bindings[name]) for name in names)
+        )
+        return dict(zip(names, results))
+
     @staticmethod
     async def create_user(name: str, access_level: str, available: bool = True) -> int:
-        """Создать нового пользователя (контакт в Bitrix)"""
+        """Создать нового пользователя (контакт в Bitrix). Возвращает ID контакта"""
         # Эта логика может быть сложнее (парсинг ФИО)
         # Для простоты пока используем только имя
-        await BitrixService.b.call(
+        contact_id = await BitrixService._batcher.call(
             'crm.contact.add',
-            items={
+            {
                 'fields': {
                     'NAME': name,
                     ACCESS_LEVEL_FIELD: access_level,
@@ -120,11 +253,46 @@ class BitrixService:
                 }
             }
         )
-        return 1 # Возвращаем условный ID
+        # Новый контакт попадает в результаты поиска по любой части его имени
+        lowered = name.lower()
+        BitrixService._name_cache.invalidate_where(lambda query, found: query.lower() in lowered)
+        return int(contact_id)
+
+    @staticmethod
+    async def create_users(users_data: List[Dict]) -> List[int]:
+        """
+        Создать несколько контактов (до 50 на запрос batch)
+
+        Args:
+            users_data: словари с ключами name, access_level и необязательным available
+        """
+        return list(await asyncio.gather(*(
+            BitrixService.create_user(user['name'], user['access_level'], user.get('available', True))
+            for user in users_data
+        )))
+
+    @staticmethod
+    async def update_contacts(updates: Dict[str, Dict]) -> None:
+        """
+        Обновить поля нескольких контактов (до 50 на запрос batch),
+        например уровень доступа или доступность: ID контакта -> поля
+        """
+        await asyncio.gather(*(
+            BitrixService._batcher.call('crm.contact.update', {'ID': bitrix_id, 'fields': fields})
+            for bitrix_id, fields in updates.items()
+        ))
+        # Изменённые поля могли попасть в любой из кэшей
+        BitrixService.clear_cache()
 
     @staticmethod
     async def get_user_access_level(user_id: str) -> Optional[str]:
-        """Получить уровень доступа пользователя по Telegram ID"""
+        """Получить уровень доступа пользователя по Telegram ID (через кэш)"""
+        return await BitrixService._access_level_cache.get(
+            str(user_id), lambda: BitrixService._fetch_user_access_level(user_id)
+        )
+
+    @staticmethod
+    async def _fetch_user_access_level(user_id: str) -> Optional[str]:
         users = await BitrixService.b.get_all(
             'crm.contact.list',
             params={
@@ -0,0 +1,205 @@
+# app/services/bitrix_sync.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from app.db import BaseDatabase
+from app.services.bitrix_service import (
+    BitrixService,
+    TELEGRAM_ID_FIELD,
+    ACCESS_LEVEL_FIELD,
+    AVAILABLE_FIELD,
+    contact_full_name,
+)
+from app.services.userService import UserService
+from config import BITRIX_SYNC_INTERVAL, BITRIX_FULL_RESYNC_INTERVAL, BITRIX_SYNC_OVERLAP
+
+logger = logging.getLogger(__name__)
+
+# Отметка DATE_MODIFY: контакты, изменённые до неё, уже перенесены
+WATERMARK = 'bitrix_contacts_date_modify'
+
+CONTACT_FIELDS = [
+    'ID', 'NAME', 'LAST_NAME', 'SECOND_NAME', 'DATE_MODIFY',
+    TELEGRAM_ID_FIELD, ACCESS_LEVEL_FIELD, AVAILABLE_FIELD,
+]
+
+ACCESS_LEVELS = {
+    UserService.ACCESS_LEVEL_ADMIN,
+    UserService.ACCESS_LEVEL_MANAGER,
+    UserService.ACCESS_LEVEL_OFFICE_WORKER,
+    UserService.ACCESS_LEVEL_LEADER,
+    UserService.ACCESS_LEVEL_WORKER,
+}
+
+
+def parse_available(value) -> bool:
+    """Значение поля доступности контакта ('Y'/'N', '1'/'0', да/нет) в bool"""
+    if isinstance(value, str):
+        return value.strip().upper() in ('Y', '1', 'TRUE')
+    return bool(value) if value is not None else True
+
+
+def contact_to_user(contact: Dict) -> Optional[Dict]:
+    """
+    Строка users из контакта Bitrix24 или None, если контакт не пользователь
+    бота (нет допустимого уровня доступа или ФИО)
+    """
+    access_level = (contact.get(ACCESS_LEVEL_FIELD) or '').strip()
+    name = contact_full_name(contact)
+    if access_level not in ACCESS_LEVELS or not name:
+        return None
+    telegram_id = contact.get(TELEGRAM_ID_FIELD)
+    return {
+        'bitrix_id': str(contact['ID']),
+        'id': str(telegram_id).strip() if telegram_id not in (None, '') else None,
+        'name': name,
+        'access_level': access_level,
+        'available': parse_available(contact.get(AVAILABLE_FIELD)),
+    }
+
+
+def pass_watermark(overlap: float = BITRIX_SYNC_OVERLAP) -> str:
+    """
+    Отметка для прохода, начинающегося сейчас: текущее время минус overlap
+    секунд (ISO 8601 с часовым поясом)
+
+    Страницы читаются по ID, поэтому контакт, изменённый во время прохода на
+    уже прочитанной странице, попадёт только в следующий проход — отметкой
+    служит начало прохода, а не самый новый DATE_MODIFY. Запас overlap
+    покрывает расхождение часов бота и портала.
+    """
+    moment = datetime.now(timezone.utc) - timedelta(seconds=overlap)
+    return moment.isoformat(timespec='seconds')
+
+
+class BitrixSyncService:
+    """
+    Зеркало контактов Bitrix24 в таблице users
+
+    Bitrix24 остаётся источником данных, а бот читает пользователей из локальной
+    базы. Инкрементальная синхронизация забирает контакты, изменённые после
+    сохранённой отметки DATE_MODIFY; полная перечитывает все контакты и отключает
+    пользователей, чьих контактов больше нет (пользователь не удаляется: его
+    проверки и бригада остаются).
+    """
+    # Общая база данных, внедряется контейнером приложения (app/container.py)
+    db: BaseDatabase = None
+
+    # Синхронизации не выполняются одновременно
+    _lock = asyncio.Lock()
+
+    @classmethod
+    async def get_watermark(cls) -> Optional[str]:
+        """Начало последнего успешного прохода (с запасом), с которого читается следующий"""
+        rows = await BitrixSyncService.db.query("SELECT value FROM sync_state WHERE name = ?", (WATERMARK,))
+        return rows[0]['value'] if rows else None
+
+    @classmethod
+    async def _set_watermark(cls, value: Optional[str]):
+        await BitrixSyncService.db.execute(
+            "INSERT INTO sync_state (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+            (WATERMARK, value)
+        )
+
+    @classmethod
+    async def sync(cls, full: bool = False) -> Dict:
+        """
+        Перенести контакты Bitrix24 в users
+
+        Args:
+            full: перечитать все контакты и отключить пользователей, чьих контактов больше нет
+
+        Returns:
+            Статистика: fetched, upserted, deactivated, watermark, seconds
+        """
+        async with BitrixSyncService._lock:
+            started = time.perf_counter()
+            watermark = None if full else await BitrixSyncService.get_watermark()
+            contact_filter = {'>=DATE_MODIFY': watermark} if watermark else {}
+            next_watermark = pass_watermark()
+
+            stats = {'full': full, 'fetched': 0, 'upserted': 0, 'deactivated': 0}
+            seen: Set[str] = set()
+            after_id = 0
+            while True:
+                contacts = await BitrixService.list_contacts_page(contact_filter, CONTACT_FIELDS, after_id)
+                if not contacts:
+                    break
+                stats['fetched'] += len(contacts)
+                users, dropped = BitrixSyncService._split_page(contacts)
+                stats['upserted'] += await UserService.mirror_bitrix_users(users)
+                # Контакт больше не пользователь бота (сняли уровень доступа)
+                stats['deactivated'] += await UserService.deactivate_users_by_bitrix_ids(dropped)
+                seen.update(user['bitrix_id'] for user in users)
+                after_id = max(int(contact['ID']) for contact in contacts)
+                if len(contacts) < BitrixService.PAGE_SIZE:
+                    break
+
+            if full:
+                stats['deactivated'] += await BitrixSyncService._deactivate_missing(seen)
+            # Отметка сохраняется только после успешного прохода: упавшая синхронизация повторится
+            await BitrixSyncService._set_watermark(next_watermark)
+
+            stats['watermark'] = next_watermark
+            stats['seconds'] = round(time.perf_counter() - started, 3)
+            logger.info("Синхронизация контактов Bitrix24: %s", stats)
+            return stats
+
+    @classmethod
+    async def reconcile_deletions(cls) -> int:
+        """
+        Отключить пользователей, чьи контакты удалены в Bitrix24
+        (читаются только ID контактов). Возвращает число отключённых
+        """
+        async with BitrixSyncService._lock:
+            remote: Set[str] = set()
+            after_id = 0
+            while True:
+                contacts = await BitrixService.list_contacts_page({}, ['ID'], after_id)
+                if not contacts:
+                    break
+                remote.update(str(contact['ID']) for contact in contacts)
+                after_id = max(int(contact['ID']) for contact in contacts)
+                if len(contacts) < BitrixService.PAGE_SIZE:
+                    break
+            return await BitrixSyncService._deactivate_missing(remote)
+
+    @classmethod
+    async def run_periodic(cls, interval: float = BITRIX_SYNC_INTERVAL,
+                           full_interval: float = BITRIX_FULL_RESYNC_INTERVAL):
+        """Синхронизировать в фоне: инкрементально каждые interval секунд, полностью — каждые full_interval"""
+        last_full = None
+        while True:
+            full = last_full is None or time.monotonic() - last_full >= full_interval
+            try:
+                await BitrixSyncService.sync(full=full)
+                if full:
+                    last_full = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка синхронизации контактов Bitrix24")
+            await asyncio.sleep(interval)
+
+    @classmethod
+    def _split_page(cls, contacts: List[Dict]):
+        """Разделить контакты на строки users и ID контактов, не являющихся пользователями"""
+        users = []
+        dropped = []
+        for contact in contacts:
+            user = contact_to_user(contact)
+            if user is None:
+                dropped.append(str(contact['ID']))
+            else:
+                users.append(user)
+        return users, dropped
+
+    @classmethod
+    async def _deactivate_missing(cls, remote_ids: Set[str]) -> int:
+        """Отключить пользователей, связанных с контактами не из remote_ids"""
+        missing = await UserService.get_bitrix_ids() - remote_ids
+        return await UserService.deactivate_users_by_bitrix_ids(sorted(missing))
@@ -1,46 +1,63 @@
-from app.db import Database
-from app.models.form import Form
+from app.db import BaseDatabase
 from app.models.check import Check
-from typing import List
+from app.models.rows import CheckRow
+from typing import List, Optional
 
 class CheckService:
-    db = Database()
+    # Общая база данных, внедряется контейнером приложения (app/container.py)
+    db: BaseDatabase = None
     
     @classmethod
-    async def initialize(cls):
-        await CheckService.db.initialize()
-    
-    @classmethod
-    async def create_check(cls, form_id: str, grades: List[int], errors_ids: List[int], reviewer_id: str, addition: str = None) -> dict:
+    async def create_check(cls, form_id: str, grades: List[int], errors_ids: List[int], reviewer_id: str,
+                           addition: str = None, errors_tasks: List[int] = None) -> int:
+        """
+        Создать проверку вместе со связями проверка-ошибка
+        
+        Args:
+            errors_tasks: ID задач, к которым относятся ошибки (в том же порядке, что errors_ids)
+        """
         _grades = Check.get_grades_string(grades)
         _errors_ids = Check.get_errors_string(errors_ids)
-        return await CheckService.db.add('checks', form_id=form_id, grades=_grades, errors_ids=_errors_ids, reviewer_id = reviewer_id, addition=addition)
+        if errors_tasks is None or len(errors_tasks) != len(errors_ids):
+            errors_tasks = [None] * len(errors_ids)
+        
+        async def op(conn):
+            cursor = await conn.execute(
+                "INSERT INTO checks (form_id, grades, errors_ids, reviewer_id, addition) VALUES (?, ?, ?, ?, ?)",
+                (form_id, _grades, _errors_ids, reviewer_id, addition)
+            )
+            check_id = cursor.lastrowid
+            await conn.executemany(
+                "INSERT INTO check_errors (check_id, error_id, task_id) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+                [(check_id, error_id, task_id) for error_id, task_id in zip(errors_ids, errors_tasks)]
+            )
+            return check_id
+        
+        return await CheckService.db.transaction(op)
     
     @classmethod
-    async def get_all_checks(cls) -> List[Check]:
-        data = await CheckService.db.get_all('checks')
-        checks = []
-        for check_data in data:
-            check = Check.from_dict(check_data)
-            checks.append(check)
-            # print(check.grades)
-    
-        return checks
+    async def get_all_checks(cls) -> List[CheckRow]:
+        return await CheckService.db.select(CheckRow)
     
     @classmethod
-    async def get_check_by_id(cls, check_id: int) -> Form:
-        check_dict = await CheckService.db.get_by_id('checks', check_id)
-        return Check.from_dict(check_dict) 
+    async def get_check_by_id(cls, check_id: int) -> Optional[CheckRow]:
+        return await CheckService.db.get_row_by_id(CheckRow, check_id)
     
     @classmethod
     async def delete_check(cls, check_id: int) -> bool:
-        return await CheckService.db.delete('checks', check_id)
+        async def op(conn):
+            await conn.execute("DELETE FROM check_errors WHERE check_id = ?", (check_id,))
+            cursor = await conn.execute("DELETE FROM checks WHERE id = ?", (check_id,))
+            return cursor.rowcount > 0
+        
+        return await CheckService.db.transaction(op)
     
     @classmethod
-    async def get_checks_by_form(cls, form_id: int) -> List[dict]:
+    async def get_checks_by_form(cls, form_id: int) -> List[CheckRow]:
         """Получить все проверки для конкретной формы (бригады)"""
-        data = await CheckService.db.query(
-            "SELECT * FROM checks WHERE form_id = ? ORDER BY checked_at DESC",
+        data = await CheckService.db.select(
+            CheckRow,
+            "WHERE form_id = ? ORDER BY checked_at DESC",
             (form_id,)
         )
         return data
@@ -52,9 +69,10 @@ class CheckService:
         Возвращает список ошибок с дополнительной информацией о проверке
         """
         query = """
-            SELECT e.*, c.checked_at, c.reviewer_id, c.form_id
-            FROM errors e
-            JOIN checks c ON (',' || c.errors_ids || ',') LIKE ('%,' || e.id || ',%')
+            SELECT e.*, c.checked_at, c.reviewer_id, c.form_id, ce.task_id
+            FROM checks c
+            JOIN check_errors ce ON ce.check_id = c.id
+            JOIN errors e ON e.id = ce.error_id
             WHERE c.form_id = ?
             ORDER BY c.checked_at DESC
         """
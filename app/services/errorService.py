@@ -1,12 +1,10 @@
-from app.db import Database
-from app.models.error import Error
+from typing import List, Optional
+from app.db import BaseDatabase
+from app.models.rows import ErrorRow
 
 class ErrorService:
-    db = Database()
-    
-    @classmethod
-    async def initialize(cls):
-        await ErrorService.db.initialize()
+    # Общая база данных, внедряется контейнером приложения (app/container.py)
+    db: BaseDatabase = None
     
     @classmethod
     async def create_error(cls, comment: str, photo_url: str = None) -> int:
@@ -14,20 +12,16 @@ class ErrorService:
         return await ErrorService.db.add('errors', comment=comment, photo_url=photo_url)
     
     @classmethod
-    async def get_all_errors(cls):
-        data = await ErrorService.db.get_all('errors')
-        errors = []
-        for error_data in data:
-            error = Error.from_dict(error_data)
-            errors.append(error)
+    async def get_all_errors(cls) -> List[ErrorRow]:
+        return await ErrorService.db.select(ErrorRow)
     
-        return errors
-
+    @classmethod
+    async def get_error_by_id(cls, error_id: int) -> Optional[ErrorRow]:
+        return await ErrorService.db.get_row_by_id(ErrorRow, error_id)
     
     @classmethod
-    async def get_error_by_id(cls, error_id: int) -> Error:
-        error_dict = await ErrorService.db.get_by_id('errors', error_id)
-        return Error.from_dict(error_dict) 
+    async def get_errors_by_ids(cls, error_ids: List[int]) -> List[ErrorRow]:
+        return await ErrorService.db.get_rows_by_ids(ErrorRow, error_ids)
     
     @classmethod
     async def update_error(cls, error_id: int, comment: str, photo_url: str) -> bool:
@@ -35,4 +29,9 @@ class ErrorService:
     
     @classmethod
     async def delete_task(cls, error_id: str) -> bool:
-        return await ErrorService.db.delete('errors', error_id)
\ No newline at end of file
+        async def op(conn):
+            await conn.execute("DELETE FROM check_errors WHERE error_id = ?", (error_id,))
+            cursor = await conn.execute("DELETE FROM errors WHERE id = ?", (error_id,))
+            return cursor.rowcount > 0
+        
+        return await ErrorService.db.transaction(op)
\ No newline at end of file
@@ -1,57 +1,181 @@
-from app.db import Database
-from app.models.form import Form
-from typing import List, Optional
+from app.db import BaseDatabase
+from app.models.rows import FormRow
+from app.utils.cache import MISSING, TTLCache
+from config import FORM_CACHE_SIZE, FORM_CACHE_TTL
+from typing import Dict, List, Optional
 
 class FormService:
-    db = Database()
+    # Общая база данных, внедряется контейнером приложения (app/container.py)
+    db: BaseDatabase = None
     
-    @classmethod
-    async def initialize(cls):
-        await FormService.db.initialize()
+    # Кэш форм: ID -> форма и название бригады -> форма (None — формы нет).
+    # Сбрасывается методами записи FormService
+    _by_id = TTLCache(FORM_CACHE_SIZE, FORM_CACHE_TTL)
+    _by_part_name = TTLCache(FORM_CACHE_SIZE, FORM_CACHE_TTL)
+    
+    # Состав формы хранится только в form_tasks (миграция 5). Старое CSV-поле forms.tasks
+    # не читается и не ведётся: новые формы получают в нём пустую строку (столбец NOT NULL)
     
     @classmethod
     async def create_form(cls, part_name: str, tasks: List[int] = None) -> int:
         """Создать новую форму"""
         if tasks is None:
             tasks = []
-        _tasks = Form.get_tasks_string(tasks)
-        return await FormService.db.add("forms", part_name=part_name, tasks=_tasks)
+        
+        async def op(conn):
+            cursor = await conn.execute(
+                "INSERT INTO forms (part_name, tasks) VALUES (?, ?)",
+                (part_name, '')
+            )
+            form_id = cursor.lastrowid
+            await FormService._insert_form_tasks(conn, form_id, tasks)
+            return form_id
+        
+        form_id = await FormService.db.transaction(op)
+        FormService._invalidate(form_id, part_name)
+        return form_id
     
     @classmethod
-    async def get_all_forms(cls) -> List[dict]:
+    async def get_all_forms(cls) -> List[FormRow]:
         """Получить все формы"""
-        data = await FormService.db.get_all("forms")
+        data = await FormService.db.select(FormRow)
         return data
     
     @classmethod
-    async def get_form_by_id(cls, form_id: int) -> Optional[dict]:
-        """Получить форму по ID"""
-        return await FormService.db.get_by_id("forms", form_id)
+    async def get_form_by_id(cls, form_id: int) -> Optional[FormRow]:
+        """Получить форму по ID (через кэш)"""
+        key = str(form_id)
+        form = FormService._by_id.get(key)
+        if form is MISSING:
+            form = await FormService.db.get_row_by_id(FormRow, form_id)
+            FormService._by_id.set(key, form)
+        return form
     
     @classmethod
-    async def get_form_by_part_name(cls, part_name: str) -> Optional[dict]:
-        """Получить форму по названию бригады"""
-        forms = await FormService.db.query(
-            "SELECT * FROM forms WHERE part_name = ?",
-            (part_name,)
-        )
-        return forms[0] if forms else None
+    async def get_forms_by_ids(cls, form_ids: List[int]) -> List[FormRow]:
+        """Получить формы по списку ID (в порядке списка)"""
+        return await FormService.db.get_rows_by_ids(FormRow, form_ids)
+    
+    @classmethod
+    async def get_form_by_part_name(cls, part_name: str) -> Optional[FormRow]:
+        """Получить форму по названию бригады (через кэш)"""
+        form = FormService._by_part_name.get(part_name)
+        if form is MISSING:
+            form = await FormService.db.select_one(FormRow, "WHERE part_name = ?", (part_name,))
+            FormService._by_part_name.set(part_name, form)
+            if form is not None:
+                FormService._by_id.set(str(form.id), form)
+        return form
     
     @classmethod
     async def update_form_name(cls, form_id: int, part_name: str) -> bool:
         """Обновить название формы"""
-        return await FormService.db.update("forms", form_id, part_name=part_name)
+        success = await FormService.db.update("forms", form_id, part_name=part_name)
+        FormService._invalidate(form_id, part_name)
+        return success
     
     @classmethod
     async def update_form_tasks(cls, form_id: int, tasks: List[int]) -> bool:
         """Обновить список задач формы"""
-        _tasks = Form.get_tasks_string(tasks)
-        return await FormService.db.update("forms", form_id, tasks=_tasks)
+        async def op(conn):
+            cursor = await conn.execute("SELECT 1 FROM forms WHERE id = ?", (form_id,))
+            if not await cursor.fetchone():
+                return False
+            await conn.execute("DELETE FROM form_tasks WHERE form_id = ?", (form_id,))
+            await FormService._insert_form_tasks(conn, form_id, tasks)
+            return True
+        
+        return await FormService.db.transaction(op)
     
     @classmethod
     async def delete_form(cls, form_id: int) -> bool:
-        """Удалить форму"""
-        return await FormService.db.delete("forms", form_id)
+        """Удалить форму вместе с её планами проверок. Форму с проведёнными проверками не удаляет"""
+        async def op(conn):
+            cursor = await conn.execute("SELECT 1 FROM checks WHERE form_id = ? LIMIT 1", (form_id,))
+            if await cursor.fetchone():
+                return False
+            await conn.execute("DELETE FROM planned_checks WHERE form_id = ?", (form_id,))
+            await conn.execute("DELETE FROM form_tasks WHERE form_id = ?", (form_id,))
+            cursor = await conn.execute("DELETE FROM forms WHERE id = ?", (form_id,))
+            return cursor.rowcount > 0
+        
+        success = await FormService.db.transaction(op)
+        FormService._invalidate(form_id)
+        return success
+    
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, Dict]:
+        """Счётчики кэшей форм по ID и по названию бригады"""
+        return {'by_id': FormService._by_id.stats(), 'by_part_name': FormService._by_part_name.stats()}
+    
+    @classmethod
+    def _invalidate(cls, form_id: int, part_name: Optional[str] = None):
+        """Сбросить закэшированную форму (и отсутствие формы с новым названием part_name)"""
+        FormService._by_id.invalidate(str(form_id))
+        FormService._by_part_name.invalidate_where(lambda form: form is not None and str(form.id) == str(form_id))
+        if part_name is not None:
+            FormService._by_part_name.invalidate(part_name)
+    
+    @classmethod
+    async def get_form_task_ids(cls, form_id: int) -> List[int]:
+        """Получить ID задач формы в порядке их следования"""
+        rows = await FormService.db.query(
+            "SELECT task_id FROM form_tasks WHERE form_id = ? ORDER BY position",
+            (form_id,)
+        )
+        return [row['task_id'] for row in rows]
+    
+    @classmethod
+    async def get_form_with_tasks(cls, form_id: int) -> Optional[dict]:
+        """
+        Получить форму вместе с задачами одним запросом
+        
+        Returns:
+            Словарь формы с дополнительными ключами task_ids (ID задач по порядку)
+            и task_rows (записи задач {'id', 'info'}) или None, если формы нет
+        """
+        return await FormService._get_form_with_tasks("f.id = ?", (form_id,))
+    
+    @classmethod
+    async def get_form_with_tasks_by_part_name(cls, part_name: str) -> Optional[dict]:
+        """Получить форму бригады вместе с задачами одним запросом"""
+        return await FormService._get_form_with_tasks("f.part_name = ?", (part_name,))
+    
+    @classmethod
+    async def _get_form_with_tasks(cls, where: str, params: tuple) -> Optional[dict]:
+        rows = await FormService.db.query(
+            f"""
+            SELECT f.id, f.part_name, t.id AS task_id, t.info AS task_info
+            FROM forms f
+            LEFT JOIN form_tasks ft ON ft.form_id = f.id
+            LEFT JOIN tasks t ON t.id = ft.task_id
+            WHERE {where}
+            ORDER BY ft.position
+            """,
+            params
+        )
+        if not rows:
+            return None
+        
+        first = rows[0]
+        # Задачи, удалённые из справочника, в форму не попадают
+        task_rows = [
+            {'id': row['task_id'], 'info': row['task_info']}
+            for row in rows if row['task_id'] is not None
+        ]
+        return {
+            'id': first['id'],
+            'part_name': first['part_name'],
+            'task_ids': [task['id'] for task in task_rows],
+            'task_rows': task_rows,
+        }
+    
+    @staticmethod
+    async def _insert_form_tasks(conn, form_id: int, tasks: List[int]):
+        await conn.executemany(
+            "INSERT INTO form_tasks (form_id, position, task_id) VALUES (?, ?, ?)",
+            [(form_id, position, task_id) for position, task_id in enumerate(tasks)]
+        )
     
     @classmethod
     def parse_tasks_string(cls, tasks_str: str) -> List[int]:
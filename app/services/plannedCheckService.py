@@ -1,15 +1,13 @@
 # app/services/plannedCheckService.py
-from app.db import Database
+from app.db import BaseDatabase
+from app.models.rows import PlannedCheckRow
 from typing import List, Optional
 from datetime import datetime
 
 
 class PlannedCheckService:
-    db = Database()
-    
-    @classmethod
-    async def initialize(cls):
-        await PlannedCheckService.db.initialize()
+    # Общая база данных, внедряется контейнером приложения (app/container.py)
+    db: BaseDatabase = None
     
     @classmethod
     async def create_planned_check(cls, time: str, form_id: int, reviewer_id: str) -> int:
@@ -32,28 +30,30 @@ class PlannedCheckService:
         )
     
     @classmethod
-    async def get_all_planned_checks(cls) -> List[dict]:
+    async def get_all_planned_checks(cls) -> List[PlannedCheckRow]:
         """Получить все запланированные проверки"""
-        return await PlannedCheckService.db.get_all("planned_checks")
+        return await PlannedCheckService.db.select(PlannedCheckRow)
     
     @classmethod
-    async def get_planned_check_by_id(cls, check_id: int) -> Optional[dict]:
+    async def get_planned_check_by_id(cls, check_id: int) -> Optional[PlannedCheckRow]:
         """Получить запланированную проверку по ID"""
-        return await PlannedCheckService.db.get_by_id("planned_checks", check_id)
+        return await PlannedCheckService.db.get_row_by_id(PlannedCheckRow, check_id)
     
     @classmethod
-    async def get_planned_checks_by_form(cls, form_id: int) -> List[dict]:
+    async def get_planned_checks_by_form(cls, form_id: int) -> List[PlannedCheckRow]:
         """Получить все запланированные проверки для конкретной формы"""
-        return await PlannedCheckService.db.query(
-            "SELECT * FROM planned_checks WHERE form_id = ? ORDER BY time DESC",
+        return await PlannedCheckService.db.select(
+            PlannedCheckRow,
+            "WHERE form_id = ? ORDER BY time DESC",
             (form_id,)
         )
     
     @classmethod
-    async def get_planned_checks_by_reviewer(cls, reviewer_id: str) -> List[dict]:
+    async def get_planned_checks_by_reviewer(cls, reviewer_id: str) -> List[PlannedCheckRow]:
         """Получить все запланированные проверки для конкретного проверяющего"""
-        return await PlannedCheckService.db.query(
-            "SELECT * FROM planned_checks WHERE reviewer_id = ? ORDER BY time ASC",
+        return await PlannedCheckService.db.select(
+            PlannedCheckRow,
+            "WHERE reviewer_id = ? ORDER BY time ASC",
             (reviewer_id,)
         )
     
@@ -73,7 +73,7 @@ class PlannedCheckService:
         return await PlannedCheckService.db.delete("planned_checks", check_id)
     
     @classmethod
-    async def get_upcoming_checks(cls, limit: int = 10) -> List[dict]:
+    async def get_upcoming_checks(cls, limit: int = 10) -> List[PlannedCheckRow]:
         """
         Получить ближайшие запланированные проверки
         
@@ -84,7 +84,8 @@ class PlannedCheckService:
             Список запланированных проверок
         """
         current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        return await PlannedCheckService.db.query(
-            "SELECT * FROM planned_checks WHERE time >= ? ORDER BY time ASC LIMIT ?",
+        return await PlannedCheckService.db.select(
+            PlannedCheckRow,
+            "WHERE time >= ? ORDER BY time ASC LIMIT ?",
             (current_time, limit)
         )
@@ -1,28 +1,188 @@
-from app.db import Database
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from app.db import BaseDatabase
+from app.models.rows import TaskRow
+from config import TASK_CATALOG_TTL
+
+
+class TaskSnapshot:
+    """Неизменяемый снимок каталога задач одной версии"""
+    __slots__ = ('version', 'tasks', '_search_keys')
+    
+    def __init__(self, version: int, tasks: Tuple[TaskRow, ...]):
+        self.version = version
+        # Задачи по возрастанию ID (как SELECT без ORDER BY по rowid)
+        self.tasks = tasks
+        self._search_keys: Optional[Tuple[str, ...]] = None
+    
+    def search(self, query: str) -> List[TaskRow]:
+        """Задачи, в тексте которых встречается query (без учёта регистра)"""
+        if self._search_keys is None:
+            self._search_keys = tuple(task.info.lower() for task in self.tasks)
+        query = query.lower()
+        return [task for task, key in zip(self.tasks, self._search_keys) if query in key]
+
+
+class TaskCatalog:
+    """
+    Каталог задач в памяти: словарь id -> строка и версия, растущая при каждом изменении
+    
+    Загружается из базы и перечитывается раз в ttl секунд (задачи может менять
+    другой экземпляр бота), между загрузками create/update/delete обновляют его
+    на месте. Читатели получают снимок (TaskSnapshot), который не меняется после
+    выдачи; снимок строится один раз на версию.
+    """
+    
+    def __init__(self, ttl: float = TASK_CATALOG_TTL, clock: Callable[[], float] = time.monotonic):
+        self.db: Optional[BaseDatabase] = None
+        self.ttl = ttl
+        self.version = 0
+        self._clock = clock
+        self._loaded_at = 0.0
+        self._by_id: Dict[int, TaskRow] = {}
+        self._snapshot: Optional[TaskSnapshot] = None
+        self._lock = asyncio.Lock()
+        # Изменения, записанные в базу во время загрузки: применяются к загруженному каталогу
+        self._pending: Optional[List[Tuple[BaseDatabase, Callable[[], None]]]] = None
+    
+    def _fresh(self, db: BaseDatabase) -> bool:
+        return self.db is db and self._clock() < self._loaded_at + self.ttl
+    
+    async def ensure_loaded(self, db: BaseDatabase):
+        """Загрузить каталог, если он не загружен из этой базы или устарел"""
+        if self._fresh(db):
+            return
+        async with self._lock:
+            if not self._fresh(db):
+                await self._load(db)
+    
+    async def reload(self, db: BaseDatabase):
+        """Перечитать все задачи из базы"""
+        async with self._lock:
+            await self._load(db)
+    
+    async def _load(self, db: BaseDatabase):
+        started = self._clock()
+        self._pending = []
+        try:
+            tasks = await db.select(TaskRow)
+        finally:
+            pending, self._pending = self._pending, None
+        self._by_id = {task.id: task for task in tasks}
+        self.db = db
+        self._loaded_at = started
+        # Изменение могло попасть в базу после чтения: повторяем его (put и remove идемпотентны)
+        for change_db, change in pending:
+            if change_db is db:
+                change()
+        self._bump()
+    
+    def apply(self, db: BaseDatabase, change: Callable[[], None]):
+        """Применить изменение к каталогу, загруженному из db (и к загружаемому сейчас)"""
+        if self._pending is not None:
+            self._pending.append((db, change))
+        if self.db is db:
+            change()
+    
+    def get(self, task_id) -> Optional[TaskRow]:
+        try:
+            return self._by_id.get(int(task_id))
+        except (TypeError, ValueError):
+            return None
+    
+    def snapshot(self) -> TaskSnapshot:
+        if self._snapshot is None or self._snapshot.version != self.version:
+            self._snapshot = TaskSnapshot(self.version, tuple(sorted(self._by_id.values(), key=lambda t: t.id)))
+        return self._snapshot
+    
+    def put(self, task: TaskRow):
+        self._by_id[task.id] = task
+        self._bump()
+    
+    def remove(self, task_id: int):
+        if self._by_id.pop(int(task_id), None) is not None:
+            self._bump()
+    
+    def _bump(self):
+        self.version += 1
+
 
 class TaskService:
-    db = Database()
+    # Общая база данных, внедряется контейнером приложения (app/container.py)
+    db: BaseDatabase = None
     
-    @classmethod
-    async def initialize(cls):
-        await TaskService.db.initialize()
+    # Каталог задач в памяти (чтение задач не обращается к базе)
+    _catalog = TaskCatalog()
     
     @classmethod
     async def create_task(cls, info: str) -> dict:
-        return await TaskService.db.add('tasks', info=info)
+        task_id = await TaskService.db.add('tasks', info=info)
+        TaskService._catalog.apply(TaskService.db, lambda: TaskService._catalog.put(TaskRow(task_id, info)))
+        return task_id
+    
+    @classmethod
+    async def create_tasks(cls, infos: List[str]) -> List[TaskRow]:
+        """
+        Создать задачи одной транзакцией. Уже существующие задачи (по тексту)
+        не дублируются. Возвращает задачи в порядке infos
+        """
+        rows = [{'info': info} for info in infos]
+        await TaskService.db.upsert_many('tasks', rows, conflict=('info',), update=())
+        tasks = await TaskService.db.get_rows_by_ids(TaskRow, infos, key='info')
+        for task in tasks:
+            TaskService._catalog.apply(TaskService.db, lambda task=task: TaskService._catalog.put(task))
+        return tasks
+    
+    @classmethod
+    async def get_all_tasks(cls) -> List[TaskRow]:
+        return list((await TaskService.get_catalog()).tasks)
     
     @classmethod
-    async def get_all_tasks(cls):
-        return await TaskService.db.get_all('tasks')
+    async def get_catalog(cls) -> TaskSnapshot:
+        """Снимок каталога задач (неизменяемый, с номером версии)"""
+        await TaskService._catalog.ensure_loaded(TaskService.db)
+        return TaskService._catalog.snapshot()
     
     @classmethod
-    async def get_task_by_id(cls, task_id: int):
-        return await TaskService.db.get_by_id('tasks', task_id)
+    async def reload_catalog(cls):
+        """Перечитать каталог из базы (если задачи меняли в обход TaskService)"""
+        await TaskService._catalog.reload(TaskService.db)
+    
+    @classmethod
+    async def search_tasks(cls, query: str) -> List[TaskRow]:
+        """Поиск задач по части текста (без учёта регистра)"""
+        return (await TaskService.get_catalog()).search(query)
+    
+    @classmethod
+    async def get_task_by_id(cls, task_id: int) -> Optional[TaskRow]:
+        await TaskService._catalog.ensure_loaded(TaskService.db)
+        return TaskService._catalog.get(task_id)
+    
+    @classmethod
+    async def get_tasks_by_ids(cls, task_ids: List[int]) -> List[TaskRow]:
+        """Получить задачи по списку ID (в порядке списка)"""
+        await TaskService._catalog.ensure_loaded(TaskService.db)
+        tasks = (TaskService._catalog.get(task_id) for task_id in task_ids)
+        return [task for task in tasks if task is not None]
     
     @classmethod
     async def update_task(cls, task_id: int, info: str) -> bool:
-        return await TaskService.db.update('tasks', task_id, info=info)
+        success = await TaskService.db.update('tasks', task_id, info=info)
+        if success:
+            TaskService._catalog.apply(TaskService.db, lambda: TaskService._catalog.put(TaskRow(int(task_id), info)))
+        return success
     
     @classmethod
     async def delete_task(cls, task_id: int) -> bool:
-        return await TaskService.db.delete('tasks', task_id)
\ No newline at end of file
+        async def op(conn):
+            await conn.execute("DELETE FROM form_tasks WHERE task_id = ?", (task_id,))
+            # Ошибки проверок остаются, ссылка на задачу снимается
+            await conn.execute("UPDATE check_errors SET task_id = NULL WHERE task_id = ?", (task_id,))
+            cursor = await conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            return cursor.rowcount > 0
+    
+        success = await TaskService.db.transaction(op)
+        if success:
+            TaskService._catalog.apply(TaskService.db, lambda: TaskService._catalog.remove(task_id))
+        return success
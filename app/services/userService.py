@@ -1,9 +1,20 @@
 # service.py (со статическими методами)
-from typing import List, Dict, Optional
-from app.db import Database
+from typing import List, Dict, Optional, Set
+from app.db import BaseDatabase
+from app.models.rows import UserRow
+from app.utils.cache import MISSING, TTLCache
+from config import USER_CACHE_SIZE, USER_CACHE_TTL
 
 class UserService:
-    db = Database()
+    # Общая база данных, внедряется контейнером приложения (app/container.py)
+    db: BaseDatabase = None
+    
+    # Кэш пользователей по Telegram ID (None — пользователь не зарегистрирован).
+    # Методы записи сбрасывают только затронутые записи
+    _cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+    
+    # Таблицы, ссылающиеся на пользователя по Telegram ID (reviewer_id)
+    REVIEWER_TABLES = ('checks', 'planned_checks')
     
     # Константы уровней доступа
     ACCESS_LEVEL_ADMIN = 'admin'
@@ -26,10 +37,6 @@ class UserService:
         """Получить русское название уровня доступа"""
         return UserService.ACCESS_LEVEL_NAMES.get(access_level, access_level)
     
-    @classmethod
-    async def initialize(cls):
-        await UserService.db.initialize()
-    
     @classmethod
     async def create_user(cls, name: str, access_level: str = ACCESS_LEVEL_WORKER, available: bool = True) -> int:
         """Создать нового пользователя
@@ -39,6 +46,150 @@ class UserService:
             access_level: уровень доступа ('admin', 'manager', 'office_worker', 'leader', 'worker')
             available: доступность пользователя
         """
+        UserService._validate_access_level(access_level)
+        return await UserService.db.add('users', name=name, access_level=access_level, available=available)
+    
+    @classmethod
+    async def create_users(cls, users_data: List[Dict]) -> int:
+        """Создать несколько пользователей одной транзакцией
+        
+        Args:
+            users_data: словари с ключами name, access_level и необязательным available
+        """
+        rows = UserService._user_rows(users_data)
+        return await UserService.db.add_many('users', rows)
+    
+    @classmethod
+    async def add_users(cls, users_data: List[Dict]) -> List[str]:
+        """Добавить пользователей одной транзакцией, пропуская уже существующие (по ФИО)
+        
+        Существующие пользователи не меняются. Возвращает ФИО добавленных
+        
+        Args:
+            users_data: словари с ключами name, access_level и необязательным available
+        """
+        rows = UserService._user_rows(users_data)
+        
+        async def op(conn):
+            added = []
+            for row in rows:
+                cursor = await conn.execute(
+                    "INSERT INTO users (name, access_level, available) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name) DO NOTHING",
+                    (row['name'], row['access_level'], row['available'])
+                )
+                if cursor.rowcount > 0:
+                    added.append(row['name'])
+            return added
+        
+        return await UserService.db.transaction(op)
+    
+    @classmethod
+    async def mirror_bitrix_users(cls, users_data: List[Dict]) -> int:
+        """
+        Записать пользователей из контактов Bitrix24 одной транзакцией
+        (зеркало контактов, см. app/services/bitrix_sync.py)
+        
+        Пользователь контакта ищется по bitrix_id (контакт могли переименовать),
+        затем по ФИО. Telegram ID, которого нет в Bitrix, не затирается: регистрация
+        проходит в боте. Telegram ID из контакта, уже занятый другим пользователем,
+        переходит к пользователю контакта. Бригада (part_name) ведётся в боте и не меняется.
+        Проверки пользователя, у которого сменился Telegram ID, переходят к новому ID.
+        
+        Args:
+            users_data: словари с ключами bitrix_id, id (Telegram ID или None),
+                name, access_level, available
+        """
+        if not users_data:
+            return 0
+        for user_data in users_data:
+            UserService._validate_access_level(user_data['access_level'])
+        # Один Telegram ID у нескольких контактов пачки: он остаётся у последнего
+        owners = {str(u['id']): u['name'] for u in users_data if u['id']}
+        users_data = [
+            dict(u, id=None) if u['id'] and owners[str(u['id'])] != u['name'] else u
+            for u in users_data
+        ]
+        
+        async def op(conn):
+            # Переименованный в Bitrix контакт: переносим ФИО, если оно свободно
+            await conn.executemany(
+                "UPDATE users SET name = ? WHERE bitrix_id = ? AND name != ? "
+                "AND NOT EXISTS (SELECT 1 FROM users other WHERE other.name = ?)",
+                [(u['name'], u['bitrix_id'], u['name'], u['name']) for u in users_data]
+            )
+            # ФИО занято другим пользователем: связь с контактом переходит к нему
+            await conn.executemany(
+                "UPDATE users SET bitrix_id = NULL WHERE bitrix_id = ? AND name != ?",
+                [(u['bitrix_id'], u['name']) for u in users_data]
+            )
+            await UserService._move_reviews(conn, [(u['id'], u['name']) for u in users_data if u['id']])
+            # Telegram ID контакта занят другим пользователем: снимаем его там,
+            # иначе PostgreSQL (users.id UNIQUE) отклонит всю пачку.
+            # Проверки остаются на этом ID и переходят к пользователю контакта
+            await conn.executemany(
+                "UPDATE users SET id = NULL WHERE id = ? AND name != ?",
+                [(u['id'], u['name']) for u in users_data if u['id']]
+            )
+            cursor = await conn.executemany(
+                "INSERT INTO users (name, id, access_level, available, bitrix_id) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET id = COALESCE(excluded.id, users.id), "
+                "access_level = excluded.access_level, available = excluded.available, "
+                "bitrix_id = excluded.bitrix_id",
+                [(u['name'], u['id'], u['access_level'], u['available'], u['bitrix_id']) for u in users_data]
+            )
+            return cursor.rowcount
+        
+        result = await UserService.db.transaction(op)
+        UserService._invalidate_names([u['name'] for u in users_data])
+        for user_data in users_data:
+            if user_data['id']:
+                UserService._cache.invalidate(str(user_data['id']))
+        return result
+    
+    @classmethod
+    async def get_bitrix_ids(cls) -> Set[str]:
+        """ID контактов Bitrix24, связанных с пользователями"""
+        rows = await UserService.db.query("SELECT bitrix_id FROM users WHERE bitrix_id IS NOT NULL")
+        return {str(row['bitrix_id']) for row in rows}
+    
+    @classmethod
+    async def deactivate_users_by_bitrix_ids(cls, bitrix_ids: List[str]) -> int:
+        """
+        Отключить пользователей, связанных с контактами Bitrix24: пользователь
+        становится недоступным и теряет связь с контактом, но не удаляется —
+        его проверки и бригада (part_name) сохраняются. Возвращает число отключённых
+        """
+        if not bitrix_ids:
+            return 0
+        
+        async def op(conn):
+            cursor = await conn.executemany(
+                "UPDATE users SET available = ?, bitrix_id = NULL WHERE bitrix_id = ?",
+                [(False, str(bitrix_id)) for bitrix_id in bitrix_ids]
+            )
+            return cursor.rowcount
+        
+        result = await UserService.db.transaction(op)
+        # Отключения редки, а по Telegram ID в кэше контакт не найти: сбрасываем кэш целиком
+        UserService._cache.clear()
+        return result
+    
+    @classmethod
+    def _user_rows(cls, users_data: List[Dict]) -> List[Dict]:
+        """Проверить уровни доступа и привести данные пользователей к строкам таблицы"""
+        rows = []
+        for user_data in users_data:
+            UserService._validate_access_level(user_data['access_level'])
+            rows.append({
+                'name': user_data['name'],
+                'access_level': user_data['access_level'],
+                'available': user_data.get('available', True),
+            })
+        return rows
+    
+    @classmethod
+    def _validate_access_level(cls, access_level: str):
         valid_levels = [
             UserService.ACCESS_LEVEL_ADMIN,
             UserService.ACCESS_LEVEL_MANAGER,
@@ -48,38 +199,55 @@ class UserService:
         ]
         if access_level not in valid_levels:
             raise ValueError(f"Неверный уровень доступа. Допустимые значения: {', '.join(valid_levels)}")
-        
-        return await UserService.db.add('users', name=name, access_level=access_level, available=available)
     
     @classmethod
     async def get_user_access_level(cls, user_id: str) -> Optional[str]:
         """Получить уровень доступа пользователя"""
-        body = await UserService.db.get_by_id("users", user_id)
-        if body is not None:
-            return body['access_level']
+        user = await UserService.get_user_by_id(user_id)
+        if user is not None:
+            return user.access_level
         return None
     
     @classmethod
     async def check_user_exist(cls, user_id: str) -> bool:
         """Проверить существование пользователя"""
-        user = await UserService.db.get_by_id("users", user_id)
+        user = await UserService.get_user_by_id(user_id)
         return user is not None
     
     @classmethod
-    async def get_user_by_name(cls, name: str) -> List[Dict]:
+    async def get_user_by_name(cls, name: str) -> List[UserRow]:
         """Найти пользователя по имени"""
-        data = await UserService.db.query(
-            "SELECT * FROM users WHERE name = ?", (name,)
-        )
+        data = await UserService.db.select(UserRow, "WHERE name = ?", (name,))
         return data
     
     @classmethod
-    async def get_user_by_id(cls, user_id: str) -> Optional[Dict]:
-        """Получить пользователя по ID"""
-        return await UserService.db.get_by_id("users", user_id)
+    async def get_user_by_id(cls, user_id: str) -> Optional[UserRow]:
+        """Получить пользователя по ID (через кэш)"""
+        key = str(user_id)
+        user = UserService._cache.get(key)
+        if user is MISSING:
+            user = await UserService.db.get_row_by_id(UserRow, user_id)
+            UserService._cache.set(key, user)
+        return user
+    
+    @classmethod
+    def get_cached_user_by_id(cls, user_id: str) -> Optional[UserRow]:
+        """Пользователь по ID из кэша, без обращения к базе (None, если его там нет)"""
+        user = UserService._cache.get(str(user_id))
+        return None if user is MISSING else user
+    
+    @classmethod
+    async def get_users_by_ids(cls, user_ids: List[str]) -> List[UserRow]:
+        """Получить пользователей по списку Telegram ID (в порядке списка)"""
+        return await UserService.db.get_rows_by_ids(UserRow, user_ids)
     
     @classmethod
-    async def add_sample_users(cls) -> List[Dict]:
+    async def get_users_by_names(cls, names: List[str]) -> List[UserRow]:
+        """Получить пользователей по списку ФИО (в порядке списка)"""
+        return await UserService.db.get_rows_by_ids(UserRow, names, key='name')
+    
+    @classmethod
+    async def add_sample_users(cls) -> List[UserRow]:
         """Добавить тестовых пользователей"""
         users_data = [
             {"name": "Даник", "access_level": UserService.ACCESS_LEVEL_MANAGER, "available": True},
@@ -87,26 +255,17 @@ class UserService:
             {"name": "Илья", "access_level": UserService.ACCESS_LEVEL_LEADER, "available": True},
         ]
         
-        users = []
-        for user_data in users_data:
-            user_id = await UserService.create_user(**user_data)
-            # Получаем созданного пользователя чтобы вернуть полные данные
-            user = await UserService.get_user_by_id(user_id)
-            if user:
-                users.append(user)
-        
-        return users
+        await UserService.create_users(users_data)
+        # Получаем созданных пользователей чтобы вернуть полные данные
+        return await UserService.get_users_by_names([user['name'] for user in users_data])
     
     @classmethod
-    async def search_users_by_name(cls, name_part: str) -> List[Dict]:
+    async def search_users_by_name(cls, name_part: str) -> List[UserRow]:
         """Поиск пользователей по части имени"""
-        return await UserService.db.query(
-            "SELECT * FROM users WHERE name LIKE ?", 
-            (f"%{name_part}%",)
-        )
+        return await UserService.db.select(UserRow, "WHERE name LIKE ?", (f"%{name_part}%",))
     
     @classmethod
-    async def get_available_reviewers(cls) -> List[Dict]:
+    async def get_available_reviewers(cls) -> List[UserRow]:
         """Получить доступных проверяющих (office_worker и выше)"""
         # Проверяющими могут быть office_worker, manager и admin
         allowed_levels = (
@@ -115,23 +274,31 @@ class UserService:
             UserService.ACCESS_LEVEL_OFFICE_WORKER
         )
         placeholders = ','.join(['?' for _ in allowed_levels])
-        return await UserService.db.query(
-            f"SELECT * FROM users WHERE available = 1 AND access_level IN ({placeholders}) ORDER BY id",
-            allowed_levels
+        return await UserService.db.select(
+            UserRow,
+            f"WHERE available = ? AND access_level IN ({placeholders}) ORDER BY id",
+            (True, *allowed_levels)
         )
     
     @classmethod
     async def update_user_id_by_name(cls, name: str, user_id: str) -> bool:
-        """Обновить user_id для пользователя по имени (PRIMARY KEY)"""
-        result = await UserService.db.execute(
-            "UPDATE users SET id = ? WHERE name = ?",
-            (user_id, name)
-        )
+        """Обновить user_id для пользователя по имени (PRIMARY KEY); проверки переходят к новому ID"""
+        async def op(conn):
+            await UserService._move_reviews(conn, [(user_id, name)])
+            cursor = await conn.execute("UPDATE users SET id = ? WHERE name = ?", (user_id, name))
+            return cursor.rowcount
+        
+        result = await UserService.db.transaction(op)
+        # Сбрасываем и старый ID пользователя, и закэшированное «не зарегистрирован» для нового
+        UserService._invalidate_names([name])
+        UserService._cache.invalidate(str(user_id))
         return result > 0
     
     @classmethod
     async def update_user_available_status(cls, user_id: str, available_status: bool) -> int:
-        return await UserService.db.update("users", user_id, available=available_status)
+        result = await UserService.db.update("users", user_id, available=available_status)
+        UserService._cache.invalidate(str(user_id))
+        return result
     
     @classmethod
     async def update_user_part_name(cls, user_id: str, part_name: str) -> int:
@@ -139,6 +306,7 @@ class UserService:
             "UPDATE users SET part_name = ? WHERE id = ?",
             (part_name, user_id)
         )
+        UserService._cache.invalidate(str(user_id))
         return result > 0
     
     @classmethod
@@ -148,37 +316,40 @@ class UserService:
             "UPDATE users SET part_name = ? WHERE name = ?",
             (part_name, name)
         )
+        UserService._invalidate_names([name])
         return result > 0
     
     @classmethod
-    async def get_workers_by_part_name(cls, part_name: str) -> List[Dict]:
+    async def get_workers_by_part_name(cls, part_name: str) -> List[UserRow]:
         """Получить всех работников (WORKER) конкретной бригады"""
-        return await UserService.db.query(
-            "SELECT * FROM users WHERE part_name = ? AND access_level = ? ORDER BY name",
+        return await UserService.db.select(
+            UserRow,
+            "WHERE part_name = ? AND access_level = ? ORDER BY name",
             (part_name, UserService.ACCESS_LEVEL_WORKER)
         )
     
     @classmethod
-    async def get_leaders(cls) -> List[Dict]:
+    async def get_leaders(cls) -> List[UserRow]:
         """Получить всех руководителей бригад"""
-        return await UserService.db.query(
-            "SELECT * FROM users WHERE access_level = ? ORDER BY name",
+        return await UserService.db.select(
+            UserRow,
+            "WHERE access_level = ? ORDER BY name",
             (UserService.ACCESS_LEVEL_LEADER,)
         )
     
     @classmethod
-    async def get_leader_by_part_name(cls, part_name: str) -> Optional[Dict]:
+    async def get_leader_by_part_name(cls, part_name: str) -> Optional[UserRow]:
         """Получить руководителя конкретной бригады"""
-        result = await UserService.db.query(
-            "SELECT * FROM users WHERE part_name = ? AND access_level = ? LIMIT 1",
+        return await UserService.db.select_one(
+            UserRow,
+            "WHERE part_name = ? AND access_level = ?",
             (part_name, UserService.ACCESS_LEVEL_LEADER)
         )
-        return result[0] if result else None
     
     @classmethod
-    async def get_all_users(cls) -> List[Dict]:
+    async def get_all_users(cls) -> List[UserRow]:
         """Получить всех пользователей"""
-        return await UserService.db.get_all("users")
+        return await UserService.db.select(UserRow)
     
     @classmethod
     async def update_user_access_level(cls, name: str, access_level: str) -> bool:
@@ -197,6 +368,7 @@ class UserService:
             "UPDATE users SET access_level = ? WHERE name = ?",
             (access_level, name)
         )
+        UserService._invalidate_names([name])
         return result > 0
     
     @classmethod
@@ -206,12 +378,62 @@ class UserService:
             "UPDATE users SET part_name = ? WHERE name = ? AND access_level = ?",
             (part_name, worker_name, UserService.ACCESS_LEVEL_WORKER)
         )
+        UserService._invalidate_names([worker_name])
+        return result > 0
+    
+    @classmethod
+    async def delete_user_by_name(cls, name: str) -> bool:
+        """
+        Удалить пользователя по имени (PRIMARY KEY) вместе с его планами проверок.
+        Пользователя с проведёнными проверками не удаляет (его можно сделать недоступным)
+        """
+        async def op(conn):
+            cursor = await conn.execute(
+                "SELECT 1 FROM checks WHERE reviewer_id = (SELECT id FROM users WHERE name = ?) LIMIT 1",
+                (name,)
+            )
+            if await cursor.fetchone():
+                return 0
+            await conn.execute(
+                "DELETE FROM planned_checks WHERE reviewer_id = (SELECT id FROM users WHERE name = ?)",
+                (name,)
+            )
+            cursor = await conn.execute("DELETE FROM users WHERE name = ?", (name,))
+            return cursor.rowcount
+        
+        result = await UserService.db.transaction(op)
+        UserService._invalidate_names([name])
         return result > 0
     
     @classmethod
-    async def get_office_workers(cls) -> List[Dict]:
+    def get_cache_stats(cls) -> Dict:
+        """Счётчики кэша пользователей: hits, misses, evictions, size, hit_rate"""
+        return UserService._cache.stats()
+    
+    @classmethod
+    async def _move_reviews(cls, conn, moves: List[tuple]):
+        """
+        Перенести проверки и планы проверок на новый Telegram ID пользователя
+        (внутри транзакции conn); moves — пары (новый Telegram ID, ФИО)
+        """
+        for table in UserService.REVIEWER_TABLES:
+            await conn.executemany(
+                f"UPDATE {table} SET reviewer_id = ? "
+                f"WHERE reviewer_id = (SELECT id FROM users WHERE name = ?) AND reviewer_id != ?",
+                [(user_id, name, user_id) for user_id, name in moves]
+            )
+    
+    @classmethod
+    def _invalidate_names(cls, names: List[str]):
+        """Сбросить закэшированных пользователей с указанными ФИО"""
+        names = set(names)
+        UserService._cache.invalidate_where(lambda user: user is not None and user.name in names)
+    
+    @classmethod
+    async def get_office_workers(cls) -> List[UserRow]:
         """Получить всех офисных работников"""
-        return await UserService.db.query(
-            "SELECT * FROM users WHERE access_level = ? ORDER BY name",
+        return await UserService.db.select(
+            UserRow,
+            "WHERE access_level = ? ORDER BY name",
             (UserService.ACCESS_LEVEL_OFFICE_WORKER,)
         )
\ No newline at end of file
@@ -0,0 +1,120 @@
+# app/states/check_session.py
+"""
+Данные проверки office_worker в FSM в компактном виде.
+
+Оценки хранятся битами одного числа (бит i — оценка i-й задачи, 1 = ОК),
+рядом — курсор (номер текущей задачи) и массивы ID ошибок и их задач.
+Нажатие кнопки меняет только оценки и курсор (и массивы ошибок, если ошибка
+сохранена), поэтому его стоимость не зависит от того, сколько задач уже
+проверено.
+"""
+from typing import Any, Dict, List, Optional
+
+from aiogram.fsm.context import FSMContext
+
+# Ключи данных FSM
+FORM_ID = 'check_form_id'
+PART_NAME = 'check_part_name'
+TASK_IDS = 'check_task_ids'
+GRADES = 'check_grades'
+CURSOR = 'check_cursor'
+ERRORS_IDS = 'check_errors_ids'
+ERRORS_TASKS = 'check_errors_tasks'
+
+
+class CheckSession:
+    """Текущая проверка: задачи формы, оценки битами, курсор и ошибки"""
+    __slots__ = ('form_id', 'part_name', 'task_ids', 'grades', 'cursor', 'errors_ids', 'errors_tasks')
+
+    def __init__(self, form_id: int, part_name: str, task_ids: List[int], grades: int = 0, cursor: int = 0,
+                 errors_ids: Optional[List[int]] = None, errors_tasks: Optional[List[int]] = None):
+        self.form_id = form_id
+        self.part_name = part_name
+        self.task_ids = task_ids
+        self.grades = grades
+        self.cursor = cursor
+        self.errors_ids = errors_ids if errors_ids is not None else []
+        self.errors_tasks = errors_tasks if errors_tasks is not None else []
+
+    @classmethod
+    async def start(cls, state: FSMContext, form_id: int, part_name: str, task_ids: List[int]) -> 'CheckSession':
+        """Начать проверку: записать задачи формы и пустые оценки"""
+        session = cls(form_id, part_name, list(task_ids))
+        await state.update_data(session.to_data())
+        return session
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> Optional['CheckSession']:
+        """Проверка из данных FSM или None, если проверка не начата"""
+        if TASK_IDS in data:
+            return cls(
+                data[FORM_ID], data[PART_NAME], data[TASK_IDS], data[GRADES], data[CURSOR],
+                data[ERRORS_IDS], data[ERRORS_TASKS],
+            )
+        if 'task_ids' in data:
+            # Проверка, начатая до перехода на компактный формат (списком оценок)
+            grades = data.get('grades') or []
+            return cls(
+                data.get('form_id'), data.get('part_name', 'Блок'), data['task_ids'],
+                sum(1 << index for index, grade in enumerate(grades) if grade), len(grades),
+                list(data.get('errors_ids') or []), list(data.get('errors_tasks') or []),
+            )
+        return None
+
+    @classmethod
+    async def load(cls, state: FSMContext) -> Optional['CheckSession']:
+        data = await state.get_data()
+        session = cls.from_data(data)
+        if session is not None and TASK_IDS not in data:
+            await state.update_data(session.to_data())
+        return session
+
+    def to_data(self) -> Dict[str, Any]:
+        """Все ключи проверки для данных FSM"""
+        return {
+            FORM_ID: self.form_id,
+            PART_NAME: self.part_name,
+            TASK_IDS: self.task_ids,
+            GRADES: self.grades,
+            CURSOR: self.cursor,
+            ERRORS_IDS: self.errors_ids,
+            ERRORS_TASKS: self.errors_tasks,
+        }
+
+    @property
+    def total(self) -> int:
+        return len(self.task_ids)
+
+    @property
+    def current_task_id(self) -> Optional[int]:
+        """ID задачи под курсором или None, если все задачи проверены"""
+        return self.task_ids[self.cursor] if self.cursor < len(self.task_ids) else None
+
+    @property
+    def passed(self) -> int:
+        """Число задач с оценкой ОК"""
+        return bin(self.grades).count('1')
+
+    def grade_list(self) -> List[int]:
+        """Оценки списком (1 = ОК, 0 = Не ОК) — формат CheckService.create_check"""
+        return [(self.grades >> index) & 1 for index in range(self.cursor)]
+
+    async def record(self, state: FSMContext, ok: bool, error_id: Optional[int] = None, **data: Any):
+        """
+        Записать оценку текущей задачи и перейти к следующей
+
+        Args:
+            error_id: ID сохранённой ошибки по задаче
+            data: другие ключи FSM, которые нужно обновить тем же вызовом
+        """
+        if ok:
+            self.grades |= 1 << self.cursor
+        update = {GRADES: self.grades, CURSOR: self.cursor + 1}
+        if error_id is not None:
+            # Массивы дописываются на месте: данные FSM ссылаются на те же списки
+            self.errors_ids.append(error_id)
+            self.errors_tasks.append(self.task_ids[self.cursor])
+            update[ERRORS_IDS] = self.errors_ids
+            update[ERRORS_TASKS] = self.errors_tasks
+        self.cursor += 1
+        await state.update_data(update, **data)
@@ -0,0 +1,66 @@
+# app/update_priority.py
+"""
+Полосы приоритета обновлений для планировщика (app/utils/update_scheduler.py).
+
+high   — проверка office_worker (кнопки оценки и ошибок, сообщения в состояниях
+         CheckStates) и действия администратора
+low    — просмотры только для чтения (оценки, ошибки, бригада), которые в пересменку
+         открывают все рабочие одновременно
+normal — всё остальное
+
+Полоса выбирается при приёме обновления, до ожидания места в очереди, поэтому
+классификатор не обращается к базе: роль и состояние FSM берутся только из кэша
+UserService и из сессий DatabaseStorage в памяти. У активного пользователя
+они там есть — их загружают middleware и обработчики его предыдущих обновлений;
+остальные обновления без подходящей кнопки идут в normal.
+"""
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+
+from app.services.userService import UserService
+from app.states.office_worker_states import CheckStates
+from app.utils.fsm_storage import DatabaseStorage
+from app.utils.update_scheduler import LANE_HIGH, LANE_NORMAL, LANE_LOW
+
+# Кнопки проверки (по началу callback_data)
+CHECK_CALLBACK_PREFIXES = ('conduct_check', 'task_check_', 'error_', 'check_back_to_menu')
+
+# Просмотры только для чтения
+READ_ONLY_CALLBACKS = {
+    'worker_view_grades',
+    'worker_view_errors',
+    'worker_view_brigade_info',
+    'leader_view_workers',
+    'leader_view_errors',
+    'manager_view_planned_checks',
+    'reports',
+}
+READ_ONLY_CALLBACK_PREFIXES = ('worker_info_',)
+
+
+def classify_update(dispatcher: Dispatcher, bot: Bot, update: Update) -> str:
+    """Полоса обновления: сначала по кнопке, затем по роли и состоянию FSM из кэша"""
+    data = update.callback_query.data if update.callback_query is not None else None
+    if data:
+        if data.startswith(CHECK_CALLBACK_PREFIXES):
+            return LANE_HIGH
+        if data in READ_ONLY_CALLBACKS or data.startswith(READ_ONLY_CALLBACK_PREFIXES):
+            return LANE_LOW
+
+    context = UserContextMiddleware.resolve_event_context(update)
+    if context.user is None:
+        return LANE_NORMAL
+
+    user = UserService.get_cached_user_by_id(str(context.user.id))
+    if user is not None and user.access_level == UserService.ACCESS_LEVEL_ADMIN:
+        return LANE_HIGH
+
+    storage = dispatcher.fsm.storage
+    if isinstance(storage, DatabaseStorage):
+        fsm = dispatcher.fsm.resolve_context(
+            bot, context.chat_id, context.user_id, context.thread_id, context.business_connection_id,
+        )
+        if fsm is not None and storage.get_cached_state(fsm.key) in CheckStates.__all_states_names__:
+            return LANE_HIGH
+    return LANE_NORMAL
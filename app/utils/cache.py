@@ -0,0 +1,236 @@
+# app/utils/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+# Признак отсутствия значения в кэше (None — допустимое закэшированное значение)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Кэш в памяти процесса с ограниченным размером, временем жизни записей (TTL)
+    и вытеснением давно не использованных записей (LRU)
+
+    Счётчики hits / misses / evictions показывают, насколько кэш разгружает базу.
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._clock = clock
+        # ключ -> (значение, момент истечения); порядок — от давно использованных к недавним
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Получить значение или MISSING, если записи нет или она устарела"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return MISSING
+        value, expires_at = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Сохранить значение; при переполнении вытесняется самая старая запись"""
+        self._data[key] = (value, self._clock() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Удалить запись по ключу. Возвращает True, если запись была"""
+        return self._data.pop(key, MISSING) is not MISSING
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Удалить записи, значения которых удовлетворяют условию. Возвращает их количество"""
+        keys = [key for key, (value, _) in self._data.items() if predicate(value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        """Очистить кэш (счётчики сохраняются)"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Счётчики попаданий и промахов"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'hit_rate': self.hits / total if total else None,
+        }
+
+
+class AsyncRefreshCache:
+    """
+    Кэш результатов асинхронных загрузок со stale-while-revalidate
+
+    Запись свежая в течение ttl: значение отдаётся сразу. Следующие stale_ttl
+    секунд запись устаревшая: значение всё ещё отдаётся сразу, а в фоне
+    запускается обновление. После этого запись считается отсутствующей и
+    загрузка выполняется синхронно.
+
+    Одновременные загрузки одного ключа объединяются в один вызов loader.
+    Загрузка, начатая до invalidate(), свой результат в кэш не записывает.
+
+    С serve_stale_on_error=True истёкшая запись хранится до успешной загрузки
+    и отдаётся вместо ошибки loader (например, пока источник недоступен).
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        stale_ttl: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+        serve_stale_on_error: bool = False,
+    ):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.serve_stale_on_error = serve_stale_on_error
+        self._clock = clock
+        # ключ -> (значение, свежо до, можно отдавать до); порядок — LRU
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, float]]" = OrderedDict()
+        # ключ -> выполняющаяся загрузка (сброс ключа убирает её отсюда)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.evictions = 0
+        self.fallbacks = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Получить значение из кэша или загрузить его вызовом loader()"""
+        item = self._data.get(key)
+        if item is not None:
+            value, fresh_until, stale_until = item
+            now = self._clock()
+            if now < fresh_until:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            if now < stale_until:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                self._refresh(key, loader)
+                return value
+            if not self.serve_stale_on_error:
+                del self._data[key]
+                item = None
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            future = self._start_load(key, loader)
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Источник недоступен: отдаём последнее известное значение
+            if item is None or self._data.get(key) is not item:
+                raise
+            self.fallbacks += 1
+            return item[0]
+
+    def set(self, key: Hashable, value: Any):
+        """Сохранить значение (свежее с текущего момента)"""
+        now = self._clock()
+        self._data[key] = (value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Удалить запись; результат уже начатой загрузки ключа не будет сохранён"""
+        self._inflight.pop(key, None)
+        return self._data.pop(key, MISSING) is not MISSING
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Удалить записи, для которых predicate(ключ, значение) истинно. Возвращает их количество"""
+        keys = [key for key, (value, _, _) in self._data.items() if predicate(key, value)]
+        for key in keys:
+            self.invalidate(key)
+        return len(keys)
+
+    def clear(self):
+        """Очистить кэш; результаты начатых загрузок не сохраняются (счётчики сохраняются)"""
+        self._inflight.clear()
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Счётчики попаданий, промахов и фоновых обновлений"""
+        total = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'evictions': self.evictions,
+            'fallbacks': self.fallbacks,
+            'size': len(self._data),
+            'hit_rate': (self.hits + self.stale_hits) / total if total else None,
+        }
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Запустить загрузку ключа, которую разделят все одновременные запросы"""
+        task = asyncio.ensure_future(self._load(key, loader))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._load_done(key, t))
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except Exception:
+            self.errors += 1
+            raise
+        # Ключ сбросили во время загрузки: результат мог устареть
+        if self._inflight.get(key) is asyncio.current_task():
+            self.set(key, value)
+        return value
+
+    def _load_done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Ошибка фонового обновления не должна попадать в лог как «never retrieved»
+            task.exception()
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        """Обновить устаревшую запись в фоне (не более одного обновления на ключ)"""
+        if key in self._inflight:
+            return
+        self.refreshes += 1
+        task = self._start_load(key, loader)
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
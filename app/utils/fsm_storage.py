@@ -0,0 +1,268 @@
+# app/utils/fsm_storage.py
+"""
+Хранилище состояний FSM в базе данных (таблица fsm_storage).
+
+Сессии живут в памяти, изменения записываются в базу отложенно (write-behind):
+несколько update_data за одно нажатие кнопки и изменения разных
+пользователей за FSM_FLUSH_INTERVAL секунд уходят одной транзакцией.
+При остановке бота всё несохранённое записывается, поэтому начатые проверки
+продолжаются после перезапуска.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from app.db import BaseDatabase
+from config import FSM_FLUSH_INTERVAL, FSM_SESSION_TTL, FSM_MEMORY_IDLE
+
+logger = logging.getLogger(__name__)
+
+
+class _Session:
+    """Состояние и данные одного ключа FSM"""
+    __slots__ = ('state', 'data', 'touched', 'version', 'saved_version', 'unserializable_version')
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any], touched: float):
+        self.state = state
+        self.data = data
+        self.touched = touched
+        # Номер изменения и номер последнего записанного в базу изменения
+        self.version = 0
+        self.saved_version = 0
+        # Номер изменения, данные которого не сериализуются в JSON
+        self.unserializable_version: Optional[int] = None
+
+    @property
+    def dirty(self) -> bool:
+        return self.version != self.saved_version
+
+    @property
+    def unserializable(self) -> bool:
+        return self.dirty and self.version == self.unserializable_version
+
+    @property
+    def pending(self) -> bool:
+        """Есть изменение, которое можно записать"""
+        return self.dirty and not self.unserializable
+
+
+class DatabaseStorage(BaseStorage):
+    """
+    BaseStorage aiogram поверх общей базы данных приложения
+
+    Использование:
+        storage = DatabaseStorage(container.db)
+        dp = Dispatcher(storage=storage)
+        ...
+        await storage.close()  # до закрытия базы
+    """
+
+    def __init__(
+        self,
+        db: BaseDatabase,
+        flush_interval: float = FSM_FLUSH_INTERVAL,
+        session_ttl: float = FSM_SESSION_TTL,
+        memory_idle: float = FSM_MEMORY_IDLE,
+        key_builder: Optional[KeyBuilder] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            db: база данных с таблицей fsm_storage (миграция 7)
+            flush_interval: как часто записывать изменения (в секундах)
+            session_ttl: сессия без изменений дольше этого срока удаляется
+            memory_idle: записанная сессия без обращений дольше этого срока выгружается из памяти
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        self.session_ttl = session_ttl
+        self.memory_idle = memory_idle
+        self.key_builder = key_builder or DefaultKeyBuilder(
+            with_bot_id=True, with_business_connection_id=True, with_destiny=True
+        )
+        # Время — секунды Unix: по нему же после перезапуска определяется возраст сессии
+        self._clock = clock
+        self._sessions: Dict[str, _Session] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._last_purge = 0.0
+        self.updates = 0
+        self.flushes = 0
+        self.saved = 0
+        self.loads = 0
+        self.evicted = 0
+        self.purged = 0
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        session = await self._session(key)
+        session.state = state.state if isinstance(state, State) else state
+        self._changed(session)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._session(key)).state
+
+    def get_cached_state(self, key: StorageKey) -> Optional[str]:
+        """Состояние сессии, если она уже в памяти, без обращения к базе"""
+        session = self._sessions.get(self.key_builder.build(key))
+        return session.state if session is not None else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        session = await self._session(key)
+        session.data = data.copy()
+        self._changed(session)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._session(key)).data.copy()
+
+    async def close(self) -> None:
+        """Записать несохранённые изменения и остановить фоновую запись"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Записать изменённые сессии одной транзакцией. Возвращает число записанных сессий"""
+        async with self._flush_lock:
+            dirty = [(name, session, session.version) for name, session in self._sessions.items() if session.pending]
+            if not dirty:
+                return 0
+            upserts = []
+            deletes = []
+            written = []
+            for name, session, version in dirty:
+                if session.state is None and not session.data:
+                    # Пустая сессия (state.clear()) строку в базе не занимает
+                    deletes.append((name,))
+                else:
+                    try:
+                        data = _dumps(session.data)
+                    except (TypeError, ValueError):
+                        # Одна сессия с несериализуемыми данными не должна блокировать запись остальных.
+                        # Она остаётся несохранённой (и в памяти) и записывается после следующего изменения
+                        logger.exception("Данные FSM %s не сериализуются в JSON, сессия не записана", name)
+                        session.unserializable_version = version
+                        continue
+                    upserts.append((name, session.state, data, session.touched))
+                written.append((session, version))
+            if not written:
+                return 0
+
+            async def op(conn):
+                if upserts:
+                    await conn.executemany(
+                        "INSERT INTO fsm_storage (key, state, data, updated_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (key) DO UPDATE SET state = excluded.state, data = excluded.data, "
+                        "updated_at = excluded.updated_at",
+                        upserts
+                    )
+                if deletes:
+                    await conn.executemany("DELETE FROM fsm_storage WHERE key = ?", deletes)
+
+            await self.db.transaction(op)
+            # Изменения, сделанные во время записи, останутся несохранёнными до следующей
+            for session, version in written:
+                session.saved_version = max(session.saved_version, version)
+            self.flushes += 1
+            self.saved += len(written)
+            return len(written)
+
+    async def purge_expired(self) -> int:
+        """Удалить из базы и из памяти сессии без изменений дольше session_ttl"""
+        expired_before = self._clock() - self.session_ttl
+        for name in [name for name, session in self._sessions.items() if session.touched < expired_before]:
+            del self._sessions[name]
+        removed = await self.db.execute("DELETE FROM fsm_storage WHERE updated_at < ?", (expired_before,))
+        self.purged += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Счётчики: изменения, транзакции записи, записанные сессии, загрузки из базы, выгрузки,
+        сессии с несериализуемыми данными
+        """
+        return {
+            'sessions': len(self._sessions),
+            'dirty': sum(1 for session in self._sessions.values() if session.dirty),
+            'unserializable': sum(1 for session in self._sessions.values() if session.unserializable),
+            'updates': self.updates,
+            'flushes': self.flushes,
+            'saved': self.saved,
+            'loads': self.loads,
+            'evicted': self.evicted,
+            'purged': self.purged,
+        }
+
+    async def _session(self, key: StorageKey) -> _Session:
+        """Сессия из памяти или из базы"""
+        name = self.key_builder.build(key)
+        session = self._sessions.get(name)
+        if session is None:
+            loaded = await self._load(name)
+            # Пока шла загрузка, сессию мог создать другой апдейт того же пользователя
+            session = self._sessions.setdefault(name, loaded)
+        session.touched = self._clock()
+        return session
+
+    async def _load(self, name: str) -> _Session:
+        self.loads += 1
+        rows = await self.db.query("SELECT state, data, updated_at FROM fsm_storage WHERE key = ?", (name,))
+        now = self._clock()
+        if not rows or rows[0]['updated_at'] < now - self.session_ttl:
+            return _Session(None, {}, now)
+        return _Session(rows[0]['state'], _loads(rows[0]['data']), now)
+
+    def _changed(self, session: _Session):
+        session.version += 1
+        self.updates += 1
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        """
+        Фоновая запись изменений, выгрузка неактивных сессий и удаление просроченных.
+        Завершается, когда записывать нечего; следующее изменение запускает её снова
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                self._evict_idle()
+                now = self._clock()
+                if now - self._last_purge >= min(self.session_ttl, 3600):
+                    self._last_purge = now
+                    await self.purge_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка записи состояний FSM")
+            if not any(session.pending for session in self._sessions.values()):
+                return
+
+    def _evict_idle(self):
+        """Выгрузить из памяти сохранённые сессии без обращений дольше memory_idle"""
+        idle_before = self._clock() - self.memory_idle
+        idle = [
+            name for name, session in self._sessions.items()
+            if not session.dirty and session.touched < idle_before
+        ]
+        for name in idle:
+            del self._sessions[name]
+        self.evicted += len(idle)
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _loads(value: Optional[str]) -> Dict[str, Any]:
+    return json.loads(value) if value else {}
@@ -0,0 +1,356 @@
+# app/utils/update_scheduler.py
+"""
+Планировщик обработки обновлений перед Dispatcher.
+
+Обработчики разных чатов выполняются параллельно, но не больше
+UPDATE_CONCURRENCY одновременно. Обновления одного чата обрабатываются
+строго по очереди: повторное нажатие task_check_ok_* ждёт, пока закончится
+обработка первого, и не гоняется с ним за данные FSM. Ожидающее обновление
+не занимает место обработчика — его занимают обновления других чатов.
+
+Обновления делятся на полосы (классификатор — app/update_priority.py).
+Освободившийся обработчик выбирает полосу взвешенным круговым обходом
+(UPDATE_LANE_WEIGHTS): при наплыве просмотров в полосе low нажатия из
+полосы high ждут не больше нескольких обновлений.
+
+Если в очереди UPDATE_QUEUE_SIZE обновлений, приём новых ждёт: при polling
+бот не запрашивает getUpdates, при вебхуке задерживает ответ Telegram.
+Один чат занимает не больше UPDATE_CHAT_QUEUE_SIZE мест: следующие его
+обновления отбрасываются (stats()['chat_overflows']), и остальные чаты не ждут
+из-за одного.
+
+Метрики пишутся в лог каждые UPDATE_STATS_INTERVAL секунд.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+
+from config import (
+    UPDATE_CONCURRENCY, UPDATE_QUEUE_SIZE, UPDATE_CHAT_QUEUE_SIZE, UPDATE_SHUTDOWN_TIMEOUT,
+    UPDATE_LANE_WEIGHTS, UPDATE_STATS_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Полосы
+LANE_HIGH = 'high'
+LANE_NORMAL = 'normal'
+LANE_LOW = 'low'
+
+# Обновление в очереди: бот, обновление, время постановки, контекстные данные, полоса
+_Item = Tuple[Bot, Update, float, Dict[str, Any], '_Lane']
+
+# Классификатор: (диспетчер, бот, обновление) -> название полосы. Вызывается при приёме
+# обновления, до ожидания места в очереди, поэтому не должен обращаться к базе
+Classifier = Callable[[Dispatcher, Bot, Update], str]
+
+
+def chat_key(update: Update) -> Hashable:
+    """Ключ очереди: ID чата, иначе ID пользователя, иначе само обновление (без упорядочивания)"""
+    context = UserContextMiddleware.resolve_event_context(update)
+    if context.chat is not None:
+        return context.chat.id
+    if context.user is not None:
+        return context.user.id
+    return ('update', update.update_id)
+
+
+class _Lane:
+    """Полоса: чаты, готовые к обработке, вес и метрики"""
+    __slots__ = ('name', 'weight', 'chats', 'current', 'depth', 'started', 'wait_total', 'wait_max')
+
+    def __init__(self, name: str, weight: int):
+        self.name = name
+        self.weight = weight
+        self.chats: Deque[Hashable] = deque()
+        # Текущий вес плавного взвешенного кругового обхода
+        self.current = 0
+        self.depth = 0
+        self.started = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self.depth,
+            'started': self.started,
+            'wait_avg_ms': self.wait_total / self.started * 1000 if self.started else 0.0,
+            'wait_max_ms': self.wait_max * 1000,
+        }
+
+
+class UpdateScheduler:
+    """
+    Очереди обновлений по чатам, полосы приоритета и ограниченное число обработчиков
+
+    Использование:
+        scheduler = UpdateScheduler(dp, classifier=classify_update)
+        await scheduler.start()
+        await scheduler.submit(bot, update)  # ждёт, пока очередь полна
+        ...
+        await scheduler.close()  # дождаться начатых и ожидающих обновлений
+    """
+
+    def __init__(self, dispatcher: Dispatcher, concurrency: int = UPDATE_CONCURRENCY,
+                 queue_size: int = UPDATE_QUEUE_SIZE, shutdown_timeout: float = UPDATE_SHUTDOWN_TIMEOUT,
+                 classifier: Optional[Classifier] = None, lane_weights: Optional[Dict[str, int]] = None,
+                 chat_queue_size: int = UPDATE_CHAT_QUEUE_SIZE, stats_interval: float = UPDATE_STATS_INTERVAL):
+        """
+        Args:
+            dispatcher: диспетчер, которому передаются обновления
+            concurrency: сколько обновлений обрабатывается одновременно
+            queue_size: сколько обновлений может ждать обработки
+            shutdown_timeout: сколько при остановке ждать необработанных обновлений (в секундах)
+            classifier: выбирает полосу обновления без обращений к базе; без него все обновления в полосе normal
+            lane_weights: вес каждой полосы (по умолчанию UPDATE_LANE_WEIGHTS)
+            chat_queue_size: сколько обновлений одного чата может быть в очереди
+            stats_interval: как часто писать метрики в лог (в секундах; 0 — не писать)
+        """
+        self.dispatcher = dispatcher
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.chat_queue_size = chat_queue_size
+        self.shutdown_timeout = shutdown_timeout
+        self.stats_interval = stats_interval
+        self.classifier = classifier
+        self._lanes = {
+            name: _Lane(name, weight)
+            for name, weight in (lane_weights if lane_weights is not None else UPDATE_LANE_WEIGHTS).items()
+        }
+        self._default_lane = self._lanes.setdefault(LANE_NORMAL, _Lane(LANE_NORMAL, 1))
+        # Очередь каждого чата; чат есть в словаре, пока у него есть ожидающие или обрабатываемое обновление
+        self._chats: Dict[Hashable, Deque[_Item]] = {}
+        # Число чатов в полосах, обновление которых можно начать обрабатывать
+        self._ready = asyncio.Semaphore(0)
+        self._space = asyncio.Semaphore(queue_size)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers: List[asyncio.Task] = []
+        self._stats_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # Метрики
+        self.submitted = 0
+        self.processed = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.backpressure_waits = 0
+        self.backpressure_max = 0.0
+        self.chat_overflows = 0
+
+    async def start(self):
+        """Запустить обработчики (повторный вызов ничего не делает)"""
+        if self._workers:
+            return
+        self._closed = False
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        if self.stats_interval:
+            self._stats_task = asyncio.create_task(self._log_stats())
+
+    async def submit(self, bot: Bot, update: Update, **kwargs: Any):
+        """
+        Поставить обновление в очередь его чата
+
+        Ждёт, пока в очереди не освободится место. Обновление чата, у которого
+        в очереди уже chat_queue_size обновлений, отбрасывается
+
+        Args:
+            kwargs: контекстные данные для middleware, фильтров и обработчиков
+        """
+        if self._closed:
+            logger.warning("Обновление %s получено после остановки планировщика и пропущено", update.update_id)
+            return
+        lane = self._classify(bot, update)
+        if self._space.locked():
+            started = time.monotonic()
+            await self._space.acquire()
+            self.backpressure_waits += 1
+            self.backpressure_max = max(self.backpressure_max, time.monotonic() - started)
+        else:
+            await self._space.acquire()
+
+        key = chat_key(update)
+        queue = self._chats.get(key)
+        if queue is not None and len(queue) >= self.chat_queue_size:
+            self._space.release()
+            self.chat_overflows += 1
+            logger.warning("Очередь чата %s переполнена, обновление %s пропущено", key, update.update_id)
+            return
+
+        self.submitted += 1
+        self.queue_depth += 1
+        self.queue_depth_max = max(self.queue_depth_max, self.queue_depth)
+        lane.depth += 1
+        self._idle.clear()
+
+        item = (bot, update, time.monotonic(), kwargs, lane)
+        if queue is None:
+            self._chats[key] = deque((item,))
+            self._push(key, lane)
+        else:
+            # Чат уже обрабатывается: обновление возьмёт тот, кто закончит предыдущее
+            queue.append(item)
+
+    async def close(self):
+        """Дождаться обработки очереди (не дольше shutdown_timeout) и остановить обработчики"""
+        if self._closed:
+            return
+        self._closed = True
+        if self.queue_depth or self.in_flight:
+            logger.info("Ожидание обработки %s обновлений", self.queue_depth + self.in_flight)
+            try:
+                await asyncio.wait_for(self._idle.wait(), self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Не обработано обновлений при остановке: %s", self.queue_depth + self.in_flight)
+        tasks = self._workers + ([self._stats_task] if self._stats_task is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._stats_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Метрики: глубина очереди, ожидание до начала обработки и при полной очереди (мс),
+        отброшенные обновления переполненных чатов, по полосам
+        """
+        started = self.processed + self.errors + self.in_flight
+        return {
+            'submitted': self.submitted,
+            'processed': self.processed,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'queue_depth_max': self.queue_depth_max,
+            'wait_avg_ms': self.wait_total / started * 1000 if started else 0.0,
+            'wait_max_ms': self.wait_max * 1000,
+            'backpressure_waits': self.backpressure_waits,
+            'backpressure_max_ms': self.backpressure_max * 1000,
+            'chat_overflows': self.chat_overflows,
+            'lanes': {name: lane.stats() for name, lane in self._lanes.items()},
+        }
+
+    async def _log_stats(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            logger.info("Обработка обновлений: %s", self.stats())
+
+    def _classify(self, bot: Bot, update: Update) -> _Lane:
+        if self.classifier is None:
+            return self._default_lane
+        try:
+            name = self.classifier(self.dispatcher, bot, update)
+        except Exception:
+            logger.exception("Ошибка при выборе полосы обновления %s", update.update_id)
+            return self._default_lane
+        return self._lanes.get(name, self._default_lane)
+
+    def _push(self, key: Hashable, lane: _Lane):
+        """Чат готов к обработке следующего обновления из полосы lane"""
+        lane.chats.append(key)
+        self._ready.release()
+
+    def _next_lane(self) -> _Lane:
+        """Плавный взвешенный круговой обход непустых полос (как в nginx)"""
+        best = None
+        total = 0
+        for lane in self._lanes.values():
+            if not lane.chats:
+                continue
+            lane.current += lane.weight
+            total += lane.weight
+            if best is None or lane.current > best.current:
+                best = lane
+        best.current -= total
+        return best
+
+    async def _worker(self):
+        while True:
+            await self._ready.acquire()
+            lane = self._next_lane()
+            key = lane.chats.popleft()
+            if not lane.chats:
+                lane.current = 0
+            queue = self._chats[key]
+            bot, update, enqueued, kwargs, _ = queue[0]
+            self.queue_depth -= 1
+            lane.depth -= 1
+            self._space.release()
+            wait = time.monotonic() - enqueued
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            lane.started += 1
+            lane.wait_total += wait
+            lane.wait_max = max(lane.wait_max, wait)
+
+            self.in_flight += 1
+            try:
+                await self._process(bot, update, kwargs)
+            finally:
+                self.in_flight -= 1
+                queue.popleft()
+                if queue:
+                    # Следующее обновление чата встаёт в свою полосу
+                    self._push(key, queue[0][4])
+                else:
+                    del self._chats[key]
+                if not self.queue_depth and not self.in_flight:
+                    self._idle.set()
+
+    async def _process(self, bot: Bot, update: Update, kwargs: Dict[str, Any]):
+        try:
+            response = await self.dispatcher.feed_update(bot, update, **kwargs)
+            if isinstance(response, TelegramMethod):
+                await self.dispatcher.silent_call_request(bot=bot, result=response)
+        except Exception:
+            self.errors += 1
+            logger.exception("Ошибка при обработке обновления %s", update.update_id)
+        else:
+            self.processed += 1
+
+
+class SchedulingDispatcher(Dispatcher):
+    """
+    Dispatcher, который при polling передаёт обновления в UpdateScheduler
+
+    Планировщик запускается и останавливается вместе с диспетчером
+    (startup/shutdown). Вебхук (app/webhook.py) ставит обновления в тот же
+    планировщик
+    """
+
+    def __init__(self, *, concurrency: int = UPDATE_CONCURRENCY, queue_size: int = UPDATE_QUEUE_SIZE,
+                 shutdown_timeout: float = UPDATE_SHUTDOWN_TIMEOUT, classifier: Optional[Classifier] = None,
+                 lane_weights: Optional[Dict[str, int]] = None, chat_queue_size: int = UPDATE_CHAT_QUEUE_SIZE,
+                 stats_interval: float = UPDATE_STATS_INTERVAL, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.scheduler = UpdateScheduler(
+            self, concurrency, queue_size, shutdown_timeout, classifier=classifier, lane_weights=lane_weights,
+            chat_queue_size=chat_queue_size, stats_interval=stats_interval,
+        )
+        self.startup.register(self.scheduler.start)
+
+    async def emit_shutdown(self, *args: Any, **kwargs: Any) -> None:
+        # Очередь обрабатывается до закрытия хранилища FSM (его закрывает shutdown диспетчера)
+        await self.scheduler.close()
+        await super().emit_shutdown(*args, **kwargs)
+
+    async def start_polling(self, *bots: Bot, **kwargs: Any) -> None:
+        # Цикл polling сам ставит обновления в очередь и ждёт, пока она полна,
+        # поэтому отдельные задачи на обновления не создаются
+        kwargs['handle_as_tasks'] = False
+        await super().start_polling(*bots, **kwargs)
+
+    async def _process_update(self, bot: Bot, update: Update, call_answer: bool = True, **kwargs: Any) -> bool:
+        await self.scheduler.submit(bot, update, **kwargs)
+        return True
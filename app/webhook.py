@@ -0,0 +1,104 @@
+# app/webhook.py
+"""
+Приём обновлений через вебхук (BOT_MODE = "webhook" в config.py).
+
+Telegram отправляет обновления POST-запросами на WEBHOOK_URL + WEBHOOK_PATH.
+Запрос проверяется по секретному токену (заголовок
+X-Telegram-Bot-Api-Secret-Token), ответ 200 отправляется сразу, а обновление
+обрабатывается в фоне. Соединения держатся открытыми (keep-alive), число
+одновременных соединений со стороны Telegram ограничено max_connections.
+
+С SchedulingDispatcher обновление ставится в очередь планировщика
+(app/utils/update_scheduler.py): пока очередь полна, ответ Telegram
+задерживается, и новых обновлений он не присылает.
+"""
+import asyncio
+import logging
+from typing import Any
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from app.utils.update_scheduler import SchedulingDispatcher
+from config import (
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT,
+    WEBHOOK_MAX_CONNECTIONS, WEBHOOK_KEEPALIVE_TIMEOUT, WEBHOOK_SHUTDOWN_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик вебхука: отвечает Telegram сразу, обновление обрабатывается в фоне.
+    При остановке дожидается начатых обработок (не дольше shutdown_timeout)
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str,
+                 shutdown_timeout: float = WEBHOOK_SHUTDOWN_TIMEOUT, **data: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.shutdown_timeout = shutdown_timeout
+
+    @property
+    def in_flight(self) -> int:
+        """Число обновлений, которые обрабатываются сейчас"""
+        if isinstance(self.dispatcher, SchedulingDispatcher):
+            return self.dispatcher.scheduler.in_flight
+        return len(self._background_feed_update_tasks)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if not isinstance(self.dispatcher, SchedulingDispatcher):
+            return await super()._handle_request_background(bot, request)
+        update = Update.model_validate(await request.json(loads=bot.session.json_loads), context={"bot": bot})
+        await self.dispatcher.scheduler.submit(bot, update, **self.data)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def close(self) -> None:
+        if isinstance(self.dispatcher, SchedulingDispatcher):
+            # Очередь обрабатывается до закрытия сессии бота
+            await self.dispatcher.scheduler.close()
+        tasks = set(self._background_feed_update_tasks)
+        if tasks:
+            logger.info("Ожидание обработки %s обновлений", len(tasks))
+            _, pending = await asyncio.wait(tasks, timeout=self.shutdown_timeout)
+            for task in pending:
+                task.cancel()
+        await super().close()
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot, secret_token: str = WEBHOOK_SECRET,
+                      path: str = WEBHOOK_PATH) -> web.Application:
+    """Приложение aiohttp с обработчиком вебхука и запуском/остановкой диспетчера"""
+    app = web.Application()
+    WebhookRequestHandler(dp, bot, secret_token).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """Запустить сервер вебхука и зарегистрировать вебхук в Telegram (работает до отмены)"""
+    if not WEBHOOK_URL or not WEBHOOK_SECRET:
+        raise ValueError("Необходимо указать WEBHOOK_URL и WEBHOOK_SECRET в файле config.py")
+
+    runner = web.AppRunner(
+        build_webhook_app(dp, bot),
+        access_log=None,
+        keepalive_timeout=WEBHOOK_KEEPALIVE_TIMEOUT,
+    )
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+        await site.start()
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        logger.info("Вебхук слушает %s:%s%s", WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH)
+        await asyncio.Event().wait()
+    finally:
+        # Остановка: диспетчер (on_shutdown), ожидание фоновых обработок, закрытие сессии бота
+        await runner.cleanup()
@@ -0,0 +1,141 @@
+"""
+Бенчмарк BitrixService против локальной замены Bitrix24 (benchmarks/fake_bitrix.py).
+
+Поднимает сервер с заданным числом контактов, задержкой и долей ошибок и
+прогоняет через BitrixService типичную нагрузку бота:
+    - проверки уровня доступа по Telegram ID (часть пользователей активнее остальных);
+    - поиск контактов по имени;
+    - создание контактов (пакетами batch);
+    - постраничное чтение всех контактов, как при полной синхронизации.
+Для каждой фазы печатает пропускную способность, число HTTP-запросов и
+попадания в кэш, в конце — метрики регулятора и сервера.
+
+Запуск: python -m benchmarks.bitrix_bench [--contacts 10000] [--requests 5000]
+    [--concurrency 50] [--latency 0.02] [--error-rate 0] [--rate 50]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.services.bitrix_client import BitrixGovernor
+from app.services.bitrix_service import BitrixService
+from benchmarks.fake_bitrix import FakeBitrix, FIRST_NAMES, LAST_NAMES
+
+
+async def run_phase(name: str, fake: FakeBitrix, calls, concurrency: int):
+    """Выполнить вызовы не более чем по concurrency одновременно и напечатать итоги"""
+    requests_before = sum(fake.requests.values())
+    slots = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(call):
+        nonlocal errors
+        async with slots:
+            try:
+                await call()
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(call) for call in calls))
+    seconds = time.perf_counter() - started
+    http = sum(fake.requests.values()) - requests_before
+    print(f"{name:<28} {len(calls):>7} вызовов за {seconds:7.2f} с  "
+          f"{len(calls) / seconds:9.1f} выз/с  HTTP: {http:>6}  ошибок: {errors}")
+
+
+async def read_all_contacts() -> int:
+    """Все контакты страницами по ID, как при полной синхронизации"""
+    total = 0
+    after_id = 0
+    while True:
+        contacts = await BitrixService.list_contacts_page({}, ['ID', 'NAME', 'LAST_NAME'], after_id)
+        total += len(contacts)
+        if len(contacts) < BitrixService.PAGE_SIZE:
+            return total
+        after_id = int(contacts[-1]['ID'])
+
+
+async def main(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    fake = FakeBitrix(
+        contacts=args.contacts,
+        seed=args.seed,
+        latency=args.latency,
+        jitter=args.latency / 2,
+        error_rate=args.error_rate,
+    )
+    webhook = await fake.start()
+    await BitrixService.initialize(
+        webhook, BitrixGovernor(rate=args.rate, burst=max(1, int(args.rate)), max_concurrent=args.concurrency)
+    )
+    print(f"Контактов: {args.contacts}, задержка: {args.latency * 1000:.0f} мс, "
+          f"ошибок QUERY_LIMIT_EXCEEDED: {args.error_rate:.0%}, лимит: {args.rate} запр/с")
+
+    try:
+        # Активные пользователи: 80% обращений приходится на 20% Telegram ID
+        telegram_ids = [str(10 ** 9 + contact_id) for contact_id in range(1, args.contacts + 1)]
+        hot = telegram_ids[:max(1, len(telegram_ids) // 5)]
+        lookups = [
+            rng.choice(hot) if rng.random() < 0.8 else rng.choice(telegram_ids)
+            for _ in range(args.requests)
+        ]
+        await run_phase(
+            "Уровень доступа", fake,
+            [lambda user_id=user_id: BitrixService.get_user_access_level(user_id) for user_id in lookups],
+            args.concurrency,
+        )
+
+        names = [rng.choice(FIRST_NAMES + LAST_NAMES) for _ in range(max(1, args.requests // 10))]
+        await run_phase(
+            "Поиск по имени", fake,
+            [lambda name=name: BitrixService.get_user_by_name(name) for name in names],
+            args.concurrency,
+        )
+
+        created = [
+            {'name': f"Новый Сотрудник {index}", 'access_level': 'worker'}
+            for index in range(max(1, args.requests // 20))
+        ]
+        await run_phase(
+            "Создание контактов", fake,
+            [lambda user=user: BitrixService.create_user(user['name'], user['access_level']) for user in created],
+            args.concurrency,
+        )
+
+        started = time.perf_counter()
+        requests_before = sum(fake.requests.values())
+        total = await read_all_contacts()
+        seconds = time.perf_counter() - started
+        print(f"{'Чтение всех контактов':<28} {total:>7} контактов за {seconds:6.2f} с  "
+              f"{total / seconds:9.1f} конт/с  HTTP: {sum(fake.requests.values()) - requests_before:>6}")
+
+        print()
+        for method, stats in BitrixService.get_cache_stats().items():
+            hit_rate = stats['hit_rate']
+            print(f"Кэш {method}: попаданий {hit_rate * 100 if hit_rate is not None else 0:.1f}%, "
+                  f"промахов {stats['misses']}, объединено {stats['coalesced']}, записей {stats['size']}")
+        print(f"Пакеты batch: {BitrixService.get_batch_stats()}")
+        print(f"Регулятор: {BitrixService.get_governor_stats()}")
+        print(f"Сервер: {fake.stats()}")
+    finally:
+        await BitrixService.close()
+        await fake.stop()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк BitrixService на локальной замене Bitrix24")
+    parser.add_argument('--contacts', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=5_000, help="число проверок уровня доступа")
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.02, help="задержка ответа сервера, с")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="доля ответов QUERY_LIMIT_EXCEEDED")
+    parser.add_argument('--rate', type=float, default=50.0, help="лимит регулятора, запросов в секунду")
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
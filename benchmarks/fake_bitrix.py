@@ -0,0 +1,462 @@
+"""
+Локальная замена REST API Bitrix24 для бенчмарков и ручных проверок.
+
+Реализует методы, которые использует BitrixService: crm.contact.list (с
+постраничным чтением по start и фильтрами вида '>ID', '>=DATE_MODIFY',
+'%NAME'), crm.contact.add, crm.contact.update и batch (с подстановкой
+$result[...]). Контакты генерируются детерминированно по seed. Задержка
+ответа, доля ошибок QUERY_LIMIT_EXCEEDED и 5xx, а также лимит скорости
+портала задаются параметрами.
+
+Запуск: python -m benchmarks.fake_bitrix [--contacts 10000] [--port 8700]
+    [--latency 0.05] [--error-rate 0.01] [--server-error-rate 0] [--rate-limit 2]
+Вебхук для config.BITRIX_WEBHOOK печатается при запуске.
+"""
+
+import argparse
+import asyncio
+import bisect
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+
+from app.services.bitrix_service import TELEGRAM_ID_FIELD, ACCESS_LEVEL_FIELD, AVAILABLE_FIELD
+
+PAGE_SIZE = 50
+MAX_BATCH_COMMANDS = 50
+
+LAST_NAMES = ('Иванов', 'Петров', 'Сидоров', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Соколов',
+              'Михайлов', 'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Козлов')
+FIRST_NAMES = ('Иван', 'Пётр', 'Сергей', 'Алексей', 'Дмитрий', 'Андрей', 'Михаил', 'Николай',
+               'Егор', 'Олег', 'Павел', 'Артём', 'Роман', 'Максим', 'Денис', 'Юрий')
+MIDDLE_NAMES = ('Иванович', 'Петрович', 'Сергеевич', 'Алексеевич', 'Дмитриевич', 'Андреевич',
+                'Михайлович', 'Николаевич')
+# Доли уровней доступа среди контактов; остальные контакты — не пользователи бота
+ACCESS_LEVELS = (('worker', 0.6), ('leader', 0.1), ('office_worker', 0.05),
+                 ('manager', 0.03), ('admin', 0.02))
+
+# Операторы фильтра crm.contact.list (префикс ключа)
+_OPERATORS = ('>=', '<=', '!=', '>', '<', '!', '%', '=')
+_RESULT_REF = re.compile(r'^\$result\[([^\]]+)\](.*)$')
+
+
+class BitrixFakeError(Exception):
+    """Ошибка, которую сервер возвращает в теле ответа"""
+
+    def __init__(self, code: str, description: str, status: int = 400):
+        self.code = code
+        self.description = description
+        self.status = status
+        super().__init__(description)
+
+
+def make_contacts(count: int, seed: int = 1, telegram_share: float = 0.8) -> Dict[int, Dict]:
+    """
+    Детерминированный набор контактов: ID -> поля
+
+    telegram_share — доля контактов с заполненным Telegram ID (ID контакта + 10^9)
+    """
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=3)))
+    levels, weights = zip(*ACCESS_LEVELS)
+    contacts = {}
+    for contact_id in range(1, count + 1):
+        roll = rng.random()
+        level = rng.choices(levels, weights)[0] if roll < sum(weights) else ''
+        contacts[contact_id] = {
+            'ID': str(contact_id),
+            'NAME': rng.choice(FIRST_NAMES),
+            'LAST_NAME': rng.choice(LAST_NAMES),
+            'SECOND_NAME': rng.choice(MIDDLE_NAMES),
+            TELEGRAM_ID_FIELD: str(10 ** 9 + contact_id) if rng.random() < telegram_share else '',
+            ACCESS_LEVEL_FIELD: level,
+            AVAILABLE_FIELD: 'N' if rng.random() < 0.05 else 'Y',
+            'DATE_MODIFY': _format_date(started + timedelta(minutes=contact_id)),
+        }
+    return contacts
+
+
+def _format_date(moment: datetime) -> str:
+    return moment.isoformat(timespec='seconds')
+
+
+def parse_query(query: str) -> Dict:
+    """Разобрать строку запроса в формате PHP (filter[%NAME]=x&select[0]=ID) во вложенный словарь"""
+    root: Dict = {}
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        parts = re.findall(r'\[([^\]]*)\]', key)
+        head = key.split('[', 1)[0]
+        node = root
+        path = [head] + parts
+        for part in path[:-1]:
+            node = node.setdefault(part, {})
+        node[path[-1]] = value
+    return _lists(root)
+
+
+def _lists(value: Any) -> Any:
+    """Словари с ключами 0..n-1 в списки"""
+    if not isinstance(value, dict):
+        return value
+    value = {key: _lists(item) for key, item in value.items()}
+    if value and all(key.isdigit() for key in value):
+        keys = sorted(value, key=int)
+        if [int(key) for key in keys] == list(range(len(keys))):
+            return [value[key] for key in keys]
+    return value
+
+
+class FakeBitrix:
+    """Сервер, имитирующий вебхук Bitrix24 (aiohttp)"""
+
+    def __init__(
+        self,
+        contacts: int = 10_000,
+        seed: int = 1,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        rate_burst: int = 50,
+    ):
+        """
+        Args:
+            contacts: число сгенерированных контактов
+            latency: задержка каждого ответа (в секундах), плюс случайные [0, jitter]
+            error_rate: доля запросов, получающих 503 QUERY_LIMIT_EXCEEDED
+            server_error_rate: доля запросов, получающих 500 INTERNAL_SERVER_ERROR
+            rate_limit: лимит запросов в секунду (как у портала), None — без лимита;
+                превышение отвечает QUERY_LIMIT_EXCEEDED
+        """
+        self.contacts = make_contacts(contacts, seed)
+        self.next_id = contacts + 1
+        # Индексы для фильтров, которые использует бот: ID по возрастанию и Telegram ID
+        self._ids = list(self.contacts)
+        self._by_telegram: Dict[str, Set[int]] = {}
+        for contact_id, contact in self.contacts.items():
+            self._index_telegram(contact_id, contact)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.server_error_rate = server_error_rate
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self._rng = random.Random(seed)
+        self._bucket = float(rate_burst)
+        self._bucket_updated = time.monotonic()
+        self._runner: Optional[web.AppRunner] = None
+        self.requests: Dict[str, int] = {}
+        self.commands = 0
+        self.injected_errors = 0
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        # Вебхук вида /rest/<пользователь>/<ключ>/<метод>
+        app.router.add_post('/{path:.*}', self._handle)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Запустить сервер и вернуть адрес вебхука"""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}/rest/1/fake/"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': dict(self.requests),
+            'batch_commands': self.commands,
+            'injected_errors': self.injected_errors,
+            'contacts': len(self.contacts),
+        }
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['path'].rstrip('/').rsplit('/', 1)[-1]
+        if method.endswith('.json'):
+            method = method[:-len('.json')]
+        self.requests[method] = self.requests.get(method, 0) + 1
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self._rng.uniform(0, self.jitter))
+        injected = self._inject_error()
+        if injected is not None:
+            self.injected_errors += 1
+            return self._error(injected)
+
+        if request.content_type == 'application/json':
+            params = await request.json() if request.can_read_body else {}
+        else:
+            params = parse_query(await request.text())
+        try:
+            if method == 'batch':
+                return web.json_response(self._batch(params))
+            return web.json_response(self._call(method, params or {}))
+        except BitrixFakeError as e:
+            return self._error(e)
+
+    def _inject_error(self) -> Optional[BitrixFakeError]:
+        if self.rate_limit:
+            now = time.monotonic()
+            self._bucket = min(self.rate_burst, self._bucket + (now - self._bucket_updated) * self.rate_limit)
+            self._bucket_updated = now
+            if self._bucket < 1:
+                return BitrixFakeError('QUERY_LIMIT_EXCEEDED', 'Too many requests', 503)
+            self._bucket -= 1
+        roll = self._rng.random()
+        if roll < self.error_rate:
+            return BitrixFakeError('QUERY_LIMIT_EXCEEDED', 'Too many requests', 503)
+        if roll < self.error_rate + self.server_error_rate:
+            return BitrixFakeError('INTERNAL_SERVER_ERROR', 'Internal server error', 500)
+        return None
+
+    @staticmethod
+    def _error(error: BitrixFakeError) -> web.Response:
+        return web.json_response(
+            {'error': error.code, 'error_description': error.description}, status=error.status
+        )
+
+    def _call(self, method: str, params: Dict) -> Dict:
+        """Ответ метода целиком: result и, для списков, next/total"""
+        started = time.perf_counter()
+        if method == 'crm.contact.list':
+            response = self._contact_list(params)
+        elif method == 'crm.contact.add':
+            response = {'result': self._contact_add(params)}
+        elif method == 'crm.contact.update':
+            response = {'result': self._contact_update(params)}
+        else:
+            raise BitrixFakeError('ERROR_METHOD_NOT_FOUND', 'Method not found!', 404)
+        response['time'] = {'duration': time.perf_counter() - started}
+        return response
+
+    def _contact_list(self, params: Dict) -> Dict:
+        contact_filter = params.get('filter') or {}
+        select = params.get('select') or []
+        order = params.get('order') or {'ID': 'ASC'}
+        start = int(params.get('start') or 0)
+
+        matching = (
+            self.contacts[contact_id] for contact_id in self._candidate_ids(contact_filter)
+            if _matches(self.contacts[contact_id], contact_filter)
+        )
+        by_id = [(field.upper(), str(direction).upper()) for field, direction in order.items()] == [('ID', 'ASC')]
+        if start < 0 and by_id:
+            # Без подсчёта общего числа: только первая страница, остальное не просматривается
+            return {'result': [_select(contact, select) for contact in islice(matching, PAGE_SIZE)]}
+
+        found = list(matching)
+        if not by_id:
+            for field, direction in reversed(list(order.items())):
+                found.sort(key=lambda contact: _comparable(field, contact.get(field)),
+                           reverse=str(direction).upper() == 'DESC')
+        if start < 0:
+            return {'result': [_select(contact, select) for contact in found[:PAGE_SIZE]]}
+        page = found[start:start + PAGE_SIZE]
+        response = {'result': [_select(contact, select) for contact in page], 'total': len(found)}
+        if start + PAGE_SIZE < len(found):
+            response['next'] = start + PAGE_SIZE
+        return response
+
+    def _contact_add(self, params: Dict) -> int:
+        fields = params.get('fields') or {}
+        contact_id = self.next_id
+        self.next_id += 1
+        contact = {'ID': str(contact_id), 'NAME': '', 'LAST_NAME': '', 'SECOND_NAME': '',
+                   TELEGRAM_ID_FIELD: '', ACCESS_LEVEL_FIELD: '', AVAILABLE_FIELD: 'Y'}
+        contact.update({key: _field_value(value) for key, value in fields.items()})
+        contact['DATE_MODIFY'] = _format_date(datetime.now(timezone(timedelta(hours=3))))
+        self.contacts[contact_id] = contact
+        self._ids.append(contact_id)
+        self._index_telegram(contact_id, contact)
+        return contact_id
+
+    def _contact_update(self, params: Dict) -> bool:
+        try:
+            contact = self.contacts[int(params.get('ID') or 0)]
+        except (TypeError, ValueError, KeyError):
+            raise BitrixFakeError('', 'Not found', 400)
+        fields = params.get('fields') or {}
+        self._by_telegram.get(contact[TELEGRAM_ID_FIELD], set()).discard(int(contact['ID']))
+        contact.update({key: _field_value(value) for key, value in fields.items() if key != 'ID'})
+        contact['DATE_MODIFY'] = _format_date(datetime.now(timezone(timedelta(hours=3))))
+        self._index_telegram(int(contact['ID']), contact)
+        return True
+
+    def _index_telegram(self, contact_id: int, contact: Dict):
+        if contact[TELEGRAM_ID_FIELD]:
+            self._by_telegram.setdefault(contact[TELEGRAM_ID_FIELD], set()).add(contact_id)
+
+    def _candidate_ids(self, contact_filter: Dict) -> Iterable[int]:
+        """ID контактов по возрастанию, среди которых могут быть подходящие под фильтр"""
+        telegram_id = contact_filter.get(TELEGRAM_ID_FIELD)
+        if telegram_id not in (None, ''):
+            return sorted(self._by_telegram.get(str(telegram_id), ()))
+        if '>ID' in contact_filter:
+            position = bisect.bisect_right(self._ids, _comparable('ID', contact_filter['>ID']))
+            return islice(self._ids, position, None)
+        return self._ids
+
+    def _batch(self, params: Dict) -> Dict:
+        commands = params.get('cmd') or {}
+        if len(commands) > MAX_BATCH_COMMANDS:
+            raise BitrixFakeError('ERROR_BATCH_LENGTH_EXCEEDED', 'Max batch length exceeded', 400)
+        halt = str(params.get('halt', 0)) not in ('0', '', 'False', 'false')
+        started = time.perf_counter()
+        results: Dict[str, Any] = {}
+        errors: Dict[str, Dict] = {}
+        totals: Dict[str, int] = {}
+        nexts: Dict[str, int] = {}
+        for name, command in commands.items():
+            self.commands += 1
+            method, _, query = command.partition('?')
+            try:
+                call_params = _substitute(parse_query(query), results)
+                response = self._call(method, call_params)
+            except BitrixFakeError as e:
+                errors[name] = {'error': e.code, 'error_description': e.description}
+                if halt:
+                    break
+                continue
+            results[name] = response['result']
+            if 'total' in response:
+                totals[name] = response['total']
+            if 'next' in response:
+                nexts[name] = response['next']
+        # Как и Bitrix24, пустые словари отдаются пустыми списками
+        return {
+            'result': {
+                'result': results or [],
+                'result_error': errors or [],
+                'result_total': totals or [],
+                'result_next': nexts or [],
+            },
+            'time': {'duration': time.perf_counter() - started},
+        }
+
+
+def _matches(contact: Dict, contact_filter: Dict) -> bool:
+    for key, expected in contact_filter.items():
+        operator, field = _split_operator(key)
+        actual = contact.get(field)
+        if operator == '%':
+            if str(expected).lower() not in str(actual or '').lower():
+                return False
+            continue
+        left, right = _comparable(field, actual), _comparable(field, expected)
+        if operator == '=' and left != right:
+            return False
+        if operator in ('!', '!=') and left == right:
+            return False
+        if operator == '>' and not left > right:
+            return False
+        if operator == '>=' and not left >= right:
+            return False
+        if operator == '<' and not left < right:
+            return False
+        if operator == '<=' and not left <= right:
+            return False
+    return True
+
+
+def _split_operator(key: str) -> Tuple[str, str]:
+    for operator in _OPERATORS:
+        if key.startswith(operator):
+            return operator, key[len(operator):]
+    return '=', key
+
+
+def _comparable(field: str, value: Any) -> Any:
+    if field == 'ID':
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 0
+    if field == 'DATE_MODIFY' and value:
+        return datetime.fromisoformat(str(value))
+    return '' if value is None else str(value)
+
+
+def _select(contact: Dict, select: List[str]) -> Dict:
+    if not select or '*' in select:
+        return dict(contact)
+    return {field: contact.get(field) for field in select}
+
+
+def _field_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'Y' if value else 'N'
+    return '' if value is None else str(value)
+
+
+def _substitute(value: Any, results: Dict[str, Any]) -> Any:
+    """Подставить $result[команда][путь] из результатов предыдущих команд пакета"""
+    if isinstance(value, dict):
+        return {key: _substitute(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, results) for item in value]
+    if isinstance(value, str):
+        match = _RESULT_REF.match(value)
+        if match:
+            current = results.get(match.group(1))
+            for step in re.findall(r'\[([^\]]*)\]', match.group(2)):
+                try:
+                    current = current[int(step)] if isinstance(current, list) else current[step]
+                except (KeyError, IndexError, TypeError, ValueError):
+                    return ''
+            return '' if current is None else current
+    return value
+
+
+async def serve(args: argparse.Namespace):
+    fake = FakeBitrix(
+        contacts=args.contacts,
+        seed=args.seed,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        server_error_rate=args.server_error_rate,
+        rate_limit=args.rate_limit,
+    )
+    webhook = await fake.start(args.host, args.port)
+    print(f"Контактов: {len(fake.contacts)}")
+    print(f"Вебхук: {webhook}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.stop()
+        print(fake.stats())
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Локальная замена REST API Bitrix24")
+    parser.add_argument('--contacts', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8700)
+    parser.add_argument('--latency', type=float, default=0.0, help="задержка ответа, с")
+    parser.add_argument('--jitter', type=float, default=0.0, help="случайная добавка к задержке, с")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="доля ответов QUERY_LIMIT_EXCEEDED")
+    parser.add_argument('--server-error-rate', type=float, default=0.0, help="доля ответов 500")
+    parser.add_argument('--rate-limit', type=float, default=None, help="лимит запросов в секунду")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
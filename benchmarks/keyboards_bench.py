@@ -0,0 +1,101 @@
+"""
+Микробенчмарк кэша клавиатур.
+
+Прогоняет поток «обновлений» с типичными для бота клавиатурами (главное меню
+по роли, кабинеты, шаги проверки по задачам формы) дважды: с построением
+клавиатуры на каждый вызов и через кэш (app/keyboards/cache.py). Печатает
+процессорное время на одно обновление и сэкономленную долю.
+
+Запуск: python -m benchmarks.keyboards_bench [число_обновлений]
+"""
+
+import random
+import sys
+import time
+
+from app.keyboards import (
+    get_main_menu_keyboard,
+    get_admin_cabinet_keyboard,
+    get_task_management_keyboard,
+    get_form_management_keyboard,
+)
+from app.keyboards.cache import clear_keyboard_caches, get_keyboard_cache_stats
+from app.keyboards.leader_keyboards import get_leader_cabinet_keyboard
+from app.keyboards.office_worker_keyboards import get_task_check_keyboard
+from app.keyboards.worker_keyboards import get_worker_cabinet_keyboard
+from app.services.userService import UserService
+
+ACCESS_LEVELS = (
+    UserService.ACCESS_LEVEL_ADMIN,
+    UserService.ACCESS_LEVEL_MANAGER,
+    UserService.ACCESS_LEVEL_OFFICE_WORKER,
+    UserService.ACCESS_LEVEL_LEADER,
+    UserService.ACCESS_LEVEL_WORKER,
+)
+FORMS = 30
+TASKS_PER_FORM = 20
+
+
+def make_workload(updates: int, seed: int = 1):
+    """Список (фабрика, аргументы) — по одной клавиатуре на обновление"""
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(updates):
+        kind = rng.random()
+        if kind < 0.6:
+            # Шаг проверки: задача формы, её номер и общее число задач
+            form = rng.randrange(FORMS)
+            num = rng.randrange(TASKS_PER_FORM) + 1
+            task_id = form * TASKS_PER_FORM + num
+            workload.append((get_task_check_keyboard, (task_id, num, TASKS_PER_FORM)))
+        elif kind < 0.8:
+            workload.append((get_main_menu_keyboard, (rng.choice(ACCESS_LEVELS),)))
+        elif kind < 0.9:
+            workload.append((get_admin_cabinet_keyboard, (rng.choice(ACCESS_LEVELS[:2]),)))
+        else:
+            factory = rng.choice((
+                get_task_management_keyboard,
+                get_form_management_keyboard,
+                get_leader_cabinet_keyboard,
+                get_worker_cabinet_keyboard,
+            ))
+            workload.append((factory, ()))
+    return workload
+
+
+def run(workload, cached: bool) -> float:
+    """Процессорное время прогона в секундах"""
+    started = time.process_time()
+    if cached:
+        for factory, args in workload:
+            factory(*args)
+    else:
+        for factory, args in workload:
+            factory.uncached(*args)
+    return time.process_time() - started
+
+
+def main():
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    workload = make_workload(updates)
+
+    clear_keyboard_caches()
+    uncached = run(workload, cached=False)
+    # Холодный прогон: кэш заполняется по ходу, как после запуска бота
+    cold = run(workload, cached=True)
+    warm = run(workload, cached=True)
+
+    per_update = lambda seconds: seconds / updates * 1_000_000
+    print(f"Обновлений: {updates}")
+    print(f"Без кэша:       {per_update(uncached):8.2f} мкс/обновление")
+    print(f"Кэш (холодный): {per_update(cold):8.2f} мкс/обновление")
+    print(f"Кэш (тёплый):   {per_update(warm):8.2f} мкс/обновление")
+    print(f"Экономия:       {per_update(uncached - warm):8.2f} мкс/обновление "
+          f"({(1 - warm / uncached) * 100:.1f}%)")
+
+    misses = sum(item['misses'] for item in get_keyboard_cache_stats().values())
+    print(f"Построено клавиатур: {misses}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Бенчмарк задержки обработки обновлений: long polling против вебхука.
+
+Поднимает локальную замену Bot API Telegram. Замена выдаёт обновления через
+getUpdates (long polling) или сама отправляет их POST-запросами на вебхук
+бота (app/webhook.py) с секретным токеном и не более чем max_connections
+соединениями. Бот отвечает на каждое сообщение sendMessage. Задержка
+«от появления обновления в Telegram до ответа бота» измеряется по приходу
+sendMessage. Сетевая задержка до Telegram имитируется параметром --rtt.
+
+Запуск: python -m benchmarks.webhook_bench [--updates 2000] [--rate 200]
+    [--rtt 0.03] [--handler-delay 0.005] [--users 50]
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from aiohttp import ClientSession, TCPConnector, web
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+
+from app.webhook import build_webhook_app
+
+TOKEN = '123456:BENCHMARK'
+SECRET = 'benchmark-secret'
+WEBHOOK_PATH = '/telegram/webhook'
+MAX_CONNECTIONS = 40
+
+
+class FakeTelegram:
+    """Замена Bot API: очередь обновлений, getUpdates, доставка на вебхук, учёт ответов"""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self._updates: List[Dict] = []
+        self._new_update = asyncio.Event()
+        self._ids = itertools.count(1)
+        self.created: Dict[int, float] = {}
+        self.latencies: List[float] = []
+        self.acks: List[float] = []
+        self.done = asyncio.Event()
+        self.expected = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        return f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    def reset(self, expected: int):
+        self._updates.clear()
+        self.created.clear()
+        self.latencies = []
+        self.acks = []
+        self.expected = expected
+        self.done = asyncio.Event()
+
+    def make_update(self, seq: int, user_id: int) -> Dict:
+        self.created[seq] = time.perf_counter()
+        return {
+            'update_id': next(self._ids),
+            'message': {
+                'message_id': seq,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': {'id': user_id, 'is_bot': False, 'first_name': 'Тест'},
+                'text': str(seq),
+            },
+        }
+
+    def enqueue(self, update: Dict):
+        """Обновление для getUpdates"""
+        self._updates.append(update)
+        self._new_update.set()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method'].lower()
+        params = await request.post()
+        # Запрос бота идёт до Telegram половину RTT, ответ — вторую половину
+        await asyncio.sleep(self.rtt / 2)
+        if method == 'getupdates':
+            result = await self._get_updates(int(params.get('offset') or 0), float(params.get('timeout') or 0))
+        elif method == 'sendmessage':
+            seq = int(params['text'])
+            self.latencies.append(time.perf_counter() - self.created.pop(seq))
+            if len(self.latencies) >= self.expected:
+                self.done.set()
+            result = {
+                'message_id': seq,
+                'date': int(time.time()),
+                'chat': {'id': int(params['chat_id']), 'type': 'private'},
+                'text': params['text'],
+            }
+        elif method == 'getme':
+            result = {'id': 123456, 'is_bot': True, 'first_name': 'Бот', 'username': 'bench_bot'}
+        else:
+            result = True
+        await asyncio.sleep(self.rtt / 2)
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _get_updates(self, offset: int, timeout: float) -> List[Dict]:
+        self._updates = [update for update in self._updates if update['update_id'] >= offset]
+        if not self._updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        batch = self._updates[:100]
+        return batch
+
+
+def make_dispatcher(handler_delay: float) -> Dispatcher:
+    router = Router()
+
+    @router.message()
+    async def echo(message: Message):
+        # Работа обработчика (база, клавиатура)
+        await asyncio.sleep(handler_delay)
+        await message.answer(message.text)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+def make_bot(api_url: str) -> Bot:
+    return Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)))
+
+
+async def produce(fake: FakeTelegram, args: argparse.Namespace, deliver):
+    """Создавать обновления с частотой args.rate и передавать их deliver"""
+    tasks = []
+    started = time.perf_counter()
+    for seq in range(args.updates):
+        # Обновления приходят равномерно с частотой rate
+        delay = started + seq / args.rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        update = fake.make_update(seq, 1000 + seq % args.users)
+        tasks.append(asyncio.ensure_future(deliver(update)))
+    await asyncio.gather(*tasks)
+
+
+async def bench_polling(fake: FakeTelegram, api_url: str, args: argparse.Namespace) -> List[float]:
+    fake.reset(args.updates)
+    bot = make_bot(api_url)
+    dp = make_dispatcher(args.handler_delay)
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=10))
+
+    async def deliver(update):
+        fake.enqueue(update)
+
+    await produce(fake, args, deliver)
+    await asyncio.wait_for(fake.done.wait(), 60)
+    # Ответы на последние sendMessage ещё в пути
+    await asyncio.sleep(fake.rtt + 0.05)
+    await dp.stop_polling()
+    await polling
+    return fake.latencies
+
+
+async def bench_webhook(fake: FakeTelegram, api_url: str, args: argparse.Namespace) -> List[float]:
+    fake.reset(args.updates)
+    bot = make_bot(api_url)
+    dp = make_dispatcher(args.handler_delay)
+    runner = web.AppRunner(build_webhook_app(dp, bot, SECRET, WEBHOOK_PATH), access_log=None, keepalive_timeout=75)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    url = f"http://127.0.0.1:{runner.addresses[0][1]}{WEBHOOK_PATH}"
+
+    # Telegram держит не больше max_connections соединений и переиспользует их
+    async with ClientSession(connector=TCPConnector(limit=MAX_CONNECTIONS)) as client:
+        # Неверный токен отклоняется
+        async with client.post(url, json={'update_id': 0}, headers={'X-Telegram-Bot-Api-Secret-Token': 'x'}) as response:
+            assert response.status == 401, response.status
+
+        async def deliver(update):
+            await asyncio.sleep(fake.rtt / 2)
+            sent = time.perf_counter()
+            async with client.post(url, json=update, headers={'X-Telegram-Bot-Api-Secret-Token': SECRET}) as response:
+                await response.read()
+            fake.acks.append(time.perf_counter() - sent)
+
+        await produce(fake, args, deliver)
+        await asyncio.wait_for(fake.done.wait(), 60)
+    await asyncio.sleep(fake.rtt + 0.05)
+    await runner.cleanup()
+    return fake.latencies
+
+
+def describe(name: str, latencies: List[float]):
+    ordered = sorted(latencies)
+    quantile = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    print(f"{name:<10} p50 {quantile(0.5):7.1f} мс  p95 {quantile(0.95):7.1f} мс  "
+          f"p99 {quantile(0.99):7.1f} мс  макс {ordered[-1] * 1000:7.1f} мс  "
+          f"среднее {statistics.mean(ordered) * 1000:7.1f} мс")
+
+
+async def main(args: argparse.Namespace):
+    fake = FakeTelegram(args.rtt)
+    api_url = await fake.start()
+    print(f"Обновлений: {args.updates}, частота: {args.rate}/с, RTT до Telegram: {args.rtt * 1000:.0f} мс, "
+          f"обработчик: {args.handler_delay * 1000:.0f} мс")
+    try:
+        describe("polling", await bench_polling(fake, api_url, args))
+        describe("webhook", await bench_webhook(fake, api_url, args))
+        describe("ack", fake.acks)
+    finally:
+        await fake.stop()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Задержка обработки обновлений: polling и вебхук")
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=200.0, help="обновлений в секунду")
+    parser.add_argument('--rtt', type=float, default=0.03, help="сетевая задержка до Telegram туда и обратно, с")
+    parser.add_argument('--handler-delay', type=float, default=0.005, help="время работы обработчика, с")
+    parser.add_argument('--users', type=int, default=50, help="число разных пользователей")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,44 @@
+"""
+Синхронизация контактов Bitrix24 в таблицу users вручную.
+
+Бот синхронизирует контакты сам (BITRIX_SYNC_ENABLED в config.py); скрипт нужен
+для первичной загрузки и для проверки после изменений в CRM.
+
+Запуск:
+    python bitrix_sync.py              — контакты, изменённые после последней синхронизации
+    python bitrix_sync.py --full       — все контакты и отключение пользователей без контакта
+    python bitrix_sync.py --reconcile  — только отключение пользователей без контакта
+"""
+
+import asyncio
+import logging
+import sys
+
+from app.container import AppContainer
+from app.services.bitrix_service import BitrixService
+from app.services.bitrix_sync import BitrixSyncService
+
+
+async def main(mode: str):
+    async with AppContainer():
+        await BitrixService.initialize()
+        try:
+            if mode == '--reconcile':
+                deactivated = await BitrixSyncService.reconcile_deletions()
+                print(f"✅ Отключено пользователей без контакта: {deactivated}")
+                return
+            
+            stats = await BitrixSyncService.sync(full=mode == '--full')
+            print(
+                f"✅ Получено контактов: {stats['fetched']}, записано пользователей: {stats['upserted']}, "
+                f"отключено: {stats['deactivated']} за {stats['seconds']} с"
+            )
+            print(f"Отметка DATE_MODIFY: {stats['watermark']}")
+        finally:
+            # Отправить накопленные пакетные вызовы и закрыть HTTP-сессию
+            await BitrixService.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else ''))
@@ -0,0 +1,157 @@
+"""
+Аудит планов запросов сервисов.
+
+Создаёт временную базу, вызывает методы сервисов, перехватывает выполненные
+SQL-запросы и прогоняет каждый через EXPLAIN QUERY PLAN. Если какой-либо
+запрос читает таблицу полным сканированием (SCAN), скрипт завершается с кодом 1.
+
+Запуск: python check_query_plans.py
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+
+from app.container import AppContainer
+from app.db import Database
+from app.services.userService import UserService
+from app.services.taskService import TaskService
+from app.services.formService import FormService
+from app.services.plannedCheckService import PlannedCheckService
+from app.services.checkService import CheckService
+from app.services.errorService import ErrorService
+from app.services.bitrix_sync import BitrixSyncService
+
+# Запросы, для которых полное сканирование ожидаемо (с причиной)
+ALLOWED_SCANS = {
+    'UserService.search_users_by_name': "LIKE '%...%' не может использовать индекс",
+    'TaskService.get_all_tasks': "каталог задач загружается в память целиком один раз",
+}
+
+# Метод сервиса и аргументы, с которыми он вызывается
+SERVICE_CALLS = (
+    (UserService.get_user_access_level, ('1',)),
+    (UserService.check_user_exist, ('1',)),
+    (UserService.get_user_by_name, ('Иван Иванов',)),
+    (UserService.get_user_by_id, ('1',)),
+    (UserService.get_users_by_ids, (['1', '2'],)),
+    (UserService.get_users_by_names, (['Иван Иванов'],)),
+    (UserService.search_users_by_name, ('Иван',)),
+    (UserService.get_available_reviewers, ()),
+    (UserService.update_user_id_by_name, ('Иван Иванов', '1')),
+    (UserService.update_user_available_status, ('1', True)),
+    (UserService.update_user_part_name, ('1', 'цех')),
+    (UserService.update_user_part_name_by_name, ('Иван Иванов', 'цех')),
+    (UserService.get_workers_by_part_name, ('цех',)),
+    (UserService.get_leaders, ()),
+    (UserService.get_leader_by_part_name, ('цех',)),
+    (UserService.update_user_access_level, ('Иван Иванов', UserService.ACCESS_LEVEL_WORKER)),
+    (UserService.assign_worker_to_brigade, ('Иван Иванов', 'цех')),
+    (UserService.get_office_workers, ()),
+    (UserService.mirror_bitrix_users, ([{
+        'bitrix_id': '1', 'id': '1', 'name': 'Иван Иванов',
+        'access_level': UserService.ACCESS_LEVEL_WORKER, 'available': True,
+    }],)),
+    (UserService.get_bitrix_ids, ()),
+    (UserService.deactivate_users_by_bitrix_ids, (['2'],)),
+    (BitrixSyncService.get_watermark, ()),
+    (TaskService.get_all_tasks, ()),
+    (TaskService.get_task_by_id, (1,)),
+    (TaskService.get_tasks_by_ids, ([1, 2],)),
+    (TaskService.update_task, (1, 'Задача')),
+    (FormService.get_form_by_id, (1,)),
+    (FormService.get_forms_by_ids, ([1, 2],)),
+    (FormService.get_form_by_part_name, ('цех',)),
+    (FormService.get_form_task_ids, (1,)),
+    (FormService.get_form_with_tasks, (1,)),
+    (FormService.get_form_with_tasks_by_part_name, ('цех',)),
+    (FormService.update_form_name, (1, 'цех')),
+    (FormService.update_form_tasks, (1, [1])),
+    (PlannedCheckService.get_planned_check_by_id, (1,)),
+    (PlannedCheckService.get_planned_checks_by_form, (1,)),
+    (PlannedCheckService.get_planned_checks_by_reviewer, ('1',)),
+    (PlannedCheckService.update_planned_check_time, (1, '2025-01-01 10:00:00')),
+    (PlannedCheckService.update_planned_check_reviewer, (1, '1')),
+    (PlannedCheckService.get_upcoming_checks, ()),
+    (CheckService.get_check_by_id, (1,)),
+    (CheckService.get_checks_by_form, (1,)),
+    (CheckService.get_errors_by_form, (1,)),
+    (ErrorService.get_error_by_id, (1,)),
+    (ErrorService.get_errors_by_ids, ([1, 2],)),
+    (ErrorService.update_error, (1, 'Ошибка', None)),
+    (PlannedCheckService.delete_planned_check, (1,)),
+    (CheckService.delete_check, (1,)),
+    (ErrorService.delete_task, (1,)),
+    (TaskService.delete_task, (1,)),
+    (FormService.delete_form, (1,)),
+)
+
+AUDITED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def find_scans(conn: sqlite3.Connection, sql: str) -> list:
+    """Вернуть строки плана запроса, в которых таблица читается сканированием"""
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    details = [row[3] for row in plan]
+    return [d for d in details if d.startswith('SCAN ') and d != 'SCAN CONSTANT ROW']
+
+
+async def seed():
+    """Заполнить временную базу минимальными данными, чтобы методы отработали целиком"""
+    await UserService.create_user('Иван Иванов', UserService.ACCESS_LEVEL_OFFICE_WORKER)
+    task_id = await TaskService.create_task('Задача')
+    form_id = await FormService.create_form('цех', tasks=[task_id])
+    error_id = await ErrorService.create_error('Ошибка')
+    await CheckService.create_check(str(form_id), [0], [error_id], '1', errors_tasks=[task_id])
+    await PlannedCheckService.create_planned_check('2099-01-01 10:00:00', form_id, '1')
+
+
+async def check_query_plans() -> bool:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        return await audit(os.path.join(tmp_dir, 'audit.db'))
+
+
+async def audit(db_path: str) -> bool:
+    app = AppContainer(Database(db_path))
+    db = app.db
+
+    statements = []
+    await app.setup()
+    await seed()
+    await db.set_trace_callback(statements.append)
+
+    plan_conn = sqlite3.connect(db.db_name)
+    failed = False
+    try:
+        for method, args in SERVICE_CALLS:
+            name = method.__qualname__
+            statements.clear()
+            await method(*args)
+
+            for sql in list(statements):
+                text = ' '.join(sql.split())
+                if not text.upper().startswith(AUDITED_STATEMENTS):
+                    continue
+                scans = find_scans(plan_conn, text)
+                if not scans:
+                    print(f"✅ {name}: {text}")
+                elif name in ALLOWED_SCANS:
+                    print(f"⚠️  {name}: {'; '.join(scans)} (допустимо: {ALLOWED_SCANS[name]})")
+                else:
+                    print(f"❌ {name}: {'; '.join(scans)}\n   {text}")
+                    failed = True
+    finally:
+        plan_conn.close()
+        await db.set_trace_callback(None)
+        await app.shutdown()
+
+    return not failed
+
+
+if __name__ == "__main__":
+    ok = asyncio.run(check_query_plans())
+    print()
+    print("✅ Все запросы используют индексы" if ok else "❌ Найдены запросы с полным сканированием таблиц")
+    sys.exit(0 if ok else 1)
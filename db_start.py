@@ -1,13 +1,13 @@
 import asyncio
-from app.services.userService import UserService
-from app.db import Database
+from app.container import AppContainer
 
 async def db_start():
     """Инициализация SQLite базы данных"""
     print("Инициализация базы данных...")
-    db = Database()
-    await UserService.initialize()
-    print("✅ База данных успешно инициализирована!")
+    async with AppContainer() as app:
+        print("✅ База данных успешно инициализирована!")
+        print(f"   Время запуска: {app.startup_timings['total']:.1f} мс")
+
 
 if __name__ == "__main__":
-    asyncio.run(db_start())
\ No newline at end of file
+    asyncio.run(db_start())
@@ -1,16 +1,18 @@
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 
 from app.handlers import start, cabinet, tasks, forms, leader, admin, manager, worker, office_worker
-from app.services.userService import UserService
-from app.services.taskService import TaskService
-from app.services.formService import FormService
-from app.services.plannedCheckService import PlannedCheckService
-from app.services.checkService import CheckService
-from app.services.errorService import ErrorService
+from app.container import AppContainer
+from app.middlewares import UserMiddleware
+from app.services.bitrix_service import BitrixService
+from app.services.bitrix_sync import BitrixSyncService
+from app.utils.fsm_storage import DatabaseStorage
+from app.utils.update_scheduler import SchedulingDispatcher
+from app.update_priority import classify_update
+from app.webhook import run_webhook
+from config import BITRIX_SYNC_ENABLED, BOT_MODE
 
 # Configure logging
 logging.basicConfig(
@@ -21,31 +23,63 @@ logger = logging.getLogger(__name__)
 
 
 async def main():
-    # Инициализация сервисов
-    await UserService.initialize()
-    await TaskService.initialize()
-    await FormService.initialize()
-    await PlannedCheckService.initialize()
-    await CheckService.initialize()
-    await ErrorService.initialize()
+    # Единая база данных для всех сервисов: подключение и миграции выполняются один раз
+    container = AppContainer()
+    await container.setup()
     
-    bot = Bot(token="")
-    dp = Dispatcher(storage=MemoryStorage())
+    # Пользователи читаются из локальной базы, фоновая задача переносит в неё контакты Bitrix24
+    sync_task = None
+    if BITRIX_SYNC_ENABLED:
+        await BitrixService.initialize()
+        sync_task = asyncio.create_task(BitrixSyncService.run_periodic())
     
-    # Register handlers
-    dp.include_router(start.router)
-    dp.include_router(cabinet.router)
-    dp.include_router(tasks.router)
-    dp.include_router(forms.router)
-    dp.include_router(leader.router)
-    dp.include_router(admin.router)
-    dp.include_router(manager.router)
-    dp.include_router(worker.router)
-    dp.include_router(office_worker.router)
+    # Состояния FSM хранятся в базе: начатые проверки продолжаются после перезапуска
+    storage = DatabaseStorage(container.db)
+    dp = None
     
-    # Start polling
-    logger.info("Starting bot...")
-    await dp.start_polling(bot)
+    try:
+        bot = Bot(token="")
+        # Обработчики разных чатов работают параллельно (до UPDATE_CONCURRENCY), одного чата — по очереди.
+        # Проверки и действия администратора обрабатываются раньше массовых просмотров
+        dp = SchedulingDispatcher(storage=storage, classifier=classify_update)
+        
+        # Пользователь загружается один раз на апдейт, незарегистрированные отсекаются до роутеров
+        dp.update.outer_middleware(UserMiddleware())
+        
+        # Register handlers
+        dp.include_router(start.router)
+        dp.include_router(cabinet.router)
+        dp.include_router(tasks.router)
+        dp.include_router(forms.router)
+        dp.include_router(leader.router)
+        dp.include_router(admin.router)
+        dp.include_router(manager.router)
+        dp.include_router(worker.router)
+        dp.include_router(office_worker.router)
+        
+        # Приём обновлений выбирается в config.BOT_MODE
+        logger.info("Starting bot (%s)...", BOT_MODE)
+        if BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            # Пока у бота зарегистрирован вебхук, getUpdates не работает
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        try:
+            if sync_task is not None:
+                sync_task.cancel()
+                await asyncio.gather(sync_task, return_exceptions=True)
+                await BitrixService.close()
+                logger.info("Запросы к Bitrix24: %s", BitrixService.get_governor_stats())
+            if dp is not None:
+                logger.info("Обработка обновлений: %s", dp.scheduler.stats())
+            # Несохранённые состояния FSM записываются до закрытия базы
+            await storage.close()
+            logger.info("Состояния FSM: %s", storage.stats())
+        finally:
+            # База закрывается, даже если остановка выше завершилась ошибкой
+            await container.shutdown()
 
 
 if __name__ == "__main__":
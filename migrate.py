@@ -0,0 +1,39 @@
+"""
+Применение миграций схемы базы данных.
+
+Бот применяет неприменённые миграции сам при запуске; скрипт нужен, чтобы
+выполнить их заранее (например, долгий бэкфилл на большой базе) и посмотреть
+текущую версию схемы.
+
+Запуск: python migrate.py [путь к базе SQLite]
+Без пути используется база из config (DB_BACKEND).
+"""
+
+import asyncio
+import logging
+import sys
+from typing import Optional
+
+from app.db import Database, create_database
+from app.migrations import LATEST_VERSION, get_schema_version
+
+
+async def migrate(db_path: Optional[str] = None):
+    db = Database(db_path) if db_path else create_database()
+    try:
+        before = await get_schema_version(db)
+        print(f"Текущая версия схемы: {before}, последняя: {LATEST_VERSION}")
+        
+        if before >= LATEST_VERSION:
+            print("✅ Миграции не требуются.")
+            return
+        
+        await db.initialize()
+        print(f"✅ Схема обновлена до версии {await get_schema_version(db)}")
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(migrate(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -1,5 +1,6 @@
 import asyncio
 import time
+from app.container import AppContainer
 from app.services.userService import UserService
 from app.services.taskService import TaskService
 from app.services.formService import FormService
@@ -8,11 +9,6 @@ from app.services.formService import FormService
 async def setup_user_and_form():
     """Установить part_name для пользователя, создать задачи и форму"""
     
-    # Инициализация сервисов
-    await UserService.initialize()
-    await TaskService.initialize()
-    await FormService.initialize()
-    
     user_id = "936734087"
     part_name = "новый цех"
     
@@ -50,22 +46,15 @@ async def setup_user_and_form():
         f"Проверка документации [{timestamp}]"
     ]
     
+    # Одна транзакция на все задачи; уже существующие задачи не дублируются
     created_task_ids = []
-    for i, task_info in enumerate(task_descriptions, 1):
-        try:
-            task_id = await TaskService.create_task(task_info)
-            created_task_ids.append(task_id)
-            print(f"   ✅ Задача {i} создана (ID: {task_id}): {task_info}")
-        except Exception as e:
-            # Если задача уже существует, попробуем найти её
-            all_tasks = await TaskService.get_all_tasks()
-            existing_task = next((t for t in all_tasks if t.get('info') == task_info), None)
-            if existing_task:
-                task_id = existing_task.get('id')
-                created_task_ids.append(task_id)
-                print(f"   ℹ️  Задача {i} уже существует (ID: {task_id}): {task_info}")
-            else:
-                print(f"   ❌ Ошибка при создании задачи '{task_info}': {e}")
+    try:
+        tasks = await TaskService.create_tasks(task_descriptions)
+        for i, task in enumerate(tasks, 1):
+            created_task_ids.append(task['id'])
+            print(f"   ✅ Задача {i} (ID: {task['id']}): {task['info']}")
+    except Exception as e:
+        print(f"   ❌ Ошибка при создании задач: {e}")
     
     if not created_task_ids:
         print("❌ Не удалось получить ни одной задачи!")
@@ -100,6 +89,11 @@ async def setup_user_and_form():
     print("=" * 80)
 
 
+async def main():
+    async with AppContainer():
+        await setup_user_and_form()
+
+
 if __name__ == "__main__":
-    asyncio.run(setup_user_and_form())
+    asyncio.run(main())
 
@@ -0,0 +1,145 @@
+"""
+Общие фикстуры тестов.
+
+Асинхронные тесты (async def) выполняются в собственном цикле событий без
+плагинов pytest. Фикстура, возвращающая AsyncResource, открывается внутри
+этого цикла и закрывается после теста.
+
+Фикстура db параметризована бэкендами: SQLite во временном файле и
+PostgreSQL, если задана переменная окружения TEST_POSTGRES_DSN (каждый тест
+получает отдельную схему, которая удаляется после него).
+
+Фикстура bitrix подключает BitrixService к локальной замене Bitrix24
+(benchmarks/fake_bitrix.py); сам сервер — фикстура fake_bitrix.
+"""
+import asyncio
+import inspect
+import os
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncContextManager, Callable
+
+import pytest
+
+from app.container import AppContainer
+from app.db import Database
+from app.services.bitrix_client import BitrixGovernor
+from app.services.bitrix_service import BitrixService
+from app.services.formService import FormService
+from app.services.userService import UserService
+from benchmarks.fake_bitrix import FakeBitrix
+
+POSTGRES_DSN = os.environ.get('TEST_POSTGRES_DSN', '')
+
+
+class AsyncResource:
+    """Ресурс фикстуры, который открывается в цикле событий теста"""
+
+    def __init__(self, factory: Callable[[], AsyncContextManager]):
+        self.factory = factory
+
+
+def pytest_pyfunc_call(pyfuncitem):
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    kwargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(_run(pyfuncitem.obj, kwargs))
+    return True
+
+
+async def _run(test, kwargs):
+    async with AsyncExitStack() as stack:
+        for name, value in kwargs.items():
+            if isinstance(value, AsyncResource):
+                kwargs[name] = await stack.enter_async_context(value.factory())
+        await test(**kwargs)
+
+
+def reset_caches():
+    """Кэши сервисов общие для процесса: данные прошлого теста не должны в них оставаться"""
+    UserService._cache.clear()
+    FormService._by_id.clear()
+    FormService._by_part_name.clear()
+    BitrixService.clear_cache()
+
+
+@asynccontextmanager
+async def _container(db):
+    reset_caches()
+    container = AppContainer(db)
+    await container.setup()
+    try:
+        yield db
+    finally:
+        await container.shutdown()
+        reset_caches()
+
+
+@asynccontextmanager
+async def _postgres_schema():
+    """DSN с отдельной схемой search_path, удаляемой после теста"""
+    import asyncpg
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    conn = await asyncpg.connect(POSTGRES_DSN)
+    try:
+        await conn.execute(f"CREATE SCHEMA {schema}")
+        separator = '&' if '?' in POSTGRES_DSN else '?'
+        yield f"{POSTGRES_DSN}{separator}search_path={schema}"
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        await conn.close()
+
+
+@asynccontextmanager
+async def _postgres_db():
+    from app.db_postgres import PostgresDatabase
+
+    async with _postgres_schema() as dsn:
+        async with _container(PostgresDatabase(dsn, 1, 4)) as db:
+            yield db
+
+
+@pytest.fixture(params=['sqlite', 'postgres'])
+def db(request, tmp_path):
+    """База с применёнными миграциями, внедрённая в сервисы"""
+    if request.param == 'postgres':
+        if not POSTGRES_DSN:
+            pytest.skip("TEST_POSTGRES_DSN не задан")
+        return AsyncResource(_postgres_db)
+    return AsyncResource(lambda: _container(Database(str(tmp_path / 'test.db'))))
+
+
+def fast_governor(**kwargs) -> BitrixGovernor:
+    """Регулятор без ограничения скорости и с короткими задержками повторов"""
+    options = dict(rate=1000, burst=1000, base_delay=0.01, max_delay=0.02, reset_timeout=0.2)
+    options.update(kwargs)
+    return BitrixGovernor(**options)
+
+
+@asynccontextmanager
+async def _bitrix(fake: FakeBitrix):
+    webhook = await fake.start()
+    BitrixService.clear_cache()
+    await BitrixService.initialize(webhook, fast_governor())
+    try:
+        yield fake
+    finally:
+        await BitrixService.close()
+        BitrixService.initialized = False
+        BitrixService.b = None
+        BitrixService._batcher = None
+        BitrixService.clear_cache()
+        await fake.stop()
+
+
+@pytest.fixture
+def fake_bitrix():
+    """Замена Bitrix24 без контактов; тест может задать задержку и ошибки"""
+    return FakeBitrix(contacts=0)
+
+
+@pytest.fixture
+def bitrix(fake_bitrix):
+    """BitrixService, подключённый к fake_bitrix"""
+    return AsyncResource(lambda: _bitrix(fake_bitrix))
@@ -0,0 +1,65 @@
+"""Объединение вызовов Bitrix24 в batch против локальной замены портала"""
+import asyncio
+
+import pytest
+
+from app.services.bitrix_batch import MAX_BATCH_COMMANDS, BatchRef, BitrixBatcher
+from app.services.bitrix_service import TELEGRAM_ID_FIELD, BitrixService
+
+
+def batcher(sizes: list) -> BitrixBatcher:
+    """Пакеты уходят в fake через BitrixService; sizes — число команд в каждом запросе"""
+    async def send(params):
+        sizes.append(len(params['cmd']))
+        return await BitrixService.b.call('batch', params, raw=True)
+    return BitrixBatcher(send, window=0.01)
+
+
+async def test_calls_split_at_50_commands(bitrix):
+    sizes = []
+    b = batcher(sizes)
+    ids = await asyncio.gather(*(
+        b.call('crm.contact.add', {'fields': {'NAME': f'Иванов {number}'}}) for number in range(120)
+    ))
+    await b.close()
+
+    assert sizes == [MAX_BATCH_COMMANDS, MAX_BATCH_COMMANDS, 20]
+    assert bitrix.requests['batch'] == 3
+    # Каждый вызывающий получил ID своего контакта
+    assert sorted(bitrix.contacts[int(contact_id)]['NAME'] for contact_id in ids) == sorted(
+        f'Иванов {number}' for number in range(120)
+    )
+    assert b.stats()['commands'] == 120
+
+
+async def test_group_is_not_split_between_requests(bitrix):
+    sizes = []
+    b = batcher(sizes)
+    groups = [
+        {name: ('crm.contact.add', {'fields': {'NAME': f'Петров {number} {name}'}}) for name in 'abc'}
+        for number in range(20)
+    ]
+    results = await asyncio.gather(*(b.call_group(group) for group in groups))
+    await b.close()
+
+    # 16 групп по 3 команды в первом запросе, остальные 4 — во втором
+    assert sizes == [48, 12]
+    assert all(set(group_results) == set('abc') and not errors for group_results, errors in results)
+    with pytest.raises(ValueError):
+        await b.call_group({str(number): ('crm.contact.list', {}) for number in range(MAX_BATCH_COMMANDS + 1)})
+
+
+async def test_batch_ref_resolved_by_portal(bitrix):
+    contact_id = await BitrixService.create_user('Сидоров Семён', 'worker')
+    b = batcher([])
+    results, errors = await b.call_group({
+        'find': ('crm.contact.list', {'filter': {'%NAME': 'Сидоров'}, 'select': ['ID'], 'start': -1}),
+        'update': ('crm.contact.update', {
+            'ID': BatchRef('find', '[0][ID]'), 'fields': {TELEGRAM_ID_FIELD: '777'},
+        }),
+    })
+    await b.close()
+
+    assert not errors
+    assert results['find'] == [{'ID': str(contact_id)}]
+    assert bitrix.contacts[contact_id][TELEGRAM_ID_FIELD] == '777'
@@ -0,0 +1,89 @@
+"""Кэши BitrixService против локальной замены Bitrix24"""
+import asyncio
+import time
+
+from app.services.bitrix_service import ACCESS_LEVEL_FIELD, TELEGRAM_ID_FIELD, BitrixService
+from config import BITRIX_CACHE_TTL
+
+
+def list_requests(fake) -> int:
+    return fake.requests.get('crm.contact.list', 0)
+
+
+async def wait_for_request(fake, count: int):
+    """Дождаться, пока запрос дойдёт до сервера (ответ ещё задержан)"""
+    while list_requests(fake) < count:
+        await asyncio.sleep(0.005)
+
+
+async def test_concurrent_lookups_coalesce(bitrix):
+    await BitrixService.create_user('Иванов Иван', 'worker')
+    bitrix.latency = 0.05
+
+    results = await asyncio.gather(*(BitrixService.get_user_by_name('Иванов') for _ in range(10)))
+
+    assert list_requests(bitrix) == 1
+    assert all([user['name'] for user in found] == ['Иванов Иван'] for found in results)
+    assert BitrixService.get_cache_stats()['get_user_by_name']['coalesced'] == 9
+
+
+async def test_stale_read_returns_at_once_and_refreshes_once(bitrix, monkeypatch):
+    now = [0.0]
+    cache = BitrixService._access_level_cache
+    monkeypatch.setattr(cache, '_clock', lambda: now[0])
+    contact_id = await BitrixService.create_user('Петров Пётр', 'worker')
+    await BitrixService.b.call('crm.contact.update', {'ID': contact_id, 'fields': {TELEGRAM_ID_FIELD: '555'}})
+    assert await BitrixService.get_user_access_level('555') == 'worker'
+
+    await BitrixService.b.call('crm.contact.update', {'ID': contact_id, 'fields': {ACCESS_LEVEL_FIELD: 'leader'}})
+    now[0] = BITRIX_CACHE_TTL['get_user_access_level'] + 1
+    bitrix.latency = 0.2
+    started = time.perf_counter()
+    stale = await asyncio.gather(*(BitrixService.get_user_access_level('555') for _ in range(5)))
+
+    assert time.perf_counter() - started < 0.1
+    assert stale == ['worker'] * 5
+    assert cache.stats()['refreshes'] == 1
+    await asyncio.gather(*cache._refresh_tasks)
+    assert list_requests(bitrix) == 2
+    assert await BitrixService.get_user_access_level('555') == 'leader'
+
+
+async def test_load_started_before_invalidate_is_not_cached(bitrix):
+    bitrix.latency = 0.1
+    lookup = asyncio.create_task(BitrixService.get_user_by_name('Сидоров'))
+    await wait_for_request(bitrix, 1)
+
+    # Контакт создан, пока поиск ждёт ответа: ответ поиска уже устарел
+    await BitrixService.create_user('Сидоров Семён', 'worker')
+    assert await lookup == []
+
+    found = await BitrixService.get_user_by_name('Сидоров')
+    assert [user['name'] for user in found] == ['Сидоров Семён']
+    assert list_requests(bitrix) == 2
+
+
+async def test_update_user_id_by_name_invalidates(bitrix):
+    await BitrixService.create_user('Смирнов Олег', 'leader')
+    assert not await BitrixService.check_user_exist('777')
+    assert await BitrixService.get_user_access_level('777') is None
+    assert (await BitrixService.get_user_by_name('Смирнов'))[0]['id'] == ''
+
+    assert await BitrixService.update_user_id_by_name('Смирнов', '777')
+
+    assert await BitrixService.check_user_exist('777')
+    assert await BitrixService.get_user_access_level('777') == 'leader'
+    assert (await BitrixService.get_user_by_name('Смирнов'))[0]['id'] == '777'
+
+
+async def test_create_user_invalidates_matching_searches(bitrix):
+    assert await BitrixService.get_user_by_name('Кузнецов') == []
+    assert await BitrixService.get_user_by_name('Попов') == []
+
+    await BitrixService.create_user('Кузнецов Денис', 'worker')
+
+    assert [user['name'] for user in await BitrixService.get_user_by_name('Кузнецов')] == ['Кузнецов Денис']
+    # Поиск, которому новый контакт не подходит, остаётся в кэше
+    requests = list_requests(bitrix)
+    assert await BitrixService.get_user_by_name('Попов') == []
+    assert list_requests(bitrix) == requests
@@ -0,0 +1,145 @@
+"""Регулятор запросов к Bitrix24 против локальной замены портала"""
+import asyncio
+import random
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.services.bitrix_client import (
+    BitrixClient, BitrixError, BitrixGovernor, BitrixUnavailable, CircuitBreaker, is_idempotent,
+)
+from app.services.bitrix_service import ACCESS_LEVEL_FIELD, TELEGRAM_ID_FIELD, BitrixService
+from benchmarks.fake_bitrix import FakeBitrix
+from config import BITRIX_CACHE_TTL, BITRIX_CACHE_STALE_TTL
+
+LIST_PARAMS = {'filter': {}, 'select': ['ID'], 'start': -1}
+
+
+@asynccontextmanager
+async def connect(fake: FakeBitrix, **options):
+    """Клиент к fake с быстрыми повторами; options — параметры BitrixGovernor"""
+    governor_options = dict(rate=1000, burst=1000, base_delay=0.01, max_delay=0.02, reset_timeout=0.2)
+    governor_options.update(options)
+    webhook = await fake.start()
+    client = BitrixClient(webhook, BitrixGovernor(**governor_options))
+    try:
+        yield client
+    finally:
+        await client.close()
+        await fake.stop()
+
+
+def test_is_idempotent():
+    assert is_idempotent('crm.contact.list')
+    assert is_idempotent('crm.contact.get')
+    assert not is_idempotent('crm.contact.add')
+    assert not is_idempotent('crm.contact.update')
+    assert is_idempotent('batch', {'cmd': {'a': 'crm.contact.list?filter[ID]=1', 'b': 'crm.contact.get?ID=1'}})
+    assert not is_idempotent('batch', {'cmd': {'a': 'crm.contact.list', 'b': 'crm.contact.add?fields[NAME]=x'}})
+
+
+async def test_backoff_delays(monkeypatch):
+    delays = []
+    monkeypatch.setattr(random, 'uniform', lambda low, high: delays.append(high) or 0)
+    fake = FakeBitrix(contacts=1, error_rate=1.0)
+    async with connect(fake, max_retries=4, base_delay=0.01, max_delay=0.05, failure_threshold=2) as client:
+        with pytest.raises(BitrixError) as error:
+            await client.call('crm.contact.list', LIST_PARAMS)
+
+        assert error.value.code == 'QUERY_LIMIT_EXCEEDED'
+        # Полный разброс в [0, min(max_delay, base_delay * 2^попытка)]
+        assert delays == [0.01, 0.02, 0.04, 0.05]
+        assert fake.requests['crm.contact.list'] == 5
+        # Превышение лимита не размыкает выключатель
+        assert client.governor.breaker.state == CircuitBreaker.CLOSED
+        assert client.governor.breaker.failures == 0
+
+
+async def test_rate_limited_portal():
+    fake = FakeBitrix(contacts=10, rate_limit=50, rate_burst=2)
+    async with connect(fake, max_retries=50, failure_threshold=2) as client:
+        results = await asyncio.gather(*(client.call('crm.contact.list', LIST_PARAMS) for _ in range(10)))
+
+        assert all(len(result) == 10 for result in results)
+        assert fake.injected_errors > 0
+        assert client.governor.stats()['retries']['QUERY_LIMIT_EXCEEDED'] == fake.injected_errors
+        assert client.governor.breaker.times_opened == 0
+
+
+async def test_write_not_retried_after_server_error():
+    fake = FakeBitrix(contacts=0, server_error_rate=1.0)
+    async with connect(fake) as client:
+        with pytest.raises(BitrixError) as error:
+            await client.call('crm.contact.add', {'fields': {'NAME': 'Иванов'}})
+        assert error.value.code == 'INTERNAL_SERVER_ERROR'
+
+        with pytest.raises(BitrixError):
+            await client.call('batch', {'halt': 0, 'cmd': {'a': 'crm.contact.add?fields[NAME]=Петров'}})
+
+        assert fake.requests == {'crm.contact.add': 1, 'batch': 1}
+        assert client.governor.breaker.failures == 2
+
+
+async def test_write_retried_when_throttled():
+    fake = FakeBitrix(contacts=0, rate_limit=50, rate_burst=1)
+    async with connect(fake, max_retries=50) as client:
+        await asyncio.gather(*(
+            client.call('crm.contact.add', {'fields': {'NAME': f'Иванов {number}'}}) for number in range(5)
+        ))
+
+        assert fake.injected_errors > 0
+        assert len(fake.contacts) == 5
+
+
+async def test_breaker_opens_and_probes():
+    fake = FakeBitrix(contacts=1, server_error_rate=1.0)
+    async with connect(fake, max_retries=5, failure_threshold=2, reset_timeout=0.2) as client:
+        breaker = client.governor.breaker
+        with pytest.raises(BitrixUnavailable):
+            await client.call('crm.contact.list', LIST_PARAMS)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert fake.requests['crm.contact.list'] == 2
+
+        # Пока выключатель разомкнут, запросы не отправляются
+        with pytest.raises(BitrixUnavailable):
+            await client.call('crm.contact.list', LIST_PARAMS)
+        assert fake.requests['crm.contact.list'] == 2
+
+        # Пробный запрос снова неудачен: выключатель размыкается ещё раз
+        await asyncio.sleep(0.2)
+        with pytest.raises(BitrixUnavailable):
+            await client.call('crm.contact.list', LIST_PARAMS)
+        assert fake.requests['crm.contact.list'] == 3
+        assert breaker.times_opened == 2
+
+        # Портал восстановился: проходит один пробный запрос, остальные отклоняются
+        fake.server_error_rate = 0
+        fake.latency = 0.05
+        await asyncio.sleep(0.2)
+        results = await asyncio.gather(
+            *(client.call('crm.contact.list', LIST_PARAMS) for _ in range(3)), return_exceptions=True
+        )
+        assert sum(isinstance(result, list) for result in results) == 1
+        assert sum(isinstance(result, BitrixUnavailable) for result in results) == 2
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert await client.call('crm.contact.list', LIST_PARAMS) == [{'ID': '1'}]
+
+
+async def test_stale_fallback_while_portal_is_down(bitrix, monkeypatch):
+    now = [0.0]
+    cache = BitrixService._access_level_cache
+    monkeypatch.setattr(cache, '_clock', lambda: now[0])
+    await BitrixService.b.call('crm.contact.add', {'fields': {TELEGRAM_ID_FIELD: '555', ACCESS_LEVEL_FIELD: 'leader'}})
+    assert await BitrixService.get_user_access_level('555') == 'leader'
+
+    # Запись истекла совсем, а портал отвечает 500: отдаётся последнее известное значение
+    now[0] = BITRIX_CACHE_TTL['get_user_access_level'] + BITRIX_CACHE_STALE_TTL + 1
+    bitrix.server_error_rate = 1.0
+    assert await BitrixService.get_user_access_level('555') == 'leader'
+    assert BitrixService.b.governor.breaker.state == CircuitBreaker.OPEN
+
+    # Выключатель разомкнут: значение отдаётся без обращения к порталу
+    requests = bitrix.requests['crm.contact.list']
+    assert await BitrixService.get_user_access_level('555') == 'leader'
+    assert bitrix.requests['crm.contact.list'] == requests
+    assert cache.stats()['fallbacks'] == 2
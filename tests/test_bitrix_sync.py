@@ -0,0 +1,105 @@
+"""Синхронизация контактов Bitrix24 в таблицу users"""
+from datetime import datetime, timedelta, timezone
+
+from app.models.rows import CheckRow
+from app.services.bitrix_service import ACCESS_LEVEL_FIELD, TELEGRAM_ID_FIELD, BitrixService
+from app.services.bitrix_sync import BitrixSyncService
+from app.services.checkService import CheckService
+from app.services.formService import FormService
+from app.services.userService import UserService
+
+
+async def add_contact(name: str, access_level: str, telegram_id: str = '') -> int:
+    contact_id = await BitrixService.create_user(name, access_level)
+    if telegram_id:
+        await update_contact(contact_id, {TELEGRAM_ID_FIELD: telegram_id})
+    return contact_id
+
+
+async def update_contact(contact_id: int, fields: dict):
+    await BitrixService.b.call('crm.contact.update', {'ID': contact_id, 'fields': fields})
+
+
+async def get_user(name: str):
+    users = await UserService.get_user_by_name(name)
+    return users[0] if users else None
+
+
+async def test_dropped_contact_keeps_checks(db, bitrix):
+    contact_id = await add_contact('Иванов', UserService.ACCESS_LEVEL_OFFICE_WORKER, '100')
+    await BitrixSyncService.sync(full=True)
+    await UserService.update_user_part_name_by_name('Иванов', 'Бригада 1')
+    form_id = await FormService.create_form('Бригада 1')
+    check_id = await CheckService.create_check(form_id, [5], [], '100')
+
+    # Контакту сняли уровень доступа: он больше не пользователь бота
+    await update_contact(contact_id, {ACCESS_LEVEL_FIELD: ''})
+    stats = await BitrixSyncService.sync()
+
+    assert stats['deactivated'] == 1
+    user = await get_user('Иванов')
+    assert not user.available
+    assert user.part_name == 'Бригада 1'
+    assert await UserService.get_bitrix_ids() == set()
+    assert str((await db.get_row_by_id(CheckRow, check_id)).reviewer_id) == '100'
+
+    # Уровень доступа вернули: пользователь снова связан с контактом
+    await update_contact(contact_id, {ACCESS_LEVEL_FIELD: UserService.ACCESS_LEVEL_OFFICE_WORKER})
+    await BitrixSyncService.sync()
+    user = await get_user('Иванов')
+    assert user.available
+    assert user.part_name == 'Бригада 1'
+    assert await UserService.get_bitrix_ids() == {str(contact_id)}
+
+
+async def test_telegram_id_taken_by_other_user(db, bitrix):
+    # Пользователь зарегистрирован в боте, а тот же Telegram ID указан в контакте другого человека
+    await UserService.create_user('Петров')
+    await UserService.update_user_id_by_name('Петров', '200')
+    check_id = await CheckService.create_check(await FormService.create_form('Бригада 1'), [5], [], '200')
+    await add_contact('Сидоров', UserService.ACCESS_LEVEL_WORKER, '200')
+    # Два контакта одной пачки с одинаковым Telegram ID
+    await add_contact('Смирнов', UserService.ACCESS_LEVEL_WORKER, '300')
+    await add_contact('Кузнецов', UserService.ACCESS_LEVEL_WORKER, '300')
+
+    stats = await BitrixSyncService.sync(full=True)
+
+    assert stats['upserted'] == 3
+    assert (await UserService.get_user_by_id('200')).name == 'Сидоров'
+    assert (await get_user('Петров')).id is None
+    # Проверка остаётся на Telegram ID и переходит к его новому владельцу
+    assert str((await db.get_row_by_id(CheckRow, check_id)).reviewer_id) == '200'
+    assert (await UserService.get_user_by_id('300')).name == 'Кузнецов'
+    assert (await get_user('Смирнов')).id is None
+    holders = await db.query("SELECT name FROM users WHERE id = ?", ('300',))
+    assert [row['name'] for row in holders] == ['Кузнецов']
+
+
+async def test_contact_changed_during_pass_is_synced_next_time(db, bitrix, monkeypatch):
+    first = await add_contact('Попов', UserService.ACCESS_LEVEL_WORKER)
+    await BitrixService.create_users([
+        {'name': f'Васильев {number}', 'access_level': UserService.ACCESS_LEVEL_WORKER}
+        for number in range(BitrixService.PAGE_SIZE)
+    ])
+    last = max(bitrix.contacts)
+
+    list_page = BitrixService.list_contacts_page
+
+    async def list_page_with_edits(contact_filter, select, after_id=0):
+        page = await list_page(contact_filter, select, after_id)
+        if after_id == 0:
+            # Пока читается вторая страница, меняют контакт с первой, а затем со второй
+            now = datetime.now(timezone.utc)
+            bitrix.contacts[first][ACCESS_LEVEL_FIELD] = UserService.ACCESS_LEVEL_LEADER
+            bitrix.contacts[first]['DATE_MODIFY'] = now.isoformat(timespec='seconds')
+            bitrix.contacts[last]['DATE_MODIFY'] = (now + timedelta(seconds=5)).isoformat(timespec='seconds')
+        return page
+
+    monkeypatch.setattr(BitrixService, 'list_contacts_page', list_page_with_edits)
+    stats = await BitrixSyncService.sync()
+    assert stats['fetched'] == BitrixService.PAGE_SIZE + 1
+    assert (await get_user('Попов')).access_level == UserService.ACCESS_LEVEL_WORKER
+
+    monkeypatch.setattr(BitrixService, 'list_contacts_page', list_page)
+    await BitrixSyncService.sync()
+    assert (await get_user('Попов')).access_level == UserService.ACCESS_LEVEL_LEADER
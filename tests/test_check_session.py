@@ -0,0 +1,56 @@
+"""Данные проверки office_worker в FSM"""
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+
+from app.states.check_session import GRADES, TASK_IDS, CheckSession
+from app.utils.fsm_storage import DatabaseStorage
+
+KEY = StorageKey(bot_id=1, chat_id=100, user_id=100)
+
+
+async def test_record_and_grade_list_round_trip(db):
+    storage = DatabaseStorage(db)
+    state = FSMContext(storage, KEY)
+    session = await CheckSession.start(state, 7, 'Бригада 1', [11, 12, 13])
+    await session.record(state, ok=True)
+    await session.record(state, ok=False, error_id=501)
+    await storage.close()
+
+    # Проверка продолжается после перезапуска
+    storage = DatabaseStorage(db)
+    state = FSMContext(storage, KEY)
+    session = await CheckSession.load(state)
+    assert session.current_task_id == 13
+    assert session.grade_list() == [1, 0]
+    assert session.errors_ids == [501]
+    assert session.errors_tasks == [12]
+
+    await session.record(state, ok=True)
+    assert session.current_task_id is None
+    assert session.passed == 2
+    assert (await CheckSession.load(state)).grade_list() == [1, 0, 1]
+    await storage.close()
+
+
+async def test_legacy_format_is_converted(db):
+    storage = DatabaseStorage(db)
+    state = FSMContext(storage, KEY)
+    # Проверка, начатая до перехода на компактный формат
+    await state.set_data({
+        'form_id': 7, 'part_name': 'Бригада 1', 'task_ids': [11, 12, 13],
+        'grades': [0, 1], 'errors_ids': [501], 'errors_tasks': [11],
+    })
+
+    session = await CheckSession.load(state)
+    assert session.grade_list() == [0, 1]
+    assert session.current_task_id == 13
+    assert session.errors_ids == [501]
+    data = await state.get_data()
+    assert data[TASK_IDS] == [11, 12, 13] and data[GRADES] == 0b10
+    await storage.close()
+
+
+async def test_no_check_started(db):
+    storage = DatabaseStorage(db)
+    assert await CheckSession.load(FSMContext(storage, KEY)) is None
+    await storage.close()
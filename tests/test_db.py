@@ -0,0 +1,157 @@
+"""Слой базы данных: одинаковое поведение SQLite и PostgreSQL"""
+import pytest
+
+from app.migrations.runner import LATEST_VERSION, get_schema_version
+from app.models.rows import CheckRow, TaskRow
+from app.services.checkService import CheckService
+from app.services.errorService import ErrorService
+from app.services.formService import FormService
+from app.services.plannedCheckService import PlannedCheckService
+from app.services.taskService import TaskService
+from app.services.userService import UserService
+
+
+async def test_migrations_applied(db):
+    assert await get_schema_version(db) == LATEST_VERSION
+
+
+async def test_crud(db):
+    task_id = await db.add('tasks', info='Проверить крепления')
+    assert (await db.get_row_by_id(TaskRow, task_id)).info == 'Проверить крепления'
+    # ID строкой, как его передают обработчики
+    assert (await db.get_row_by_id(TaskRow, str(task_id))).id == task_id
+
+    assert await db.update('tasks', task_id, info='Проверить сварку')
+    assert (await db.get_row_by_id(TaskRow, task_id)).info == 'Проверить сварку'
+
+    assert await db.delete('tasks', task_id)
+    assert await db.get_row_by_id(TaskRow, task_id) is None
+
+
+async def test_non_numeric_id_matches_nothing(db):
+    await db.add('tasks', info='Проверить крепления')
+    assert await db.get_row_by_id(TaskRow, 'abc') is None
+    assert await db.get_rows_by_ids(TaskRow, ['abc']) == []
+
+
+async def test_upsert_many(db):
+    rows = [{'name': 'Иванов', 'access_level': 'worker', 'available': True}]
+    await db.upsert_many('users', rows, conflict=('name',))
+    rows[0]['access_level'] = 'leader'
+    await db.upsert_many('users', rows, conflict=('name',))
+    await db.upsert_many('users', [dict(rows[0], access_level='admin')], conflict=('name',), update=())
+
+    users = await UserService.get_user_by_name('Иванов')
+    assert [user.access_level for user in users] == ['leader']
+
+
+async def _create_check(reviewer_name='Петров'):
+    await UserService.create_user(reviewer_name, UserService.ACCESS_LEVEL_OFFICE_WORKER)
+    await UserService.update_user_id_by_name(reviewer_name, '1001')
+    task_id = await TaskService.create_task('Проверить крепления')
+    form_id = await FormService.create_form('Бригада 1', [task_id])
+    error_id = await ErrorService.create_error('Нет заземления')
+    check_id = await CheckService.create_check(form_id, [5], [error_id], '1001', errors_tasks=[task_id])
+    return check_id, form_id, task_id
+
+
+async def test_deleted_task_leaves_forms(db):
+    kept_id = await TaskService.create_task('Проверить крепления')
+    removed_id = await TaskService.create_task('Проверить сварку')
+    form_id = await FormService.create_form('Бригада 1', [removed_id, kept_id])
+    await FormService.get_form_with_tasks(form_id)
+
+    assert await TaskService.delete_task(removed_id)
+    assert await FormService.get_form_task_ids(form_id) == [kept_id]
+    assert (await FormService.get_form_with_tasks(form_id))['task_ids'] == [kept_id]
+    # Состав формы хранится только в form_tasks
+    assert [row['tasks'] for row in await db.query("SELECT tasks FROM forms WHERE id = ?", (form_id,))] == ['']
+
+
+async def _plan_check(form_id, reviewer_id='1001'):
+    return await PlannedCheckService.create_planned_check('2030-01-01 10:00:00', form_id, reviewer_id)
+
+
+async def test_deleting_user_with_checks_is_refused(db):
+    check_id, form_id, _ = await _create_check()
+    planned_id = await _plan_check(form_id)
+
+    assert not await UserService.delete_user_by_name('Петров')
+    assert await UserService.get_user_by_name('Петров')
+    assert str((await db.get_row_by_id(CheckRow, check_id)).reviewer_id) == '1001'
+    assert await PlannedCheckService.get_planned_check_by_id(planned_id) is not None
+
+
+async def test_deleting_user_removes_planned_checks(db):
+    await UserService.create_user('Петров', UserService.ACCESS_LEVEL_OFFICE_WORKER)
+    await UserService.update_user_id_by_name('Петров', '1001')
+    form_id = await FormService.create_form('Бригада 1')
+    planned_id = await _plan_check(form_id)
+
+    assert await UserService.delete_user_by_name('Петров')
+    assert await PlannedCheckService.get_planned_check_by_id(planned_id) is None
+
+
+async def test_deleting_form_with_checks_is_refused(db):
+    check_id, form_id, task_id = await _create_check()
+    assert await TaskService.delete_task(task_id)
+    assert not await FormService.delete_form(form_id)
+
+    assert await FormService.get_form_by_id(form_id) is not None
+    assert await db.get_row_by_id(CheckRow, check_id) is not None
+    links = await db.query("SELECT task_id FROM check_errors WHERE check_id = ?", (check_id,))
+    assert [row['task_id'] for row in links] == [None]
+
+
+async def test_deleting_form_removes_planned_checks(db):
+    await UserService.create_user('Петров', UserService.ACCESS_LEVEL_OFFICE_WORKER)
+    await UserService.update_user_id_by_name('Петров', '1001')
+    task_id = await TaskService.create_task('Проверить крепления')
+    form_id = await FormService.create_form('Бригада 1', [task_id])
+    planned_id = await _plan_check(form_id)
+
+    assert await FormService.delete_form(form_id)
+    assert await PlannedCheckService.get_planned_check_by_id(planned_id) is None
+    assert await db.query("SELECT 1 FROM form_tasks WHERE form_id = ?", (form_id,)) == []
+
+
+async def test_new_telegram_id_keeps_checks(db):
+    check_id, form_id, _ = await _create_check()
+    planned_id = await _plan_check(form_id)
+
+    assert await UserService.update_user_id_by_name('Петров', '2002')
+
+    assert str((await db.get_row_by_id(CheckRow, check_id)).reviewer_id) == '2002'
+    assert str((await PlannedCheckService.get_planned_check_by_id(planned_id)).reviewer_id) == '2002'
+
+
+@pytest.mark.parametrize('value, type_name, expected', [
+    ('5', 'int4', 5),
+    (True, 'int8', 1),
+    ('abc', 'int4', None),
+    ('1.5', 'float8', 1.5),
+    ('abc', 'numeric', None),
+    (1, 'bool', True),
+    (5, 'text', '5'),
+    (None, 'int4', None),
+])
+def test_coerce_param(value, type_name, expected):
+    db_postgres = pytest.importorskip('app.db_postgres')
+    assert db_postgres.coerce_param(value, type_name) == expected
+
+
+async def test_form_cache_invalidated_on_rename_and_delete(db):
+    form_id = await FormService.create_form('Бригада 1')
+    assert (await FormService.get_form_by_id(form_id)).part_name == 'Бригада 1'
+    assert (await FormService.get_form_by_part_name('Бригада 1')).id == form_id
+    # Отсутствие формы тоже кэшируется
+    assert await FormService.get_form_by_part_name('Бригада 2') is None
+
+    assert await FormService.update_form_name(form_id, 'Бригада 2')
+    assert (await FormService.get_form_by_id(form_id)).part_name == 'Бригада 2'
+    assert await FormService.get_form_by_part_name('Бригада 1') is None
+    assert (await FormService.get_form_by_part_name('Бригада 2')).id == form_id
+
+    assert await FormService.delete_form(form_id)
+    assert await FormService.get_form_by_id(form_id) is None
+    assert await FormService.get_form_by_part_name('Бригада 2') is None
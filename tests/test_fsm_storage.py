@@ -0,0 +1,70 @@
+"""Хранилище состояний FSM в базе данных"""
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+
+from app.utils.fsm_storage import DatabaseStorage
+
+
+def storage_key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+
+async def test_state_survives_restart(db):
+    storage = DatabaseStorage(db)
+    await storage.set_state(storage_key(1), 'CheckStates:grading')
+    await storage.update_data(storage_key(1), {'form_id': 5})
+    await storage.close()
+
+    restarted = DatabaseStorage(db)
+    assert await restarted.get_state(storage_key(1)) == 'CheckStates:grading'
+    assert await restarted.get_data(storage_key(1)) == {'form_id': 5}
+    await restarted.close()
+
+
+async def test_unserializable_session_does_not_block_others(db):
+    storage = DatabaseStorage(db)
+    await storage.set_data(storage_key(1), {'broken': object()})
+    await storage.set_data(storage_key(2), {'form_id': 5})
+
+    assert await storage.flush() == 1
+    assert await DatabaseStorage(db).get_data(storage_key(2)) == {'form_id': 5}
+    assert await DatabaseStorage(db).get_data(storage_key(1)) == {}
+
+    # Следующее изменение сессии записывается как обычно
+    await storage.set_data(storage_key(1), {'form_id': 7})
+    await storage.set_data(storage_key(2), {'form_id': 6})
+    assert await storage.flush() == 2
+    assert await DatabaseStorage(db).get_data(storage_key(1)) == {'form_id': 7}
+    await storage.close()
+
+
+async def test_unserializable_session_is_kept_in_memory(db):
+    now = [1000.0]
+    storage = DatabaseStorage(db, memory_idle=10, clock=lambda: now[0])
+    await storage.set_data(storage_key(1), {'broken': object()})
+    await storage.set_data(storage_key(2), {'form_id': 5})
+    await storage.flush()
+
+    now[0] += 60
+    storage._evict_idle()
+    # Записанная сессия выгружена, несохранённая осталась в памяти и видна в счётчиках
+    assert storage.stats()['sessions'] == 1
+    assert storage.stats()['unserializable'] == 1
+    assert 'broken' in await storage.get_data(storage_key(1))
+    # Повторная запись не пытается сериализовать те же данные
+    assert await storage.flush() == 0
+    await storage.close()
+
+
+async def test_flush_loop_stops_when_nothing_to_write(db):
+    storage = DatabaseStorage(db, flush_interval=0.01)
+    await storage.set_state(storage_key(1), 'CheckStates:grading')
+    flusher = storage._flusher
+    await asyncio.wait_for(flusher, 1)
+    assert storage.stats()['dirty'] == 0
+
+    # Следующее изменение запускает запись снова
+    await storage.set_state(storage_key(1), 'CheckStates:adding_error_comment')
+    assert storage._flusher is not flusher and not storage._flusher.done()
+    await storage.close()
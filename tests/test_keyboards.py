@@ -0,0 +1,22 @@
+"""Кэш готовых клавиатур"""
+import pytest
+from pydantic import ValidationError
+
+from app.keyboards.admin_keyboards import get_user_edit_keyboard
+from app.keyboards.cache import FrozenInlineKeyboardMarkup
+
+
+def test_same_arguments_return_same_markup():
+    markup = get_user_edit_keyboard('Иванов')
+
+    assert get_user_edit_keyboard('Иванов') is markup
+    assert get_user_edit_keyboard('Петров') is not markup
+    assert markup.inline_keyboard == get_user_edit_keyboard.uncached('Иванов').inline_keyboard
+
+
+def test_cached_markup_is_frozen():
+    markup = get_user_edit_keyboard('Иванов')
+
+    assert isinstance(markup, FrozenInlineKeyboardMarkup)
+    with pytest.raises(ValidationError):
+        markup.inline_keyboard = []
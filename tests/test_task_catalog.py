@@ -0,0 +1,59 @@
+"""Каталог задач в памяти: перечитывание по TTL и изменения во время загрузки"""
+import asyncio
+
+from app.models.rows import TaskRow
+from app.services.taskService import TaskCatalog
+
+
+class SlowSelect:
+    """База, которая прочитала задачи, но отдаёт их только после gate"""
+
+    def __init__(self, db):
+        self.db = db
+        self.read = asyncio.Event()
+        self.gate = asyncio.Event()
+
+    async def select(self, model, where='', params=()):
+        rows = await self.db.select(model, where, params)
+        self.read.set()
+        await self.gate.wait()
+        return rows
+
+
+async def test_catalog_expires(db):
+    now = [0.0]
+    catalog = TaskCatalog(ttl=10, clock=lambda: now[0])
+    await catalog.ensure_loaded(db)
+
+    # Задачу добавил другой экземпляр бота
+    task_id = await db.add('tasks', info='Проверить крепления')
+    await catalog.ensure_loaded(db)
+    assert catalog.get(task_id) is None
+
+    now[0] = 10
+    await catalog.ensure_loaded(db)
+    assert catalog.get(task_id).info == 'Проверить крепления'
+
+
+async def test_change_during_reload_is_kept(db):
+    removed_id = await db.add('tasks', info='Старая задача')
+    slow = SlowSelect(db)
+    catalog = TaskCatalog()
+    slow.gate.set()
+    await catalog.ensure_loaded(slow)
+    slow.gate.clear()
+    slow.read.clear()
+
+    reload = asyncio.create_task(catalog.reload(slow))
+    await slow.read.wait()
+    # Запись после чтения каталога
+    task_id = await db.add('tasks', info='Новая задача')
+    catalog.apply(slow, lambda: catalog.put(TaskRow(task_id, 'Новая задача')))
+    await db.delete('tasks', removed_id)
+    catalog.apply(slow, lambda: catalog.remove(removed_id))
+    slow.gate.set()
+    await reload
+
+    assert catalog.get(task_id).info == 'Новая задача'
+    assert catalog.get(removed_id) is None
+    assert [task.id for task in catalog.snapshot().tasks] == [task_id]
@@ -0,0 +1,78 @@
+"""Выбор полосы обновления без обращений к базе"""
+from datetime import datetime
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from app.states.office_worker_states import CheckStates
+from app.services.userService import UserService
+from app.update_priority import classify_update
+from app.utils.fsm_storage import DatabaseStorage
+from app.utils.update_scheduler import LANE_HIGH, LANE_LOW, LANE_NORMAL
+
+USER_ID = 100
+
+
+def message_update(text: str = 'Нет заземления') -> Update:
+    return Update(update_id=1, message=Message(
+        message_id=1, date=datetime.now(), text=text,
+        chat=Chat(id=USER_ID, type='private'), from_user=User(id=USER_ID, is_bot=False, first_name='Иван'),
+    ))
+
+
+def callback_update(data: str) -> Update:
+    user = User(id=USER_ID, is_bot=False, first_name='Иван')
+    return Update(update_id=1, callback_query=CallbackQuery(
+        id='1', from_user=user, chat_instance='1', data=data,
+        message=Message(message_id=1, date=datetime.now(), chat=Chat(id=USER_ID, type='private'), text='Меню'),
+    ))
+
+
+@pytest.fixture
+def bot():
+    return Bot('42:TEST')
+
+
+@pytest.mark.parametrize('data', ['conduct_check', 'task_check_ok_5', 'error_3', 'check_back_to_menu'])
+def test_check_buttons_are_high(bot, data):
+    assert classify_update(Dispatcher(), bot, callback_update(data)) == LANE_HIGH
+
+
+@pytest.mark.parametrize('data', ['worker_view_grades', 'leader_view_errors', 'reports', 'worker_info_7'])
+def test_read_only_views_are_low(bot, data):
+    assert classify_update(Dispatcher(), bot, callback_update(data)) == LANE_LOW
+
+
+def test_other_updates_are_normal(bot):
+    assert classify_update(Dispatcher(), bot, callback_update('admin_menu')) == LANE_NORMAL
+    assert classify_update(Dispatcher(), bot, message_update()) == LANE_NORMAL
+
+
+async def test_admin_is_high_once_cached(db, bot):
+    await UserService.create_user('Иванов', UserService.ACCESS_LEVEL_ADMIN)
+    await UserService.update_user_id_by_name('Иванов', str(USER_ID))
+    update = callback_update('admin_menu')
+
+    # Пользователя нет в кэше: база не запрашивается, полоса обычная
+    assert classify_update(Dispatcher(), bot, update) == LANE_NORMAL
+    await UserService.get_user_by_id(str(USER_ID))
+    assert classify_update(Dispatcher(), bot, update) == LANE_HIGH
+
+
+async def test_check_state_is_high_once_loaded(db, bot):
+    storage = DatabaseStorage(db)
+    dispatcher = Dispatcher(storage=storage)
+    key = dispatcher.fsm.resolve_context(bot, USER_ID, USER_ID).key
+    await storage.set_state(key, CheckStates.adding_error_comment)
+    assert classify_update(dispatcher, bot, message_update()) == LANE_HIGH
+    await storage.close()
+
+    # После перезапуска сессия ещё не загружена: полоса обычная до первого обращения к ней
+    restarted = DatabaseStorage(db)
+    dispatcher = Dispatcher(storage=restarted)
+    assert classify_update(dispatcher, bot, message_update()) == LANE_NORMAL
+    assert restarted.stats()['loads'] == 0
+    await restarted.get_state(key)
+    assert classify_update(dispatcher, bot, message_update()) == LANE_HIGH
+    await restarted.close()
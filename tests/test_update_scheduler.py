@@ -0,0 +1,173 @@
+"""Планировщик обновлений: очереди чатов, ограничение очереди, остановка и метрики"""
+import asyncio
+import time
+from datetime import datetime
+
+from aiogram.types import Chat, Message, Update, User
+
+from app.utils.update_scheduler import LANE_HIGH, LANE_LOW, LANE_NORMAL, UpdateScheduler
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    return Update(update_id=update_id, message=Message(
+        message_id=update_id, date=datetime.now(), text='/start',
+        chat=Chat(id=chat_id, type='private'), from_user=User(id=chat_id, is_bot=False, first_name='Иван'),
+    ))
+
+
+class RecordingDispatcher:
+    """Вместо Dispatcher: записывает начало и конец обработки, обработка ждёт release"""
+
+    def __init__(self, delay: float = 0.0, fail: tuple = ()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.events = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def feed_update(self, bot, update: Update, **kwargs):
+        self.events.append(('start', update.update_id))
+        await self.release.wait()
+        await asyncio.sleep(self.delay)
+        self.events.append(('end', update.update_id))
+        if update.update_id in self.fail:
+            raise RuntimeError('ошибка обработчика')
+
+    def position(self, event: str, update_id: int) -> int:
+        return self.events.index((event, update_id))
+
+
+async def wait_until(condition, timeout: float = 1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'условие не выполнилось'
+        await asyncio.sleep(0.001)
+
+
+async def start(dispatcher, **options) -> UpdateScheduler:
+    scheduler = UpdateScheduler(dispatcher, stats_interval=0, **options)
+    await scheduler.start()
+    return scheduler
+
+
+async def test_same_chat_in_order_other_chats_in_parallel():
+    dispatcher = RecordingDispatcher(delay=0.02)
+    scheduler = await start(dispatcher, concurrency=4)
+    for update_id in (1, 2, 3):
+        await scheduler.submit(None, make_update(update_id, chat_id=10))
+    await scheduler.submit(None, make_update(4, chat_id=20))
+    await scheduler.close()
+
+    # Обновления одного чата — строго по очереди
+    assert dispatcher.position('end', 1) < dispatcher.position('start', 2)
+    assert dispatcher.position('end', 2) < dispatcher.position('start', 3)
+    # Другой чат не ждёт первого
+    assert dispatcher.position('start', 4) < dispatcher.position('end', 1)
+
+
+async def test_submit_waits_while_queue_is_full():
+    dispatcher = RecordingDispatcher()
+    dispatcher.release.clear()
+    scheduler = await start(dispatcher, concurrency=1, queue_size=2)
+    await scheduler.submit(None, make_update(1, chat_id=10))
+    await wait_until(lambda: scheduler.in_flight == 1)
+    await scheduler.submit(None, make_update(2, chat_id=20))
+    await scheduler.submit(None, make_update(3, chat_id=30))
+
+    blocked = asyncio.create_task(scheduler.submit(None, make_update(4, chat_id=40)))
+    await asyncio.sleep(0.02)
+    assert not blocked.done()
+    assert scheduler.queue_depth == 2
+
+    # Обработчик освободился: место в очереди появилось
+    dispatcher.release.set()
+    await asyncio.wait_for(blocked, 1)
+    await scheduler.close()
+    assert scheduler.stats()['backpressure_waits'] == 1
+    assert scheduler.processed == 4
+
+
+async def test_one_chat_cannot_fill_queue():
+    dispatcher = RecordingDispatcher()
+    dispatcher.release.clear()
+    scheduler = await start(dispatcher, concurrency=1, queue_size=10, chat_queue_size=2)
+    for update_id in (1, 2, 3, 4):
+        await scheduler.submit(None, make_update(update_id, chat_id=10))
+    await scheduler.submit(None, make_update(5, chat_id=20))
+
+    dispatcher.release.set()
+    await scheduler.close()
+    stats = scheduler.stats()
+    assert stats['chat_overflows'] == 2
+    assert stats['submitted'] == stats['processed'] == 3
+    assert ('end', 5) in dispatcher.events
+
+
+async def test_close_drains_queue():
+    dispatcher = RecordingDispatcher(delay=0.01)
+    scheduler = await start(dispatcher, concurrency=2, shutdown_timeout=1)
+    for update_id in range(6):
+        await scheduler.submit(None, make_update(update_id, chat_id=update_id % 2))
+    await scheduler.close()
+
+    assert scheduler.processed == 6
+    assert scheduler.queue_depth == scheduler.in_flight == 0
+    # После остановки обновления не принимаются
+    await scheduler.submit(None, make_update(7, chat_id=1))
+    assert scheduler.submitted == 6
+
+
+async def test_close_gives_up_after_shutdown_timeout():
+    dispatcher = RecordingDispatcher()
+    dispatcher.release.clear()
+    scheduler = await start(dispatcher, concurrency=1, shutdown_timeout=0.05)
+    await scheduler.submit(None, make_update(1, chat_id=10))
+    await scheduler.submit(None, make_update(2, chat_id=10))
+
+    started = time.monotonic()
+    await scheduler.close()
+    assert time.monotonic() - started < 0.5
+    assert scheduler.processed == 0
+    assert scheduler.queue_depth == 1
+
+
+async def test_stats_counters():
+    dispatcher = RecordingDispatcher(fail=(2,))
+    scheduler = await start(dispatcher, concurrency=2)
+    for update_id in (1, 2, 3):
+        await scheduler.submit(None, make_update(update_id, chat_id=update_id))
+    await scheduler.close()
+
+    stats = scheduler.stats()
+    assert stats['submitted'] == 3
+    assert stats['processed'] == 2
+    assert stats['errors'] == 1
+    assert stats['in_flight'] == stats['queue_depth'] == 0
+    assert stats['queue_depth_max'] >= 1
+    assert stats['lanes']['normal']['started'] == 3
+    assert stats['lanes']['normal']['queue_depth'] == 0
+
+
+async def test_high_lane_not_starved_by_low_flood():
+    dispatcher = RecordingDispatcher()
+    dispatcher.release.clear()
+    high = set(range(100, 105))
+    scheduler = await start(
+        dispatcher, concurrency=1, queue_size=100,
+        classifier=lambda dp, bot, update: LANE_HIGH if update.update_id in high else LANE_LOW,
+        lane_weights={LANE_HIGH: 8, LANE_NORMAL: 3, LANE_LOW: 1},
+    )
+    # Обработчик занят, за ним — наплыв просмотров, затем нажатия проверки
+    await scheduler.submit(None, make_update(0, chat_id=0))
+    await wait_until(lambda: scheduler.in_flight == 1)
+    for update_id in range(1, 51):
+        await scheduler.submit(None, make_update(update_id, chat_id=update_id))
+    for update_id in sorted(high):
+        await scheduler.submit(None, make_update(update_id, chat_id=update_id))
+
+    dispatcher.release.set()
+    await scheduler.close()
+    order = [update_id for event, update_id in dispatcher.events if event == 'start'][1:]
+    # На 8 обновлений high приходится одно из low: все нажатия — среди первых шести
+    assert set(order[:6]) >= high
+    assert scheduler.stats()['lanes'][LANE_HIGH]['started'] == 5
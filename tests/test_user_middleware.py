@@ -0,0 +1,96 @@
+"""UserMiddleware: незарегистрированные пользователи отклоняются до роутеров"""
+from datetime import datetime
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+from aiogram.types import Update
+
+from app.middlewares.user import NOT_REGISTERED_TEXT, UserMiddleware
+from app.services.userService import UserService
+from app.states.registration import RegistrationStates
+
+USER_ID = 100
+
+
+class RecordingSession(BaseSession):
+    """Сессия бота без сети: запоминает отправленные методы"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(method)
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def bot():
+    return Bot('42:TEST', session=RecordingSession())
+
+
+def make_update(bot: Bot, text: str = None, callback_data: str = None) -> Update:
+    user = {'id': USER_ID, 'is_bot': False, 'first_name': 'Иван'}
+    message = {
+        'message_id': 1, 'date': int(datetime.now().timestamp()), 'text': text or 'Меню',
+        'chat': {'id': USER_ID, 'type': 'private'}, 'from': user,
+    }
+    if callback_data is None:
+        return Update.model_validate({'update_id': 1, 'message': message}, context={'bot': bot})
+    return Update.model_validate({'update_id': 1, 'callback_query': {
+        'id': '1', 'from': user, 'chat_instance': '1', 'data': callback_data, 'message': message,
+    }}, context={'bot': bot})
+
+
+async def call(update: Update, **data):
+    handled = []
+
+    async def handler(event, handler_data):
+        handled.append(handler_data)
+        return 'handled'
+
+    data['event_from_user'] = (update.message or update.callback_query).from_user
+    await UserMiddleware()(handler, update, data)
+    return handled[0] if handled else None
+
+
+@pytest.mark.parametrize('text', ['/start', '/register', '/cancel', '/menu@test_bot', '/START'])
+async def test_public_commands_pass(db, bot, text):
+    data = await call(make_update(bot, text))
+    assert data is not None and data['user'] is None
+    assert bot.session.requests == []
+
+
+@pytest.mark.parametrize('text', ['/admin', 'Иванов Иван'])
+async def test_unregistered_message_is_rejected(db, bot, text):
+    assert await call(make_update(bot, text)) is None
+    request, = bot.session.requests
+    assert isinstance(request, SendMessage) and request.text == NOT_REGISTERED_TEXT
+
+
+async def test_unregistered_callback_is_rejected(db, bot):
+    assert await call(make_update(bot, callback_data='worker_view_grades')) is None
+    request, = bot.session.requests
+    assert isinstance(request, AnswerCallbackQuery) and request.show_alert
+
+
+async def test_registration_step_passes(db, bot):
+    state = RegistrationStates.waiting_for_fio.state
+    assert await call(make_update(bot, 'Иванов Иван'), raw_state=state) is not None
+    assert bot.session.requests == []
+
+
+async def test_registered_user_passes(db, bot):
+    await UserService.create_user('Иванов', UserService.ACCESS_LEVEL_WORKER)
+    await UserService.update_user_id_by_name('Иванов', str(USER_ID))
+
+    data = await call(make_update(bot, callback_data='worker_view_grades'))
+    assert data['user'].name == 'Иванов'
+    assert data['access_level'] == UserService.ACCESS_LEVEL_WORKER
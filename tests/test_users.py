@@ -0,0 +1,47 @@
+"""UserService: пакетное добавление пользователей и кэш по Telegram ID"""
+from app.services.userService import UserService
+
+
+async def test_add_users_skips_existing(db):
+    await UserService.create_user('Иванов', UserService.ACCESS_LEVEL_LEADER, available=False)
+
+    added = await UserService.add_users([
+        {'name': 'Иванов', 'access_level': UserService.ACCESS_LEVEL_WORKER},
+        {'name': 'Петров', 'access_level': UserService.ACCESS_LEVEL_WORKER},
+    ])
+
+    assert added == ['Петров']
+    existing, = await UserService.get_user_by_name('Иванов')
+    assert existing.access_level == UserService.ACCESS_LEVEL_LEADER
+    assert not existing.available
+
+
+async def test_cache_invalidated_on_writes(db):
+    hits = UserService.get_cache_stats()['hits']
+    await UserService.create_user('Иванов', UserService.ACCESS_LEVEL_WORKER)
+    # «Не зарегистрирован» тоже кэшируется и сбрасывается регистрацией
+    assert await UserService.get_user_by_id('100') is None
+    await UserService.update_user_id_by_name('Иванов', '100')
+    assert (await UserService.get_user_by_id('100')).name == 'Иванов'
+
+    await UserService.update_user_access_level('Иванов', UserService.ACCESS_LEVEL_LEADER)
+    assert (await UserService.get_user_by_id('100')).access_level == UserService.ACCESS_LEVEL_LEADER
+
+    await UserService.update_user_part_name('100', 'Бригада 1')
+    assert (await UserService.get_user_by_id('100')).part_name == 'Бригада 1'
+
+    await UserService.update_user_part_name_by_name('Иванов', 'Бригада 2')
+    assert (await UserService.get_user_by_id('100')).part_name == 'Бригада 2'
+
+    await UserService.update_user_available_status('100', False)
+    assert not (await UserService.get_user_by_id('100')).available
+
+    # Новый Telegram ID: старый больше не указывает на пользователя
+    await UserService.update_user_id_by_name('Иванов', '200')
+    assert await UserService.get_user_by_id('100') is None
+    assert (await UserService.get_user_by_id('200')).name == 'Иванов'
+
+    assert await UserService.delete_user_by_name('Иванов')
+    assert await UserService.get_user_by_id('200') is None
+    # Ни одно чтение после записи не попало в устаревшую запись кэша
+    assert UserService.get_cache_stats()['hits'] == hits
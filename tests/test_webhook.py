@@ -0,0 +1,40 @@
+"""Приём обновлений через вебхук"""
+from datetime import datetime
+
+from aiogram import Bot
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.utils.update_scheduler import SchedulingDispatcher
+from app.webhook import build_webhook_app
+
+SECRET = 'webhook-secret'
+UPDATE = {
+    'update_id': 1,
+    'message': {
+        'message_id': 1, 'date': int(datetime.now().timestamp()), 'text': '/start',
+        'chat': {'id': 100, 'type': 'private'}, 'from': {'id': 100, 'is_bot': False, 'first_name': 'Иван'},
+    },
+}
+
+
+async def post_update(headers: dict) -> tuple:
+    dp = SchedulingDispatcher(stats_interval=0)
+    app = build_webhook_app(dp, Bot('42:TEST'), secret_token=SECRET, path='/webhook')
+    async with TestClient(TestServer(app)) as client:
+        response = await client.post('/webhook', json=UPDATE, headers=headers)
+        status = response.status
+    return status, dp.scheduler.stats()
+
+
+async def test_wrong_secret_token_is_rejected():
+    for headers in ({}, {'X-Telegram-Bot-Api-Secret-Token': 'wrong'}):
+        status, stats = await post_update(headers)
+        assert status == 401
+        assert stats['submitted'] == 0
+
+
+async def test_update_with_secret_token_is_queued():
+    status, stats = await post_update({'X-Telegram-Bot-Api-Secret-Token': SECRET})
+    assert status == 200
+    # Остановка приложения дожидается обработки очереди
+    assert stats['submitted'] == stats['processed'] == 1